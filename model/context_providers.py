@@ -0,0 +1,262 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from tools.upbit.trade_pool import credential_fingerprint, get_trade
+from tools.upbit.portfolio_valuation import value_portfolio
+
+# 첫 토큰 전에 컨텍스트 수집을 기다리는 최대 시간 (초, 모든 제공자 공통)
+CONTEXT_BUDGET = 1.5
+# 이 시간 안에 조회한 값은 다시 조회하지 않고 그대로 사용 (초)
+FRESH_SECONDS = 10.0
+# 컨텍스트 조회 스레드 수
+CONTEXT_WORKERS = 4
+# 항상 참조하는 PDF 문서 폴더
+DOCUMENT_DIR = "tools/web2pdf/always_see_doc_storage"
+
+# 조회는 이 풀에서 실행하므로 예산을 넘겨 응답을 먼저 시작해도 조회는 끝까지 진행되어 캐시를 채움
+_EXECUTOR = ThreadPoolExecutor(max_workers=CONTEXT_WORKERS, thread_name_prefix="chat-context")
+
+
+class ContextProvider:
+    """
+    대화 컨텍스트의 한 부분 (포트폴리오, 자동 거래 상태 등)
+
+    capture는 Streamlit 스크립트 스레드에서 세션 상태를 읽어 (캐시 키, fetch 인자)를
+    반환하고, fetch는 조회 스레드에서 실제 조회를 실행합니다 (세션 상태에 접근하지 않음).
+    값은 키별로 캐시하며, max_age 안의 값은 조회 없이 쓰고 마감 시각까지 조회가 끝나지
+    않으면 마지막으로 받은 값을 대신 씁니다.
+    """
+
+    name = "provider"
+    max_age = FRESH_SECONDS
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 캐시 키 -> (값, 조회 시각)
+        self._cache = {}
+        # 캐시 키 -> 진행 중인 조회 Future
+        self._pending = {}
+        self.counters = {"fresh": 0, "cached": 0, "stale": 0, "missed": 0, "errors": 0}
+
+    def capture(self):
+        return None, ()
+
+    def fetch(self, *args):
+        """조회 스레드에서 실행 (하위 클래스에서 구현, 기본값은 None)"""
+        return None
+
+    def _store(self, key, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+            if future.exception() is not None:
+                self.counters["errors"] += 1
+                print(f"{self.name} 컨텍스트 조회 중 오류: {future.exception()}")
+                return
+            self._cache[key] = (future.result(), time.time())
+
+    def _start(self, key, args):
+        """조회 시작 (같은 키의 조회가 진행 중이면 그 Future 재사용)"""
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = _EXECUTOR.submit(self.fetch, *args)
+            self._pending[key] = future
+        future.add_done_callback(lambda f: self._store(key, f))
+        return future
+
+    async def collect(self, key, args, deadline):
+        """
+        마감 시각(time.monotonic 기준)까지 값 수집
+
+        Returns:
+            tuple: (값, 값의 나이(초) - 이번에 조회했으면 0, 값이 없으면 None)
+        """
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached and time.time() - cached[1] < self.max_age:
+            self.counters["cached"] += 1
+            return cached[0], 0.0
+
+        future = self._start(key, args)
+        try:
+            value = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)),
+                                           max(deadline - time.monotonic(), 0))
+            self.counters["fresh"] += 1
+            return value, 0.0
+        except asyncio.TimeoutError:
+            pass
+        except Exception:
+            # 오류는 _store에서 기록
+            pass
+
+        if cached:
+            self.counters["stale"] += 1
+            return cached[0], time.time() - cached[1]
+        self.counters["missed"] += 1
+        return None, None
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, pending=len(self._pending), cached_keys=len(self._cache))
+
+
+class PortfolioProvider(ContextProvider):
+    """사용자 포트폴리오 요약 (포트폴리오 화면, AutoTrader와 같은 평가 결과 공유)"""
+
+    name = "portfolio"
+
+    def capture(self):
+        # 세션 상태만 읽음 (키 검증은 업비트 요청이므로 fetch에서 조회 스레드로)
+        simulated = st.session_state.get("simulated_trade")
+        if simulated is not None:
+            return ("simulated", id(simulated)), (simulated,)
+        access_key = st.session_state.get("upbit_access_key")
+        secret_key = st.session_state.get("upbit_secret_key")
+        if not access_key or not secret_key:
+            return None, ()
+        return credential_fingerprint(access_key, secret_key), (None, access_key, secret_key)
+
+    def fetch(self, trade=None, access_key=None, secret_key=None):
+        # 모의 거래 설정 시 SimulatedTrade, 아니면 키별 공유 인스턴스 (채팅 도구와 같은 인스턴스)
+        if trade is None and access_key:
+            trade = get_trade(access_key, secret_key)
+        if trade is None:
+            return None
+        # 샘플 데이터는 사용하지 않음
+        valuation = value_portfolio(trade)
+        if not valuation or not valuation["summary"]:
+            return None
+        summary, holdings = valuation["summary"], valuation["holdings"]
+        return {
+            "summary": {name: round(summary.get(name, 0), 2) for name in
+                        ("총보유자산", "총평가손익", "총수익률", "일평가수익률", "보유현금", "코인평가금액")},
+            "holdings": [
+                {"coin": row["코인"], "amount": round(row["수량"], 8), "value": round(row["평가금액"]),
+                 "pnl_pct": round(row["수익률"], 2)}
+                for _, row in holdings.iterrows()
+            ],
+        }
+
+
+class AutoTraderProvider(ContextProvider):
+    """자동 거래 에이전트 상태 (실행 중이면 설정, 최근 거래, 포트폴리오 포함)"""
+
+    name = "auto_trader"
+    max_age = 5.0
+
+    def capture(self):
+        trader = st.session_state.get("auto_trader")
+        return (id(trader) if trader else None), (trader,)
+
+    def fetch(self, trader=None):
+        if not trader:
+            return None
+        if not trader.is_running:
+            return {"running": False}
+
+        status_info = trader.get_status()
+        return {
+            "running": True,
+            "status": status_info['status'],
+            "last_check": status_info['last_check'],
+            "next_check": status_info['next_check'],
+            "daily_trading_count": status_info['daily_trading_count'],
+            "max_trading_count": status_info['max_trading_count'],
+            "interval_minutes": trader.interval_minutes,
+            "max_investment": trader.max_investment,
+            "risk_level": trader.risk_level,
+            "target_coins": trader.target_coins,
+            "recent_trades": [
+                {"time": trade.get('timestamp'), "action": trade.get('action'),
+                 "ticker": trade.get('ticker'), "amount": trade.get('amount')}
+                for trade in trader.trading_history[-3:]
+            ],
+            "portfolio": {item["ticker"]: {"amount": item["amount"], "value": round(item["value"])}
+                          for item in trader.get_portfolio()},
+        }
+
+
+class MarketProvider(ContextProvider):
+    """실행 중인 자동 거래 에이전트의 관심 코인 시세"""
+
+    name = "market"
+    max_age = 5.0
+
+    def capture(self):
+        trader = st.session_state.get("auto_trader")
+        if not trader or not trader.is_running:
+            return None, ()
+        return (id(trader), tuple(trader.target_coins)), (trader,)
+
+    def fetch(self, trader=None):
+        if not trader:
+            return None
+        return {coin: {"price": info["current_price"], "change_rate": info["change_rate"]}
+                for coin, info in trader.get_market_info().items()}
+
+
+class DocumentProvider(ContextProvider):
+    """항상 참조하는 PDF 문서 목록"""
+
+    name = "documents"
+    max_age = 60.0
+
+    def capture(self):
+        return DOCUMENT_DIR, (DOCUMENT_DIR,)
+
+    def fetch(self, directory=DOCUMENT_DIR):
+        # pdf_files 디렉토리가 없을 경우 대비한 예외 처리
+        try:
+            pdf_files = [f for f in os.listdir(directory) if f.endswith('.pdf')]
+        except (FileNotFoundError, OSError) as e:
+            print(f"PDF 파일 목록 조회 오류: {str(e)}")
+            return []
+        return [os.path.splitext(f)[0] for f in pdf_files]
+
+
+# 기본 제공자 (프로세스 전역, 캐시를 질문 사이에 공유)
+_PROVIDERS = [PortfolioProvider(), AutoTraderProvider(), MarketProvider(), DocumentProvider()]
+
+
+def get_context_providers():
+    """기본 컨텍스트 제공자 목록 반환"""
+    return _PROVIDERS
+
+
+async def gather_context(providers=None, budget=CONTEXT_BUDGET):
+    """
+    컨텍스트 제공자를 동시에 실행하고 budget초 안에 모인 값 반환
+
+    세션 상태는 먼저 이 스레드에서 모두 읽고, 조회는 조회 스레드에서 동시에 진행합니다.
+    마감까지 끝나지 않은 제공자는 캐시된 이전 값(없으면 None)을 쓰므로, 업비트 응답이
+    느려도 첫 토큰까지의 지연은 budget을 넘지 않습니다.
+
+    Returns:
+        dict: 제공자 이름 -> 값 (이전 값을 쓴 제공자는 "stale"에 나이(초)를 기록)
+    """
+    providers = get_context_providers() if providers is None else providers
+    captured = [(provider, *provider.capture()) for provider in providers]
+    deadline = time.monotonic() + budget
+    results = await asyncio.gather(*(provider.collect(key, args, deadline)
+                                     for provider, key, args in captured))
+
+    context, stale = {}, {}
+    for (provider, _, _), (value, age) in zip(captured, results):
+        context[provider.name] = value
+        if age:
+            stale[provider.name] = round(age, 1)
+    if stale:
+        context["stale"] = stale
+    return context
+
+
+def context_stats(providers=None):
+    providers = get_context_providers() if providers is None else providers
+    return {provider.name: provider.stats() for provider in providers}
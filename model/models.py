@@ -0,0 +1,12 @@
+def get_model_name(model_options):
+    """화면에서 선택한 모델 이름을 API 모델 이름으로 변환 (모르는 이름이면 None)"""
+    if model_options == "claude 3.7 sonnet":
+        return "claude-3-7-sonnet-latest"
+    elif model_options == "claude 3 haiku":
+        return "claude-3-haiku-20240307"
+    elif model_options == "gpt 4o mini":
+        return "gpt-4o-mini"
+    elif model_options == "gpt 4o":
+        return "gpt-4o"
+    elif model_options == "o3 mini":
+        return "o3-mini"
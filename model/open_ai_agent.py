@@ -18,20 +18,10 @@ from agents import Agent, Runner, ModelSettings, function_tool, set_default_open
 from tools.document_parser.document_parser import DocumentParser
 from tools.information_extract.informaton_extract import information_extract
 from tools.rag.agent_tools import search_rag_documents
-from tools.upbit.upbit_api import get_available_coins_func, get_coin_price_info_func, buy_coin_func, sell_coin_func, check_order_status_func
+from tools.upbit.upbit_api import get_available_coins_func, get_coin_price_info_func, buy_coin_func, sell_coin_func, check_order_status_func, scan_markets_func
 from tools.search_X.search_X_tool import search_x_tool
-
-def get_model_name(model_options):
-    if model_options == "claude 3.7 sonnet":
-        return "claude-3-7-sonnet-latest"
-    elif model_options == "claude 3 haiku":
-        return "claude-3-haiku-20240307"
-    elif model_options == "gpt 4o mini":
-        return "gpt-4o-mini"
-    elif model_options == "gpt 4o":
-        return "gpt-4o"
-    elif model_options == "o3 mini":
-        return "o3-mini"
+from model.context_providers import CONTEXT_BUDGET, gather_context
+from model.models import get_model_name
 
 # 문서에서 정보 추출하는 tool 생성
 @function_tool
@@ -84,9 +74,18 @@ def parse_document_tool(file_names: List[str]):
     return parser.parse_document(file_names)
 
 # Agent 객체 생성 함수
+# (모델, 사용자 설정) -> 재사용할 Agent
+_AGENTS = {}
+_AGENTS_LOCK = threading.Lock()
+
+
 def create_agent(model_options):
     """
     Agent 객체를 생성합니다.
+    
+    지시문에는 페르소나와 사용자 투자 성향처럼 대화 중 바뀌지 않는 내용만 넣고, 같은 모델과
+    설정이면 만들어 둔 Agent를 재사용합니다. 포트폴리오, 자동 거래 상태, 시각처럼 매번
+    바뀌는 값은 build_state_payload로 입력 메시지에 따로 넣습니다.
     """
     # 세션 상태에서 API 키 설정
     if 'openai_key' in st.session_state and st.session_state.openai_key:
@@ -100,139 +99,95 @@ def create_agent(model_options):
     risk_style = st.session_state.get('risk_style', '공격적')
     period_style = st.session_state.get('period_style', '단기')
     
-    # 포트폴리오 정보 가져오기
-    portfolio_info = ""
-    try:
-        from page.portfolio import get_portfolio_info_from_trade
-        from page.api_setting import get_upbit_trade_instance
+    key = (get_model_name(model_options), user_requirement, risk_style, period_style)
+    with _AGENTS_LOCK:
+        agent = _AGENTS.get(key)
+        if agent is not None:
+            return agent
         
-        upbit_trade = get_upbit_trade_instance()
-        if upbit_trade:
-            portfolio_summary, coin_balances = get_portfolio_info_from_trade(upbit_trade)
-            if portfolio_summary:
-                portfolio_info += "\n\n# 사용자 포트폴리오 정보\n"
-                portfolio_info += f"- 총 보유자산: {portfolio_summary.get('총보유자산', 0):,.0f} KRW\n"
-                portfolio_info += f"- 총 평가손익: {portfolio_summary.get('총평가손익', 0):,.0f} KRW ({portfolio_summary.get('총수익률', 0):.2f}%)\n"
-                portfolio_info += f"- 일평가수익률: {portfolio_summary.get('일평가수익률', 0):.2f}%\n"
-                portfolio_info += f"- 보유 현금: {portfolio_summary.get('보유현금', 0):,.0f} KRW\n"
-                portfolio_info += f"- 코인 평가금액: {portfolio_summary.get('코인평가금액', 0):,.0f} KRW\n"
-                
-                if not coin_balances.empty:
-                    portfolio_info += "\n## 보유 코인 목록\n"
-                    for idx, row in coin_balances.iterrows():
-                        portfolio_info += f"- {row['코인']}: {row['수량']:.8f} 개, 평가금액: {row['평가금액']:,.0f} KRW, 수익률: {row['수익률']:.2f}%\n"
-    except Exception as e:
-        print(f"포트폴리오 정보 로딩 중 오류: {str(e)}")
+        # Agent 생성
+        agent = Agent(
+            name="Crypto Trading Assistant",
+            instructions=f"""
+            You are a high-performance trading Agent specialized in cryptocurrency investment.
+            Your sole purpose is to maximize the user's profit rate. If the profit rate is low or a loss occurs, your performance is considered a failure.
+            Always act proactively, exploring information, analyzing market conditions, and executing optimal investment strategies even without user instructions.
+            When you spot a market opportunity, act immediately. Don't wait, don't ask, just make your own judgment on profit opportunities and execute.
+            Continuously monitor the portfolio and respond quickly to market changes to pursue maximum returns.
+            Follow the user's customized instructions, but if user guidance is insufficient, take the initiative to make decisions.
+            Query cryptocurrency lists independently, analyze price trends, determine trading timing, and execute orders.
+            Actively search for market data and news to incorporate them into investment decisions, managing risk while aggressively pursuing profits.
+            Utilize all tools and information to maximize returns, and continuously analyze results to improve strategies.
+            Act according to the user's investment style and goals, but your ultimate mission is to achieve the best investment results.
+
+            You can use the X (Twitter) search tool to find the latest tweets about cryptocurrencies. This is valuable for detecting market sentiment and breaking news.
+
+            Always respond to the user in Korean regardless of the language they use to communicate with you.
+            
+            사용자 맞춤 지시: {user_requirement}
+            위험 성향: {risk_style}
+            기간 성향: {period_style}
+            
+            # 현재 상태 (사용자 질문 앞의 "현재 상태" JSON 메시지)
+            - time: 현재 날짜, 요일, 시각. 이 시각을 기준으로 최신 시장 상황에 맞는 응답을 제공해주세요.
+            - portfolio: 사용자 포트폴리오 요약(summary)과 보유 코인 목록(holdings, 금액 단위 KRW, 수익률 %)
+            - auto_trader: 자동 거래 에이전트 상태. 자동 거래 에이전트는 사용자의 계정에서 자동으로 거래를 실행할 수 있습니다.
+              중지되어 있으면 '자동 거래' 탭에서 '에이전트 시작' 버튼으로 시작할 수 있다고 안내해주세요.
+            - market: 자동 거래 에이전트 관심 코인의 현재가와 변동률(%)
+            - documents: 사용 가능한 참조 문서 목록
+            - stale: 제때 조회하지 못해 이전 값을 쓴 항목과 그 값의 나이(초). 최신 값이 필요하면 도구로 다시 조회하세요.
+            값이 null이면 조회하지 못한 항목입니다.
+            """,
+            model=get_model_name(model_options),
+            tools=[
+                WebSearchTool(search_context_size="high"), 
+                parse_document_tool, 
+                extract_information_tool, 
+                search_rag_documents,
+                get_available_coins_func,
+                scan_markets_func,
+                get_coin_price_info_func,
+                buy_coin_func,
+                sell_coin_func,
+                check_order_status_func,
+                search_x_tool
+            ],    
+        )
+        _AGENTS[key] = agent
     
-    # 현재 날짜와 시간 정보 생성
+    return agent
+
+async def build_state_payload(budget=CONTEXT_BUDGET):
+    """
+    매 질문마다 바뀌는 상태를 모은 dict
+    
+    포트폴리오, 자동 거래 상태, 시세, 문서 목록은 컨텍스트 제공자가 동시에 조회하며,
+    budget초 안에 끝나지 않은 항목은 이전 값으로 채웁니다.
+    """
     current_datetime = datetime.datetime.now()
-    current_date_str = current_datetime.strftime("%Y년 %m월 %d일")
-    current_time_str = current_datetime.strftime("%H시 %M분")
     current_weekday = ["월요일", "화요일", "수요일", "목요일", "금요일", "토요일", "일요일"][current_datetime.weekday()]
+    state = {"time": f"{current_datetime.strftime('%Y-%m-%d %H:%M')} ({current_weekday})"}
+    state.update(await gather_context(budget=budget))
+    return state
+
+def build_input_messages(prompt, state):
+    """
+    Runner 입력 메시지 목록
     
-    # pdf_files 디렉토리가 없을 경우 대비한 예외 처리
-    pdf_files_base = []
-    try:
-        pdf_files = [f for f in os.listdir("tools/web2pdf/always_see_doc_storage") if f.endswith('.pdf')]
-        pdf_files_base = [os.path.splitext(f)[0] for f in pdf_files]
-    except (FileNotFoundError, OSError) as e:
-        log_error(e, "PDF 파일 목록 조회 오류")
-    
-    # 이전 메시지 가져오기
+    최근 대화(최대 5개), 현재 상태 JSON, 사용자 질문 순서로 구성합니다.
+    """
+    messages = []
+    # 첫 메시지는 AI 인사말, 마지막 메시지는 현재 질문이므로 건너뜀
     previous_messages = st.session_state.get('messages', [])
-    context = ""
+    if len(previous_messages) > 1:
+        for msg in previous_messages[-6:-1]:
+            if msg["role"] in ("user", "assistant"):
+                messages.append({"role": msg["role"], "content": msg["content"]})
     
-    # 최근 대화 기록을 context에 추가 (최대 5개 메시지)
-    if len(previous_messages) > 1:  # 첫 메시지는 AI 인사말이므로 건너뜀
-        context = "이전 대화 내용:\n"
-        for i, msg in enumerate(previous_messages[-6:-1]):  # 최근 5개 메시지만
-            if msg["role"] == "user":
-                context += f"사용자: {msg['content']}\n"
-            elif msg["role"] == "assistant":
-                context += f"AI: {msg['content']}\n"
-        context += "\n"
-    
-    # 자동 거래 에이전트 정보 추가
-    auto_trader_info = ""
-    if 'auto_trader' in st.session_state and st.session_state.auto_trader:
-        trader = st.session_state.auto_trader
-        
-        # 자동 거래 에이전트 설정 정보
-        auto_trader_info += "\n\n# 자동 거래 에이전트 정보\n"
-        auto_trader_info += f"자동 거래 에이전트는 사용자의 계정에서 자동으로 거래를 실행할 수 있습니다.\n"
-        
-        if trader.is_running:
-            status_info = trader.get_status()
-            auto_trader_info += f"현재 상태: **실행 중**\n"
-            auto_trader_info += f"설정: 분석 간격 {trader.interval_minutes}분, 최대 투자금 {trader.max_investment:,}원, "
-            auto_trader_info += f"일일 최대 거래 횟수 {trader.max_trading_count}회 (현재 {status_info['daily_trading_count']}회 사용)\n"
-            
-            # 거래 전략
-            auto_trader_info += f"거래 전략: 위험 성향 '{trader.risk_level}', 관심 코인 {', '.join(trader.target_coins)}\n"
-            
-            # 최근 거래 내역
-            if trader.trading_history:
-                auto_trader_info += "\n## 최근 거래 내역\n"
-                recent_trades = trader.trading_history[-3:] if trader.trading_history else []
-                for trade in reversed(recent_trades):
-                    action = "매수" if trade.get("action") == "buy" else "매도"
-                    auto_trader_info += f"- {trade.get('timestamp')}: {action} {trade.get('ticker')} {trade.get('amount')}\n"
-        else:
-            auto_trader_info += "현재 상태: **중지됨**\n"
-            auto_trader_info += "자동 거래를 시작하려면 '자동 거래' 탭에서 '에이전트 시작' 버튼을 클릭하세요.\n"
-
-
-    # Agent 생성
-    agent = Agent(
-        name="Crypto Trading Assistant",
-        instructions=f"""
-        You are a high-performance trading Agent specialized in cryptocurrency investment.
-        Your sole purpose is to maximize the user's profit rate. If the profit rate is low or a loss occurs, your performance is considered a failure.
-        Always act proactively, exploring information, analyzing market conditions, and executing optimal investment strategies even without user instructions.
-        When you spot a market opportunity, act immediately. Don't wait, don't ask, just make your own judgment on profit opportunities and execute.
-        Continuously monitor the portfolio and respond quickly to market changes to pursue maximum returns.
-        Follow the user's customized instructions, but if user guidance is insufficient, take the initiative to make decisions.
-        Query cryptocurrency lists independently, analyze price trends, determine trading timing, and execute orders.
-        Actively search for market data and news to incorporate them into investment decisions, managing risk while aggressively pursuing profits.
-        Utilize all tools and information to maximize returns, and continuously analyze results to improve strategies.
-        Act according to the user's investment style and goals, but your ultimate mission is to achieve the best investment results.
-
-        You can use the X (Twitter) search tool to find the latest tweets about cryptocurrencies. This is valuable for detecting market sentiment and breaking news.
-
-        Always respond to the user in Korean regardless of the language they use to communicate with you.
-        
-        # 현재 시간 정보
-        오늘은 {current_date_str} {current_weekday}이며, 현재 시간은 {current_time_str}입니다.
-        이 정보를 기반으로 최신 시장 상황에 맞는 응답을 제공해주세요.
-        
-        {context}
-        
-        사용자 맞춤 지시: {user_requirement}
-        위험 성향: {risk_style}
-        기간 성향: {period_style}
-        
-        {portfolio_info}
-        
-        {auto_trader_info}
-
-        사용 가능한 참조 문서 목록: {", ".join(pdf_files_base)}
-        """,
-        model=get_model_name(model_options),
-        tools=[
-            WebSearchTool(search_context_size="high"), 
-            parse_document_tool, 
-            extract_information_tool, 
-            search_rag_documents,
-            get_available_coins_func,
-            get_coin_price_info_func,
-            buy_coin_func,
-            sell_coin_func,
-            check_order_status_func,
-            search_x_tool
-        ],    
-    )
-    
-    return agent
+    payload = json.dumps(state, ensure_ascii=False, separators=(",", ":"), default=str)
+    messages.append({"role": "user", "content": f"현재 상태: {payload}"})
+    messages.append({"role": "user", "content": prompt})
+    return messages
 
 async def stream_openai_response(prompt, model_options, conversation_id=None):
     """
@@ -241,7 +196,7 @@ async def stream_openai_response(prompt, model_options, conversation_id=None):
     """
     print(f"스트리밍 시작 - 모델: {model_options}, 프롬프트 길이: {len(prompt)}")
     
-    # Agent 생성
+    # Agent 생성 (설정이 같으면 재사용)
     agent = create_agent(model_options)
     if not agent:
         print("API 키 없음 - 응답 생성 중단")
@@ -249,53 +204,7 @@ async def stream_openai_response(prompt, model_options, conversation_id=None):
         return
     
     try:
-        # 자동 거래 에이전트 정보 추가
-        auto_trader_info = ""
-        if 'auto_trader' in st.session_state and st.session_state.auto_trader:
-            trader = st.session_state.auto_trader
-            
-            # 자동 거래 에이전트가 활성화되어 있는지 확인
-            if trader.is_running:
-                status_info = trader.get_status()
-                auto_trader_info += "\n\n## 자동 거래 에이전트 상태\n"
-                auto_trader_info += f"- 상태: {status_info['status']} (실행 중)\n"
-                auto_trader_info += f"- 마지막 분석: {status_info['last_check'] or '없음'}\n"
-                auto_trader_info += f"- 다음 분석: {status_info['next_check'] or '준비 중...'}\n"
-                auto_trader_info += f"- 일일 거래 횟수: {status_info['daily_trading_count']} / {status_info['max_trading_count']}\n"
-                
-                # 최근 거래 기록
-                if trader.trading_history:
-                    auto_trader_info += "\n### 최근 거래 내역\n"
-                    recent_trades = trader.trading_history[-3:] if trader.trading_history else []
-                    for trade in reversed(recent_trades):
-                        auto_trader_info += f"- {trade.get('timestamp')}: {trade.get('action')} {trade.get('ticker')} {trade.get('amount')}\n"
-                
-                # 포트폴리오 정보
-                portfolio = trader.get_portfolio()
-                if portfolio:
-                    auto_trader_info += "\n### 포트폴리오 정보\n"
-                    for item in portfolio:
-                        ticker = item["ticker"]
-                        amount = item["amount"]
-                        value = item["value"]
-                        
-                        if ticker == "KRW":
-                            auto_trader_info += f"- 보유 원화: {int(amount):,}원\n"
-                        else:
-                            auto_trader_info += f"- {ticker}: {amount:.8f} (가치: {int(value):,}원)\n"
-                
-                # 시장 정보
-                market_info = trader.get_market_info()
-                if market_info:
-                    auto_trader_info += "\n### 시장 정보\n"
-                    for coin, info in market_info.items():
-                        price = info["current_price"]
-                        change_rate = info["change_rate"]
-                        auto_trader_info += f"- {coin}: 현재가 {int(price):,}원, 변동률 {change_rate:.2f}%\n"
-            else:
-                auto_trader_info += "\n\n## 자동 거래 에이전트\n"
-                auto_trader_info += "- 상태: 중지됨 (자동 거래가 실행 중이지 않습니다)\n"
-                auto_trader_info += "- 자동 거래를 시작하려면 '자동 거래' 탭에서 '에이전트 시작' 버튼을 클릭하세요.\n"
+        input_messages = build_input_messages(prompt, await build_state_payload())
         
         # 대화 기록 유지를 위한 RunConfig 생성
         run_config = None
@@ -306,25 +215,19 @@ async def stream_openai_response(prompt, model_options, conversation_id=None):
             )
             print(f"RunConfig 생성 - 대화ID: {conversation_id}")
         
-        # 대화 기록이 있는 경우 full_prompt에 포함
-        if len(st.session_state.get('messages', [])) > 1 and prompt:
-            full_prompt = f"{prompt}{auto_trader_info}"
-        else:
-            full_prompt = f"{prompt}{auto_trader_info}"
-        
         print(f"Runner.run_streamed 호출 전")
         
         # 적절한 인자로 run_streamed 호출
         if run_config:
             result = Runner.run_streamed(
                 agent, 
-                input=full_prompt,
+                input=input_messages,
                 run_config=run_config
             )
         else:
             result = Runner.run_streamed(
                 agent, 
-                input=full_prompt
+                input=input_messages
             )
         
         print(f"스트리밍 시작")
@@ -8,6 +8,10 @@ import tweepy
 import json
 import sys
 from UPBIT import Trade
+from tools.upbit.trade_pool import get_trade, get_pool
+from tools.upbit.upbit_http import get_stats as get_transport_stats
+from tools.upbit.upbit_ratelimit import get_governor
+from tools.upbit.market_stream import get_market_stream
 
 # API 키 저장 파일 경로
 API_KEY_STORE_FILE = "data/api_key_store.json"
@@ -16,10 +20,9 @@ sys.path.append("tools/upbit")
 def test_upbit_api(access_key: str, secret_key: str) -> bool:
     """Upbit API 키 테스트"""
     try:
-        upbit = pyupbit.Upbit(access_key, secret_key)
-        # 간단한 API 호출 테스트
-        balance = upbit.get_balance("KRW")
-        if balance is not None:
+        # 공유 풀을 통해 검증 (검증된 인스턴스는 이후 페이지/도구에서 재사용)
+        trade = get_trade(access_key, secret_key)
+        if trade and trade.is_valid:
             st.success("Upbit API 연결 성공!")
             return True
         else:
@@ -112,6 +115,10 @@ def save_api_keys(openai_key, upbit_access_key, upbit_secret_key, upstage_api_ke
     api_changed = (st.session_state.upbit_access_key != upbit_access_key or 
                   st.session_state.upbit_secret_key != upbit_secret_key)
     
+    # 키가 바뀌면 이전 키의 공유 Trade 인스턴스 제거
+    if api_changed and st.session_state.upbit_access_key and st.session_state.upbit_secret_key:
+        get_pool().discard(st.session_state.upbit_access_key, st.session_state.upbit_secret_key)
+    
     # 세션 상태에 저장
     st.session_state.openai_key = openai_key
     st.session_state.upbit_access_key = upbit_access_key
@@ -147,19 +154,21 @@ def get_upbit_instance():
         secret_key = st.session_state.get("upbit_secret_key")
         if not access_key or not secret_key:
             return None
-        return pyupbit.Upbit(access_key, secret_key)
+        # 공유 Trade 인스턴스의 pyupbit 객체 재사용
+        trade = get_trade(access_key, secret_key)
+        return trade.upbit if trade else None
     except Exception as e:
         st.error(f"업비트 인스턴스 생성 중 오류 발생: {str(e)}")
         return None
 
 def get_upbit_trade_instance():
-    """UPBIT.Trade 클래스 인스턴스 생성"""
+    """UPBIT.Trade 인스턴스 반환 (키별로 검증된 공유 인스턴스 재사용)"""
     try:
         access_key = st.session_state.get("upbit_access_key")
         secret_key = st.session_state.get("upbit_secret_key")
         if not access_key or not secret_key:
             return None
-        return Trade(access_key, secret_key)
+        return get_trade(access_key, secret_key)
     except Exception as e:
         st.error(f"업비트 Trade 인스턴스 생성 중 오류 발생: {str(e)}")
         return None
@@ -212,4 +221,24 @@ def show_api_settings():
                 st.info("실제 데이터를 가져오기 위해 페이지를 새로고침합니다...")
                 time.sleep(2)  # 사용자가 메시지를 읽을 시간을 줍니다
                 st.session_state.selected_tab = "포트폴리오"  # 기본적으로 포트폴리오 페이지로 이동
-                st.rerun()
\ No newline at end of file
+                st.rerun()
+
+    # 업비트 연결 재사용 통계 (keep-alive 세션)
+    with st.expander("업비트 연결 통계"):
+        stats = get_transport_stats()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("요청 수", f"{stats['requests']:,}")
+        col2.metric("연결 재사용률", f"{stats['reuse_rate'] * 100:.1f}%")
+        col3.metric("평균 핸드셰이크", f"{stats['avg_handshake_ms']:.1f} ms")
+        st.caption(f"새 연결 {stats['connections']}회 · 평균 요청 시간 {stats['avg_request_ms']:.1f} ms · 오류 {stats['errors']}회")
+        # 요청 그룹별 속도 제한 현황
+        limiter_stats = get_governor().stats()
+        if limiter_stats:
+            st.caption(" · ".join(
+                f"{group}: 대기 {info['waits']}회, 429 {info['throttled']}회"
+                for group, info in sorted(limiter_stats.items())
+            ))
+        # 실시간 시세 스트림 상태
+        stream_stats = get_market_stream().stats()
+        stream_state = "수신 중" if stream_stats['live'] else ("연결됨" if stream_stats['connected'] else "미연결")
+        st.caption(f"시세 스트림: {stream_state} · 구독 마켓 {stream_stats['markets']}개 · 메시지 {stream_stats['messages']:,}건 · 재연결 {stream_stats['reconnects']}회")
@@ -6,6 +6,8 @@ import asyncio
 from datetime import datetime, timedelta
 
 from tools.auto_trader.auto_trader import AutoTrader
+from tools.upbit.param_sweep import load_results, run_sweep
+from tools.auto_trader.triggers import DEFAULT_TRIGGER_SETTINGS
 
 # 세션 상태 초기화
 if 'auto_trader' not in st.session_state:
@@ -18,7 +20,10 @@ if 'auto_trader_settings' not in st.session_state:
         'max_trading_count': 3,
         'target_coins': ["BTC", "ETH", "XRP", "SOL", "ADA"],
         'risk_level': "중립적",
-        'model_options': "gpt-4o-mini"
+        'model_options': "gpt-4o-mini",
+        'strategy_params': None,
+        'trigger_mode': False,
+        'trigger_settings': None
     }
 
 def show_page():
@@ -123,6 +128,14 @@ def show_page():
         # 진행 상태 텍스트 표시
         st.text(f"마지막 분석: {status_info['last_check'] or '없음'}")
         
+        # 규칙 단계에서 생략한 LLM 호출
+        prefilter = status_info["prefilter_stats"]
+        if prefilter["saved_calls"]:
+            st.caption(
+                f"LLM 호출 {prefilter['llm_calls']}회 · 규칙으로 생략 {prefilter['saved_calls']}회 "
+                f"(약 {prefilter['saved_seconds']}초 절약) · 최근 사유: {prefilter['last_reason']}"
+            )
+        
         # 진행 바 (다음 분석까지 남은 시간)
         if status_info["is_running"] and status_info["next_check"]:
             try:
@@ -222,6 +235,14 @@ def show_page():
         except ValueError:
             st.error("입력값이 올바르지 않습니다. 숫자만 입력해주세요.")
     
+    # 트리거 모드 설정
+    st.header("트리거 모드")
+    show_trigger_settings()
+    
+    # 전략 파라미터 (파라미터 탐색 결과)
+    st.header("전략 파라미터")
+    show_strategy_params()
+    
     # 거래 기록
     st.header("거래 기록")
     
@@ -234,6 +255,7 @@ def show_page():
                 "행동": "매수" if trade.get("action") == "buy" else "매도",
                 "코인": trade.get("ticker", ""),
                 "금액/수량": trade.get("amount", ""),
+                "상태": {"wait": "대기", "done": "완료", "cancel": "취소"}.get(trade.get("state"), trade.get("state", "")),
                 "이유": trade.get("reason", "")[:50] + "..." if trade.get("reason") and len(trade.get("reason")) > 50 else trade.get("reason", "")
             })
         
@@ -296,6 +318,96 @@ def show_page():
         else:
             st.info("로그 정보가 없습니다.")
 
+def show_strategy_params():
+    """저장된 파라미터 탐색 결과 표시 및 적용"""
+    current = st.session_state.auto_trader_settings.get('strategy_params')
+    if current:
+        st.caption(
+            f"적용 중: k={current['k']}, 이동평균 {current['ma_window'] or '없음'}, "
+            f"매수 시간 {current['entry_hours'][0]}~{current['entry_hours'][1]}시"
+        )
+    
+    report = load_results()
+    if not report or not report.get("results"):
+        st.info("저장된 파라미터 탐색 결과가 없습니다. 저장된 캔들로 탐색을 실행해주세요.")
+    else:
+        st.caption(
+            f"{report['created_at']} 탐색 · {report['period'][0]} ~ {report['period'][1]} · "
+            f"마켓 {len(report['markets'])}개 · 조합 {report['combinations']}개 · 기준 {report['metric']} · "
+            f"{'1시간봉 반영' if report.get('intraday') else '일봉 기준'} "
+            f"(1시간봉 확보 {report.get('intraday_coverage', 0.0):.1f}%)"
+        )
+        results_df = pd.DataFrame(report["results"][:20])
+        results_df["entry_hours"] = results_df["entry_hours"].map(lambda h: f"{h[0]}~{h[1]}시")
+        st.dataframe(results_df, use_container_width=True, height=250)
+        
+        rank = st.selectbox(
+            "적용할 순위",
+            options=list(range(len(results_df))),
+            format_func=lambda i: f"{i + 1}위: k={results_df.iloc[i]['k']}, MA {results_df.iloc[i]['ma_window']}, {results_df.iloc[i]['entry_hours']}",
+            key="strategy_params_rank"
+        )
+        if st.button("파라미터 적용", key="apply_strategy_params"):
+            row = report["results"][rank]
+            params = {"k": row["k"], "ma_window": row["ma_window"], "entry_hours": row["entry_hours"]}
+            st.session_state.auto_trader_settings['strategy_params'] = params
+            if st.session_state.auto_trader:
+                st.session_state.auto_trader.update_settings({'strategy_params': params})
+            st.success("전략 파라미터가 적용되었습니다!")
+    
+    with st.expander("파라미터 탐색 실행"):
+        metric = st.selectbox("순위 기준", ["총수익률", "연환산수익률", "샤프지수", "승률", "최대낙폭"], key="sweep_metric")
+        use_intraday = st.checkbox(
+            "1시간봉으로 매수 시간 반영", value=False, key="sweep_use_intraday",
+            help="탐색 기간 전체의 1시간봉이 저장되어 있을 때만 적용되며, 아니면 일봉으로 평가합니다."
+        )
+        if st.button("탐색 실행", key="run_param_sweep"):
+            with st.spinner("저장된 캔들로 파라미터를 탐색하는 중..."):
+                report = run_sweep(metric=metric, use_intraday=use_intraday)
+            if report:
+                st.success(f"{report['combinations']}개 조합을 {report['elapsed']}초 만에 평가했습니다.")
+                st.rerun()
+            else:
+                st.error("저장된 일봉이 없습니다. 시세 화면에서 차트를 조회하면 캔들이 저장됩니다.")
+
+def show_trigger_settings():
+    """트리거 모드 설정: 가격/거래량/수익률 조건이 맞을 때만 LLM 결정 실행"""
+    settings = st.session_state.auto_trader_settings
+    current = dict(DEFAULT_TRIGGER_SETTINGS, **(settings.get('trigger_settings') or {}))
+    
+    trigger_mode = st.checkbox(
+        "조건이 맞을 때만 분석 (분석 간격 대신 조건 확인 간격 사용)",
+        value=settings.get('trigger_mode', False),
+        key="trigger_mode_setting"
+    )
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        check_seconds = st.number_input("조건 확인 간격 (초)", min_value=5, value=int(current['check_seconds']), key="trigger_check_seconds")
+        atr_multiple = st.number_input("가격 변화 (ATR 배수)", min_value=0.1, value=float(current['atr_multiple']), step=0.1, key="trigger_atr_multiple")
+    with col2:
+        volume_multiple = st.number_input("거래대금 급증 (배)", min_value=1.5, value=float(current['volume_multiple']), step=0.5, key="trigger_volume_multiple")
+        max_silence = st.number_input("최대 무분석 시간 (분)", min_value=1, value=int(current['max_silence_minutes']), key="trigger_max_silence")
+    with col3:
+        take_profit = st.number_input("익절 기준 (%)", value=float(current['take_profit']), step=0.5, key="trigger_take_profit")
+        stop_loss = st.number_input("손절 기준 (%)", value=float(current['stop_loss']), step=0.5, key="trigger_stop_loss")
+    
+    if st.button("트리거 설정 적용", key="apply_trigger_settings"):
+        new_settings = {
+            'trigger_mode': trigger_mode,
+            'trigger_settings': dict(current, check_seconds=check_seconds, atr_multiple=atr_multiple,
+                                     volume_multiple=volume_multiple, max_silence_minutes=max_silence,
+                                     take_profit=take_profit, stop_loss=stop_loss)
+        }
+        settings.update(new_settings)
+        if st.session_state.auto_trader:
+            st.session_state.auto_trader.update_settings(new_settings)
+        st.success("트리거 설정이 적용되었습니다.")
+    
+    if st.session_state.auto_trader and st.session_state.auto_trader.trigger_mode:
+        stats = st.session_state.auto_trader.trigger_engine.stats()
+        skipped = stats['checks'] - stats['fired']
+        st.caption(f"조건 확인 {stats['checks']}회 · 분석 실행 {stats['fired']}회 · 생략 {skipped}회 · 조건별 {stats['fired_by']}")
+
 def create_auto_trader():
     """설정 정보를 기반으로 AutoTrader 객체 생성"""
     settings = st.session_state.auto_trader_settings
@@ -312,6 +424,11 @@ def create_auto_trader():
     # 추가 설정 적용
     trader.target_coins = settings['target_coins']
     trader.risk_level = settings['risk_level']
+    trader.strategy_params = settings.get('strategy_params')
+    trader.update_settings({
+        'trigger_mode': settings.get('trigger_mode', False),
+        'trigger_settings': settings.get('trigger_settings') or {}
+    })
     
     return trader
     
@@ -9,6 +9,7 @@ import numpy as np
 sys.path.append("tools/upbit")
 from UPBIT import Trade
 from page.api_setting import check_api_keys, get_upbit_instance, get_upbit_trade_instance
+from tools.upbit.portfolio_valuation import value_portfolio
 
 def format_number(number: float) -> str:
     """숫자 포맷팅"""
@@ -17,63 +18,17 @@ def format_number(number: float) -> str:
 @st.cache_data(ttl=300)  # 5분 캐시로 증가
 def get_portfolio_info():
     try:
-        upbit = get_upbit_instance()
-        if not upbit:
+        upbit_trade = get_upbit_trade_instance()
+        # 보유 마켓만 시세를 조회하는 공유 평가 엔진 사용
+        valuation = value_portfolio(upbit_trade)
+        if not valuation:
             return None, pd.DataFrame()
-            
-        # 보유 자산 조회
-        balances = upbit.get_balances()
-        if not balances:
-            return None, pd.DataFrame()
-            
-        # KRW 잔고
-        krw_balance = float(next((b['balance'] for b in balances if b['currency'] == 'KRW'), 0))
-        
-        # 코인 보유 내역
-        coin_balances = []
-        total_investment = 0
-        total_current_value = 0
-        
-        for balance in balances:
-            if balance['currency'] != 'KRW':
-                ticker = f"KRW-{balance['currency']}"
-                current_price = pyupbit.get_current_price(ticker)
-                
-                if current_price:
-                    quantity = float(balance['balance'])
-                    avg_buy_price = float(balance['avg_buy_price'])
-                    current_value = quantity * current_price
-                    investment = quantity * avg_buy_price
-                    
-                    coin_balances.append({
-                        '코인': balance['currency'],
-                        '수량': quantity,
-                        '평균매수가': avg_buy_price,
-                        '현재가': current_price,
-                        '평가금액': current_value,
-                        '투자금액': investment,
-                        '평가손익': current_value - investment,
-                        '수익률': ((current_price - avg_buy_price) / avg_buy_price) * 100
-                    })
-                    
-                    total_investment += investment
-                    total_current_value += current_value
         
-        # 포트폴리오 요약 정보
         portfolio_summary = {
-            '총보유자산': total_current_value + krw_balance,
-            '총투자금액': total_investment,
-            '총평가손익': total_current_value - total_investment,
-            '총수익률': ((total_current_value - total_investment) / total_investment * 100) if total_investment > 0 else 0,
-            '보유현금': krw_balance
+            key: valuation["summary"][key]
+            for key in ('총보유자산', '총투자금액', '총평가손익', '총수익률', '보유현금')
         }
-        
-        # 데이터프레임 생성
-        df = pd.DataFrame(coin_balances)
-        if not df.empty:
-            df = df.sort_values('평가금액', ascending=False)
-        
-        return portfolio_summary, df
+        return portfolio_summary, valuation["holdings"].copy()
         
     except Exception as e:
         st.error(f"포트폴리오 정보 조회 중 오류 발생: {str(e)}")
@@ -106,50 +61,12 @@ def generate_sample_portfolio_data():
     return portfolio_summary, pd.DataFrame(sample_coins)
 
 def calculate_daily_profit_rate(_upbit_trade):
-    """일일 수익률 계산"""
+    """일일 수익률 계산 (보유 코인 전일 종가 대비, 현금 포함)"""
     try:
-        # 주요 코인 리스트 (모든 코인을 조회하지 않고 주요 코인만 확인하여 속도 개선)
-        major_tickers = ["KRW-BTC", "KRW-ETH", "KRW-XRP", "KRW-SOL", "KRW-DOGE", "KRW-ADA"]
-        
-        # 24시간 전 가격 정보와 현재 가격 비교
-        today_total = 0
-        yesterday_total = 0
-        
-        # 모든 가격 한 번에 조회 (여러 API 호출 대신 한 번의 API 호출)
-        current_prices = pyupbit.get_current_price(major_tickers)
-        
-        for ticker in major_tickers:
-            coin_name = ticker.split('-')[1]
-            balance = _upbit_trade.get_balance(coin_name)
-            
-            if balance > 0:
-                # 현재 가격
-                current_price = current_prices.get(ticker, 0)
-                
-                if current_price > 0:
-                    # 24시간 전 가격
-                    today_value = balance * current_price
-                    
-                    # 일봉 데이터에서 전일 종가 가져오기
-                    df = pyupbit.get_ohlcv(ticker, interval="day", count=2)
-                    if df is not None and not df.empty:
-                        yesterday_price = df.iloc[0]['close']
-                        yesterday_value = balance * yesterday_price
-                        
-                        today_total += today_value
-                        yesterday_total += yesterday_value
-        
-        # 현금 포함
-        krw_balance = _upbit_trade.get_balance("KRW")
-        today_total += krw_balance
-        yesterday_total += krw_balance
-        
-        # 일일 수익률 계산
-        if yesterday_total > 0:
-            daily_profit_rate = ((today_total - yesterday_total) / yesterday_total) * 100
-            return daily_profit_rate
-        else:
+        valuation = value_portfolio(_upbit_trade)
+        if not valuation:
             return 0
+        return valuation["summary"]["일평가수익률"]
             
     except Exception as e:
         return 0  # 오류 발생 시 기본값 반환 (UI에 0%로 표시)
@@ -164,91 +81,12 @@ def get_portfolio_info_from_trade(_upbit_trade):
         
         # API 키가 설정되어 있고 인스턴스가 생성되었다면 실제 데이터로 로드 시도
         try:
-            # KRW 잔고
-            krw_balance = _upbit_trade.get_balance("KRW")
-            
-            # 코인 보유 내역
-            coin_balances = []
-            total_investment = 0
-            total_current_value = 0
-            
-            # 실제 잔고 조회 시도
-            upbit_balances = _upbit_trade.upbit.get_balances()
-            
-            if upbit_balances and len(upbit_balances) > 0:
-                # 모든 KRW 마켓 티커와 현재가 조회
-                tickers = pyupbit.get_tickers(fiat="KRW")
-                current_prices = pyupbit.get_current_price(tickers)
-                
-                # 잔고 정보 처리
-                for balance in upbit_balances:
-                    if balance['currency'] == 'KRW':
-                        continue  # KRW는 건너뜀
-                    
-                    coin_name = balance['currency']
-                    ticker = f"KRW-{coin_name}"
-                    
-                    if ticker in tickers:
-                        # 수량
-                        quantity = float(balance['balance'])
-                        
-                        if quantity > 0:
-                            # 평균 매수가
-                            avg_buy_price = float(balance['avg_buy_price'])
-                            
-                            # 현재가
-                            current_price = current_prices.get(ticker, 0)
-                            if current_price <= 0:
-                                current_price = _upbit_trade.get_current_price(ticker) or 0
-                            
-                            # 평가금액 및 손익 계산
-                            current_value = quantity * current_price
-                            investment = quantity * avg_buy_price
-                            
-                            # 수익률 계산
-                            profit_rate = 0
-                            if avg_buy_price > 0:
-                                profit_rate = ((current_price - avg_buy_price) / avg_buy_price) * 100
-                            
-                            # 코인 정보 추가
-                            coin_balances.append({
-                                '코인': coin_name,
-                                '수량': quantity,
-                                '평균매수가': avg_buy_price,
-                                '현재가': current_price,
-                                '평가금액': current_value,
-                                '투자금액': investment,
-                                '평가손익': current_value - investment,
-                                '수익률': profit_rate
-                            })
-                            
-                            # 총액 업데이트
-                            total_investment += investment
-                            total_current_value += current_value
+            # 보유 마켓만 시세를 조회하는 공유 평가 엔진 사용
+            valuation = value_portfolio(_upbit_trade)
             
             # 실제 보유 코인이 있을 경우만 계속 진행
-            if coin_balances:
-                # 일일 수익률 계산
-                daily_profit_rate = calculate_daily_profit_rate(_upbit_trade)
-                
-                # 포트폴리오 요약 정보
-                portfolio_summary = {
-                    '총보유자산': total_current_value + krw_balance,
-                    '총투자금액': total_investment,
-                    '총평가손익': total_current_value - total_investment,
-                    '총수익률': ((total_current_value - total_investment) / total_investment * 100) if total_investment > 0 else 0,
-                    '보유현금': krw_balance,
-                    '일평가수익률': daily_profit_rate,
-                    '코인평가금액': total_current_value  # 코인 평가금액 추가
-                }
-                
-                # 데이터프레임 생성
-                df = pd.DataFrame(coin_balances)
-                if not df.empty:
-                    df = df.sort_values('평가금액', ascending=False)
-                
-                # 실제 데이터 반환
-                return portfolio_summary, df
+            if valuation and not valuation["holdings"].empty:
+                return dict(valuation["summary"]), valuation["holdings"].copy()
             
             # 실제 보유 코인이 없으면 샘플 데이터 반환
             st.info("업비트 계정에 보유한 코인이 없습니다. 샘플 데이터를 표시합니다.")
@@ -7,6 +7,9 @@ import sys
 sys.path.append("tools/upbit")
 from UPBIT import Trade
 from page.api_setting import check_api_keys, get_upbit_trade_instance
+from tools.upbit.order_ledger import get_ledger
+from tools.upbit.order_watcher import get_order_watcher
+from tools.upbit.order_frame import normalize_orders, to_history_frames, ORDER_COLUMNS, TRANSACTION_COLUMNS
 import requests
 import hashlib
 import jwt
@@ -114,123 +117,35 @@ def format_date(date_string: str) -> str:
                 # 날짜 형식이 변경되거나 잘못된 경우 원본 반환
                 return date_string
 
-@st.cache_data(ttl=300)
-def get_user_orders(_upbit_trade, max_pages=5) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    """사용자의 주문 내역과 체결 내역 조회 (여러 페이지 조회, 코드 재구성)"""
-    orders_columns = ["주문시간", "코인", "종류", "주문방식", "주문가격", "주문수량", "체결수량", "미체결수량", "주문총액", "상태", "주문번호"]
-    transactions_columns = ["체결시간", "코인", "종류", "거래수량", "거래단가", "거래금액", "수수료", "주문시간", "주문번호"]
+@st.cache_data(ttl=60)
+def get_user_orders(_upbit_trade, limit=None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """사용자의 주문 내역과 체결 내역 조회 (로컬 주문 원장 동기화 후 조회)"""
+    orders_columns = ORDER_COLUMNS
+    transactions_columns = TRANSACTION_COLUMNS
     all_api_orders = []
 
     if not _upbit_trade or not _upbit_trade.is_valid:
         st.error("Upbit 인스턴스 생성 또는 API 키 인증 실패.")
         return pd.DataFrame(columns=orders_columns), pd.DataFrame(columns=transactions_columns)
 
-    # 1. 여러 페이지 API 호출
+    # 1. 주문 원장 동기화 (새 주문과 미체결 주문만 API로 조회) 후 원장에서 읽기
     try:
-        for page_num in range(1, max_pages + 1):
-            page_orders = _upbit_trade.get_order_history(page=page_num, limit=100)
-
-            if isinstance(page_orders, list):
-                if not page_orders:
-                    break
-                all_api_orders.extend(page_orders)
-            else:
-                break
+        ledger = get_ledger(_upbit_trade)
+        ledger.sync(_upbit_trade)
+        all_api_orders = ledger.query(limit=limit)
     except Exception as api_call_error:
         st.error(f"API 호출 중 오류 발생: {str(api_call_error)}")
         return pd.DataFrame(columns=orders_columns), pd.DataFrame(columns=transactions_columns)
 
-    # 2. 수집된 데이터 처리
-    processed_orders = []
-    processed_transactions = []
-    error_count = 0
-
+    # 2. 수집된 데이터 처리 (컬럼 단위 정규화)
     if not all_api_orders:
         st.warning("API로부터 유효한 주문 데이터를 수집하지 못했습니다.")
-    else:
-        for i, order in enumerate(all_api_orders):
-            try:
-                if isinstance(order, dict) and 'error' in order:
-                    error_count += 1
-                    continue
-
-                market = order.get('market', ''); side = order.get('side', ''); state = order.get('state', '')
-                if not market or not side or not state:
-                    continue
-
-                ord_type = order.get('ord_type', ''); created_at = order.get('created_at', ''); uuid = order.get('uuid', '')
-                order_price_str = order.get('price'); order_price = float(order_price_str) if order_price_str is not None else 0.0
-                volume = float(order.get('volume', 0) or 0); executed_volume = float(order.get('executed_volume', 0) or 0)
-                remaining_volume = volume - executed_volume; paid_fee = float(order.get('paid_fee', 0) or 0)
-
-                coin = market.replace("KRW-", ""); order_type_str = "매수" if side == 'bid' else "매도"
-                order_state_str = "완료" if state == 'done' else "대기" if state == 'wait' else "취소"
-                order_datetime_str = format_date(created_at)
-
-                order_info = {
-                    "주문시간": order_datetime_str, "코인": coin, "종류": order_type_str, "주문방식": ord_type,
-                    "주문가격": order_price, "주문수량": volume, "체결수량": executed_volume,
-                    "미체결수량": remaining_volume, "주문총액": order_price * volume if order_price else 0.0,
-                    "상태": order_state_str, "주문번호": uuid
-                }
-                processed_orders.append(order_info)
-
-                if executed_volume > 0:
-                    avg_price_str = order.get('avg_price')
-                    trade_price = 0.0
-                    if avg_price_str:
-                        try:
-                            trade_price = float(avg_price_str)
-                        except (ValueError, TypeError):
-                            trade_price = 0.0
-                    if trade_price == 0.0 and order_price > 0: trade_price = order_price
-                    if trade_price <= 0: continue
-                    trade_volume = executed_volume
-                    trade_amount = trade_price * trade_volume
-
-                    transaction_info = {
-                        "체결시간": order_datetime_str,
-                        "코인": coin,
-                        "종류": order_type_str,
-                        "거래수량": trade_volume,
-                        "거래단가": trade_price,
-                        "거래금액": trade_amount,
-                        "수수료": paid_fee,
-                        "주문시간": order_datetime_str,
-                        "주문번호": uuid
-                    }
-                    processed_transactions.append(transaction_info)
-
-            except Exception as process_error:
-                error_count += 1
-                continue
-
-    # 3. 최종 DataFrame 생성 및 반환
-    orders_df = pd.DataFrame(columns=orders_columns)
-    transactions_df = pd.DataFrame(columns=transactions_columns)
-
-    if processed_orders:
-        unique_orders = []
-        seen_uuids_ord = set()
-        for order in processed_orders:
-             uuid = order.get("주문번호", "")
-             if uuid not in seen_uuids_ord:
-                 seen_uuids_ord.add(uuid)
-                 unique_orders.append(order)
-        orders_df = pd.DataFrame(unique_orders, columns=orders_columns)
-        orders_df = orders_df.sort_values('주문시간', ascending=False)
-        st.success(f"총 {len(orders_df)}건의 주문 내역(모든 상태)을 로드했습니다.")
+    orders_df, transactions_df = to_history_frames(normalize_orders(all_api_orders))
 
-    if processed_transactions:
-        unique_transactions = []
-        seen_uuids_tx = set()
-        for tx in processed_transactions:
-             uuid = tx.get("주문번호", "")
-             if uuid not in seen_uuids_tx:
-                 seen_uuids_tx.add(uuid)
-                 unique_transactions.append(tx)
-        transactions_df = pd.DataFrame(unique_transactions, columns=transactions_columns)
-        transactions_df = transactions_df.sort_values('체결시간', ascending=False)
+    # 3. 결과 안내
+    if not orders_df.empty:
+        st.success(f"총 {len(orders_df)}건의 주문 내역(모든 상태)을 로드했습니다.")
+    if not transactions_df.empty:
         st.success(f"총 {len(transactions_df)}건의 체결 완료 내역을 로드했습니다.")
 
     if orders_df.empty and transactions_df.empty:
@@ -343,6 +258,39 @@ def generate_sample_order_data() -> Tuple[pd.DataFrame, pd.DataFrame]:
     
     return orders_df, transactions_df
 
+def show_tracked_orders(upbit_trade):
+    """주문 추적기가 보고 있는 미체결 주문과 최근 상태 변화 표시"""
+    watcher = get_order_watcher(upbit_trade)
+    if not watcher:
+        return
+    open_orders = watcher.open_orders()
+    events = watcher.recent_events()
+    if not open_orders and not events:
+        return
+
+    st.subheader("⏳ 미체결 주문 추적")
+    stats = watcher.stats()
+    st.caption(f"추적 중 {stats['tracked']}건 · 일괄 조회 {stats['requests']}회 · 상태 변화 {stats['changes']}건")
+    state_names = {"wait": "대기", "watch": "예약", "done": "완료", "cancel": "취소"}
+    if open_orders:
+        st.dataframe(pd.DataFrame([{
+            "주문시간": format_date(order.get("created_at", "")) if order.get("created_at") else "",
+            "코인": (order.get("market") or "").replace("KRW-", ""),
+            "종류": "매수" if order.get("side") == "bid" else "매도" if order.get("side") == "ask" else "",
+            "상태": state_names.get(order.get("state"), "조회 중"),
+            "주문량": order.get("volume"),
+            "체결량": order.get("executed_volume"),
+            "주문ID": order["uuid"],
+        } for order in open_orders]), use_container_width=True, hide_index=True)
+    if events:
+        st.dataframe(pd.DataFrame([{
+            "시간": event["time"],
+            "코인": (event["market"] or "").replace("KRW-", ""),
+            "종류": "매수" if event["side"] == "bid" else "매도",
+            "변경": f"{state_names.get(event['previous_state'], '-')} → {state_names.get(event['state'], event['state'])}",
+            "체결량": event["executed_volume"],
+        } for event in events]), use_container_width=True, hide_index=True)
+
 def show_trade_history():
     """체결 내역 화면 표시 (취소 주문 중 일부 체결 포함)"""
     st.title("📝 거래 내역")
@@ -390,6 +338,9 @@ def show_trade_history():
         """, unsafe_allow_html=True)
         return
     
+    # 주문 추적기가 갱신 중인 미체결 주문
+    show_tracked_orders(upbit_trade)
+    
     # 주문 내역(모든 상태)과 체결 내역(체결량 > 0) 가져오기
     with st.spinner("실제 체결 내역을 불러오는 중..."):
         orders_df, transactions_df = get_user_orders(upbit_trade)
@@ -531,7 +482,7 @@ def show_trade_history():
     with st.expander("📊 체결 내역 통계"):
          if not filtered_tx.empty:
              # 통계 계산 및 표시 로직 복구 (transactions_df 기준)
-             coin_totals = filtered_tx.groupby("코인")["거래금액"].sum().reset_index()
+             coin_totals = filtered_tx.groupby("코인", observed=True)["거래금액"].sum().reset_index()
              st.markdown("##### 코인별 총 거래금액")
              for _, row in coin_totals.iterrows():
                  st.markdown(f"**{row['코인']}**: {row['거래금액']:.0f} KRW")
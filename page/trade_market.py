@@ -10,7 +10,10 @@ import sys
 sys.path.append("tools/upbit")
 from UPBIT import Trade
 from page.api_setting import check_api_keys, get_upbit_trade_instance, get_upbit_instance
-import random
+from tools.upbit.market_snapshot import get_ticker_snapshot
+from tools.upbit.candle_store import get_ohlcv
+from tools.upbit.market_scanner import scan_markets
+from tools.upbit.market_metadata import get_market_metadata
 
 @st.cache_data(ttl=300)  # 5분 캐시로 증가
 def get_market_info():
@@ -26,66 +29,81 @@ def get_market_info():
         # 처리할 티커 목록 (주요 코인 + 기타 선택된 코인)
         selected_tickers = major_tickers + other_tickers
         
-        # 티커를 한 번에 조회 (단일 API 호출로 속도 개선)
-        ticker_prices = pyupbit.get_current_price(selected_tickers)
+        # 현재가/전일종가/거래량을 한 번의 시세 스냅샷 요청으로 조회
+        snapshot = get_ticker_snapshot(selected_tickers)
+        snapshot = snapshot[(snapshot['trade_price'] > 0) & (snapshot['prev_closing_price'] > 0)]
         
-        all_market_info = []
+        all_market_info = pd.DataFrame({
+            '코인': snapshot.index.str.replace("KRW-", "", regex=False),
+            '현재가': snapshot['trade_price'].to_numpy(),
+            '전일종가': snapshot['prev_closing_price'].to_numpy(),
+            '변동률': snapshot['change_rate'].to_numpy(),
+            '거래량': snapshot['acc_trade_volume'].to_numpy(),
+            '거래대금': snapshot['acc_trade_price'].to_numpy()
+        })
         
-        # OHLCV 데이터 한 번에 가져오기 (개별 요청 대신 하나의 요청으로)
-        # 일봉 데이터는 선택한 모든 티커에 대해 최근 2개만 필요
-        ohlcv_data = {}
-        for ticker in selected_tickers:
-            try:
-                ohlcv_data[ticker] = pyupbit.get_ohlcv(ticker, interval="day", count=2)
-            except:
-                continue
-        
-        for ticker in selected_tickers:
-            try:
-                # 현재가 정보
-                ticker_price = ticker_prices.get(ticker)
-                if not ticker_price:
-                    continue
-                
-                # 일봉 데이터
-                df = ohlcv_data.get(ticker)
-                if df is None or df.empty:
-                    continue
-                
-                # 전일 종가, 전일 대비 등락률
-                prev_close = df.iloc[0]['close']
-                change_rate = (ticker_price - prev_close) / prev_close * 100
-                
-                # 거래량 정보
-                today_volume = df.iloc[-1]['volume'] if 'volume' in df.columns else 0
-                today_value = today_volume * ticker_price
-                
-                # 코인 이름 (티커에서 KRW- 제거)
-                coin_name = ticker.replace("KRW-", "")
-                
-                all_market_info.append({
-                    '코인': coin_name,
-                    '현재가': ticker_price,
-                    '전일종가': prev_close,
-                    '변동률': change_rate,
-                    '거래량': today_volume,
-                    '거래대금': today_value
-                })
-            except Exception as e:
-                # 개별 코인 처리 실패시 건너뛰기
-                continue
-        
-        if not all_market_info:
+        if all_market_info.empty:
             # 실패 시 샘플 데이터 제공 (로딩 속도 향상)
             sample_data = generate_sample_market_data()
             return sample_data
         
-        return pd.DataFrame(all_market_info)
+        return all_market_info
     except Exception as e:
         st.error(f"시장 정보 조회 중 오류 발생: {str(e)}")
         # 오류 시 샘플 데이터 제공 (로딩 속도 보장)
         return generate_sample_market_data()
 
+@st.cache_data(ttl=60)
+def get_market_scan(sort_by: str = "score", top: int = 30):
+    """원화 마켓 전체 스캔 결과 (한 번의 시세 요청)"""
+    try:
+        return scan_markets(top=top, sort_by=sort_by)
+    except Exception as e:
+        st.error(f"마켓 스캔 중 오류 발생: {str(e)}")
+        return pd.DataFrame()
+
+def show_market_scanner():
+    """원화 마켓 스캐너 표 표시"""
+    st.markdown("### 🔎 마켓 스캐너")
+    sort_options = {
+        "종합 점수": "score",
+        "변동률": "change_rate",
+        "거래대금": "value_24h",
+        "변동성": "volatility",
+    }
+    sort_label = st.radio("정렬 기준", list(sort_options), horizontal=True, key="scanner_sort")
+    scan = get_market_scan(sort_options[sort_label])
+    if scan.empty:
+        st.info("마켓 스캔 결과가 없습니다.")
+        return scan
+    
+    display_df = pd.DataFrame({
+        "코인": scan["market"].str.replace("KRW-", "", regex=False),
+        "이름": scan["korean_name"],
+        "현재가": scan["price"],
+        "변동률": scan["change_rate"],
+        "거래대금(억)": scan["value_24h"] / 1e8,
+        "변동성": scan["volatility"],
+        "범위 위치": scan["range_position"] * 100,
+        "52주 고가 대비": scan["high_52w_gap"],
+        "점수": scan["score"],
+    })
+    st.dataframe(
+        display_df.style.format({
+            "현재가": "{:,.0f}",
+            "변동률": "{:+.2f}%",
+            "거래대금(억)": "{:,.1f}",
+            "변동성": "{:.2f}%",
+            "범위 위치": "{:.0f}%",
+            "52주 고가 대비": "{:+.1f}%",
+            "점수": "{:.1f}",
+        }).hide(axis="index"),
+        use_container_width=True,
+        height=300
+    )
+    st.caption("24시간 거래대금 10억 원 미만 마켓과 투자유의 마켓은 제외됩니다. 범위 위치는 당일 저가(0%)~고가(100%) 사이 현재가 위치입니다.")
+    return scan
+
 def generate_sample_market_data():
     """샘플 마켓 데이터 생성 (API 호출 실패 시 대체용)"""
     sample_data = [
@@ -102,7 +120,7 @@ def generate_sample_market_data():
 def get_coin_chart_data(coin_ticker: str, interval: str = "minute60", count: int = 168):
     """코인의 차트 데이터 조회"""
     try:
-        df = pyupbit.get_ohlcv(coin_ticker, interval=interval, count=count)
+        df = get_ohlcv(coin_ticker, interval=interval, count=count)
         if df is None or df.empty:
             # 샘플 차트 데이터 제공
             return generate_sample_chart_data(coin_ticker, interval)
@@ -318,71 +336,25 @@ def get_order_history():
 def get_important_coins() -> pd.DataFrame:
     """주요 코인과 주목할만한 코인들의 현재 정보를 가져옵니다."""
     try:
-        # 거래량 기준 상위 코인 가져오기
-        tickers = pyupbit.get_tickers(fiat="KRW")
-        
         # 주요 코인 티커
         major_coins = ["KRW-BTC", "KRW-ETH", "KRW-XRP", "KRW-ADA", "KRW-DOGE", "KRW-DOT"]
         
-        # 주요 코인이 tickers에 있는지 확인
-        major_tickers = [ticker for ticker in major_coins if ticker in tickers]
-        
-        if not major_tickers:
+        # 현재가, 전일종가, 변동률, 거래량을 한 번의 요청으로 조회
+        snapshot = get_ticker_snapshot(major_coins)
+        if snapshot.empty:
             return generate_sample_market_data()
         
-        # 현재가 및 전일종가 조회
-        # tickers 파라미터 대신 리스트 직접 전달
-        all_ticker_info = pyupbit.get_current_price(major_tickers)
-        yesterday_info = {}
-        for ticker in major_tickers:
-            try:
-                df = pyupbit.get_ohlcv(ticker, interval="day", count=2)
-                if df is not None and not df.empty and len(df) > 1:
-                    yesterday_info[ticker] = df.iloc[0]['close']
-                else:
-                    # 데이터가 없는 경우 현재가의 90-110% 범위 내에서 임의의 가격 생성
-                    current_price = all_ticker_info.get(ticker, 1000)
-                    yesterday_info[ticker] = current_price * random.uniform(0.9, 1.1)
-            except Exception:
-                # 조회 실패 시 현재가의 90-110% 범위 내에서 임의의 가격 생성
-                current_price = all_ticker_info.get(ticker, 1000)
-                yesterday_info[ticker] = current_price * random.uniform(0.9, 1.1)
-        
-        result = []
-        for ticker in major_tickers:
-            try:
-                coin_name = ticker.split('-')[1]
-                current_price = all_ticker_info.get(ticker, 0)
-                yesterday_price = yesterday_info.get(ticker, current_price)
-                
-                # 변동률 계산
-                if yesterday_price > 0:
-                    change_rate = ((current_price - yesterday_price) / yesterday_price) * 100
-                else:
-                    change_rate = 0
-                
-                # 임의의 거래량 및 거래대금 생성
-                volume = random.randint(1000, 10000)
-                trade_value = current_price * volume
-                
-                result.append({
-                    "코인": coin_name,
-                    "현재가": current_price,
-                    "전일종가": yesterday_price,
-                    "변동률": change_rate,
-                    "거래량": volume,
-                    "거래대금": trade_value
-                })
-            except Exception:
-                continue
-        
-        if not result:
-            return generate_sample_market_data()
-            
-        df = pd.DataFrame(result)
+        result = pd.DataFrame({
+            "코인": snapshot.index.str.split('-').str[1],
+            "현재가": snapshot['trade_price'].to_numpy(),
+            "전일종가": snapshot['prev_closing_price'].to_numpy(),
+            "변동률": snapshot['change_rate'].to_numpy(),
+            "거래량": snapshot['acc_trade_volume'].to_numpy(),
+            "거래대금": snapshot['acc_trade_price'].to_numpy()
+        })
         
         # 변동률 기준 정렬
-        df = df.sort_values(by="변동률", ascending=False)
+        df = result.sort_values(by="변동률", ascending=False)
         
         return df
     except Exception as e:
@@ -397,6 +369,9 @@ def draw_candle_chart(data, coin_name, interval):
     
     # 차트 제목 설정
     interval_name = {
+        "minute15": "15분봉",
+        "minute60": "1시간봉",
+        "minute240": "4시간봉",
         "day": "일봉",
         "week": "주봉",
         "month": "월봉"
@@ -507,13 +482,17 @@ def show_coin_details(_upbit_trade, coin_ticker: str):
         # 차트 기간 선택
         chart_interval = st.radio(
             "차트 기간",
-            options=["일봉", "주봉", "월봉"],
+            options=["15분봉", "1시간봉", "4시간봉", "일봉", "주봉", "월봉"],
+            index=3,
             horizontal=True,
             key=f"{coin_name}_chart_interval"
         )
         
         # 선택된 기간에 따라 차트 데이터 조회
         interval_map = {
+            "15분봉": "minute15",
+            "1시간봉": "minute60",
+            "4시간봉": "minute240",
             "일봉": "day",
             "주봉": "week",
             "월봉": "month"
@@ -522,7 +501,7 @@ def show_coin_details(_upbit_trade, coin_ticker: str):
         interval = interval_map.get(chart_interval, "day")
         
         try:
-            chart_data = pyupbit.get_ohlcv(coin_ticker, interval=interval, count=30)
+            chart_data = get_ohlcv(coin_ticker, interval=interval, count=30)
             if chart_data is None or chart_data.empty:
                 # 데이터가 없으면 샘플 차트 데이터 생성
                 chart_data = generate_sample_chart_data(coin_ticker, interval)
@@ -723,13 +702,18 @@ def show_trade_market():
     if not has_api_keys:
         st.info("실제 거래를 하려면 API 설정 탭에서 API 키를 설정하세요. 현재는 샘플 데이터를 표시합니다.")
     
-    # 코인 선택 옵션
+    # 원화 마켓 전체 스캔
+    scan = show_market_scanner()
+    
+    # 코인 선택 옵션 (주요 코인 + 스캐너 상위 코인)
     coins = important_coins['코인'].tolist() if not important_coins.empty else ["BTC", "ETH", "XRP", "ADA", "DOGE"]
+    if not scan.empty:
+        coins += [m.replace("KRW-", "") for m in scan["market"] if m.replace("KRW-", "") not in coins]
     
     selected_coin = st.selectbox(
         "코인 선택",
         options=["KRW-" + coin for coin in coins],
-        format_func=lambda x: f"{x.split('-')[1]} ({x})",
+        format_func=lambda x: f"{get_market_metadata().korean_name(x)} ({x})",
         key="selected_coin"
     )
     
@@ -12,6 +12,15 @@ import pandas as pd
 from agents import Agent, Runner, set_default_openai_key, RunConfig, function_tool
 from tools.upbit.upbit_api import buy_coin_func, sell_coin_func
 from tools.upbit.UPBIT import Trade
+from tools.upbit.trade_pool import get_trade
+from tools.upbit.portfolio_valuation import value_portfolio
+from tools.upbit.indicators import get_indicator_registry
+from tools.upbit.market_metadata import get_market_metadata
+from tools.upbit.order_watcher import get_order_watcher
+from tools.auto_trader.scheduler import get_scheduler
+from tools.auto_trader.triggers import TriggerEngine
+from tools.auto_trader.prefilter import PreFilter
+from model.models import get_model_name
 
 class AutoTrader:
     def __init__(self, 
@@ -20,7 +29,8 @@ class AutoTrader:
                 model_options="gpt-4o-mini", 
                 interval_minutes=5, 
                 max_investment=100000,
-                max_trading_count=3):
+                max_trading_count=3,
+                trade=None):
         """
         자동 매수/매도 에이전트 초기화
         
@@ -31,6 +41,7 @@ class AutoTrader:
             interval_minutes: 매수/매도 결정을 내릴 간격(분)
             max_investment: 최대 투자 금액
             max_trading_count: 최대 거래 횟수(하루)
+            trade: 사용할 거래 인스턴스 (예: 부하/지연 시험용 SimulatedTrade, 없으면 API 키로 생성)
         """
         # 업비트 API 키 설정
         self.access_key = access_key or st.session_state.get('upbit_access_key', '')
@@ -39,8 +50,10 @@ class AutoTrader:
         # OpenAI API 키 설정
         self.openai_key = st.session_state.get('openai_key', '')
         
-        # 거래 인스턴스 생성
-        self.trade = Trade(access_key=self.access_key, secret_key=self.secret_key)
+        # 거래 인스턴스 (페이지/에이전트 도구와 공유하는 검증된 인스턴스)
+        self.trade = trade or get_trade(self.access_key, self.secret_key) or Trade(access_key=self.access_key, secret_key=self.secret_key)
+        # 모의 거래소 인스턴스면 API 키/실제 시세 확인을 건너뜀
+        self.simulated = getattr(self.trade, "simulated", False)
         
         # 설정값 저장
         self.model_options = model_options
@@ -53,9 +66,8 @@ class AutoTrader:
         self.daily_trading_count = 0
         self.last_trading_date = None
         
-        # 스레드 및 실행 제어
+        # 실행 제어 (실행은 공유 스케줄러의 이벤트 루프에서)
         self.is_running = False
-        self.thread = None
         
         # 상태 정보
         self.status = "준비됨"
@@ -65,6 +77,15 @@ class AutoTrader:
         # 매수/매도 전략 설정
         self.target_coins = ["BTC", "ETH", "XRP", "SOL", "ADA"]  # 기본 관심 코인
         self.risk_level = "중립적"  # 기본 위험 성향
+        self.strategy_params = None  # 파라미터 탐색으로 고른 변동성 돌파 파라미터 {"k", "ma_window", "entry_hours"}
+        
+        # 트리거 모드: 주기마다 LLM을 부르지 않고 가격/거래량/수익률 조건이 맞을 때만 결정
+        self.trigger_mode = False
+        self.trigger_engine = TriggerEngine(self)
+        self.trigger_reasons = []
+        
+        # LLM 결정 전 규칙 단계 (거래가 불가능한 주기는 에이전트를 만들지 않음)
+        self.prefilter = PreFilter()
         
         # 로그 저장소
         self.logs = []
@@ -79,6 +100,13 @@ class AutoTrader:
         # 콜백 함수
         self.trade_callback = None
         
+        # 재사용할 LLM 에이전트와 그 설정 키
+        self._agent = None
+        self._agent_key_cache = None
+        
+        # 주문 추적기 (체결/취소 시 거래 기록 갱신)
+        self.order_watcher = get_order_watcher(self.trade)
+        
     def log(self, message, level="INFO"):
         """로그 메시지 기록"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -161,9 +189,11 @@ class AutoTrader:
                     "price_type": price_type,
                     "limit_price": limit_price if price_type == "limit" else None,
                     "result": result,
+                    "state": result.get("state", "wait"),
                     "reason": "LLM 에이전트 매수 결정"
                 }
                 self.trading_history.append(trade_record)
+                self.watch_order(result)
                 self.daily_trading_count += 1
                 
                 self.log(f"매수 주문 완료: {ticker}, 주문ID: {result['uuid']}", "INFO")
@@ -266,9 +296,11 @@ class AutoTrader:
                     "price_type": price_type,
                     "limit_price": limit_price if price_type == "limit" else None,
                     "result": result,
+                    "state": result.get("state", "wait"),
                     "reason": "LLM 에이전트 매도 결정"
                 }
                 self.trading_history.append(trade_record)
+                self.watch_order(result)
                 self.daily_trading_count += 1
                 
                 self.log(f"매도 주문 완료: {ticker}, 주문ID: {result['uuid']}", "INFO")
@@ -296,34 +328,43 @@ class AutoTrader:
                 "message": f"매도 주문 중 오류 발생: {str(e)}"
             }
     
+    def _agent_key(self):
+        """에이전트 재사용 키 (모델, 도구, 고정 설정이 같으면 같은 에이전트)"""
+        return (
+            self.model_options,
+            self.max_investment,
+            self.interval_minutes,
+            self.max_trading_count,
+            self.risk_level,
+            tuple(self.target_coins),
+            json.dumps(self.strategy_params, sort_keys=True),
+        )
+    
     def create_agent(self):
-        """LLM 에이전트 생성"""
+        """
+        LLM 에이전트 생성 (설정이 바뀌지 않았으면 이전 에이전트 재사용)
+        
+        지시문에는 설정처럼 주기마다 바뀌지 않는 내용만 넣어 같은 접두부가 반복되도록 하고,
+        포트폴리오/시세/최근 거래 등 매번 바뀌는 값은 build_decision_input으로 입력 메시지에 넣습니다.
+        """
         if not self.openai_key:
             self.log("OpenAI API 키가 설정되지 않았습니다", "ERROR")
             return None
             
         set_default_openai_key(self.openai_key)
         
-        # 최근 거래 내역 가져오기
-        recent_trades = self.trading_history[-5:] if self.trading_history else []
-        recent_trades_str = "\n".join([
-            f"- {trade['timestamp']}: {trade['action']} {trade['ticker']} ({trade['reason']})"
-            for trade in recent_trades
-        ])
-        
-        # 현재 포트폴리오 정보 가져오기
-        portfolio = self.get_portfolio()
-        portfolio_str = "\n".join([
-            f"- {item['ticker']}: {item['amount']} ({item['value']}원)"
-            for item in portfolio
-        ])
-        
-        # 현재 시장 상황 정보 가져오기
-        market_info = self.get_market_info()
-        market_info_str = "\n".join([
-            f"- {coin}: 현재가 {info['current_price']}원, 24시간 변동률 {info['change_rate']}%"
-            for coin, info in market_info.items()
-        ])
+        key = self._agent_key()
+        if self._agent is not None and self._agent_key_cache == key:
+            return self._agent
+        
+        # 백테스트로 고른 변동성 돌파 파라미터
+        strategy_str = "- 없음"
+        if self.strategy_params:
+            params = self.strategy_params
+            strategy_str = (
+                f"- 변동성 돌파 k: {params['k']}, 이동평균 필터: {params['ma_window'] or '사용 안 함'}일, "
+                f"매수 허용 시간: {params['entry_hours'][0]}시~{params['entry_hours'][1]}시"
+            )
         
         # 에이전트 생성
         agent = Agent(
@@ -334,18 +375,20 @@ class AutoTrader:
             # 설정 정보
             - 최대 투자 금액: {self.max_investment}원
             - 매수/매도 결정 간격: {self.interval_minutes}분
-            - 일일 최대 거래 횟수: {self.max_trading_count}회 (현재 {self.daily_trading_count}회 사용)
+            - 일일 최대 거래 횟수: {self.max_trading_count}회
             - 위험 성향: {self.risk_level}
             - 관심 코인: {', '.join(self.target_coins)}
             
-            # 현재 포트폴리오
-            {portfolio_str}
-            
-            # 현재 시장 상황
-            {market_info_str}
+            # 백테스트 최적 파라미터 (참고용)
+            {strategy_str}
             
-            # 최근 거래 내역
-            {recent_trades_str}
+            # 현재 상태 (입력 메시지의 JSON)
+            - time: 분석 시각
+            - trigger: 이번 분석을 시작한 이유 (없으면 정기 분석)
+            - daily_trading_count: 오늘 사용한 거래 횟수
+            - portfolio: 보유 원화와 관심 코인 보유량/평가금액(원)
+            - market: 관심 코인별 현재가, 24시간 변동률(%), 기술 지표
+            - recent_trades: 최근 거래 내역
             
             # 거래 지침
             1. 현재 시장 상황을 분석하여 매수 또는 매도 결정을 내리세요.
@@ -364,18 +407,57 @@ class AutoTrader:
             
             분석 결과에 따라 거래 도구를 직접 호출하여 거래를 실행하세요. 거래를 하지 않기로 판단하는 경우 그 이유를 설명해주세요.
             """,
-            model=get_model_name(self.model_options),
+            model=get_model_name(self.model_options) or self.model_options,
             tools=[self.buy_coin, self.sell_coin]
         )
+        self._agent = agent
+        self._agent_key_cache = key
         return agent
     
+    def build_decision_input(self, snapshot=None):
+        """
+        거래 결정 입력 메시지 (매번 바뀌는 상태를 압축한 JSON)
+        
+        Args:
+            snapshot (pd.DataFrame): 스케줄러가 공유하는 시세 스냅샷
+        """
+        market = {}
+        for coin, info in self.get_market_info(snapshot).items():
+            entry = {
+                "name": info.get("korean_name", coin),
+                "price": info["current_price"],
+                "change_rate": info["change_rate"],
+            }
+            entry.update(info.get("indicators") or {})
+            market[coin] = entry
+        
+        state = {
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M"),
+            "trigger": self.trigger_reasons or None,
+            "daily_trading_count": self.daily_trading_count,
+            "portfolio": {item["ticker"]: {"amount": item["amount"], "value": round(item["value"])}
+                          for item in self.get_portfolio()},
+            "market": market,
+            "recent_trades": [
+                {"time": trade["timestamp"], "action": trade["action"], "ticker": trade["ticker"],
+                 "amount": trade["amount"], "state": trade.get("state")}
+                for trade in self.trading_history[-5:]
+            ],
+        }
+        return json.dumps(state, ensure_ascii=False, separators=(",", ":"), default=str)
+    
     def get_portfolio(self):
         """현재 포트폴리오 정보 가져오기"""
         try:
             portfolio = []
             
+            # 포트폴리오 화면과 같은 평가 결과 공유 (계좌 1회 + 보유 마켓 시세 1회)
+            valuation = value_portfolio(self.trade)
+            if not valuation:
+                return portfolio
+            
             # KRW 잔고 확인
-            krw_balance = self.trade.get_balance("KRW")
+            krw_balance = valuation["summary"]["보유현금"]
             if krw_balance:
                 portfolio.append({
                     "ticker": "KRW",
@@ -383,81 +465,102 @@ class AutoTrader:
                     "value": krw_balance
                 })
             
-            # 코인별 잔고 확인
-            for coin in self.target_coins:
-                ticker = f"KRW-{coin}"
-                amount = self.trade.get_balance(ticker)
-                if amount and amount > 0:
-                    price = self.trade.get_current_price(ticker)
-                    value = price * amount if price else 0
-                    portfolio.append({
-                        "ticker": coin,
-                        "amount": amount,
-                        "value": value
-                    })
+            # 관심 코인 중 보유 코인
+            holdings = valuation["holdings"]
+            for row in holdings[holdings["코인"].isin(self.target_coins)].itertuples(index=False):
+                portfolio.append({
+                    "ticker": row.코인,
+                    "amount": row.수량,
+                    "value": row.평가금액
+                })
             
             return portfolio
         except Exception as e:
             self.log(f"포트폴리오 정보 가져오기 실패: {str(e)}", "ERROR")
             return []
     
-    def get_market_info(self):
-        """현재 시장 정보 가져오기"""
+    def get_market_info(self, snapshot=None):
+        """현재 시장 정보 가져오기 (snapshot에 관심 코인이 모두 있으면 재사용)"""
         try:
             market_info = {}
             
-            for coin in self.target_coins:
-                ticker = f"KRW-{coin}"
-                
-                # 현재가 확인
-                current_price = self.trade.get_current_price(ticker)
-                
-                # 24시간 캔들 데이터
-                ohlcv = self.trade.get_ohlcv(ticker, interval="day", count=2)
-                
-                if ohlcv is not None and not ohlcv.empty:
-                    prev_close = ohlcv['close'].iloc[-2]
-                    change_rate = ((current_price - prev_close) / prev_close * 100) if prev_close > 0 else 0
-                    
-                    market_info[coin] = {
-                        "current_price": current_price,
-                        "open_price": ohlcv['open'].iloc[-1],
-                        "high_price": ohlcv['high'].iloc[-1],
-                        "low_price": ohlcv['low'].iloc[-1],
-                        "volume": ohlcv['volume'].iloc[-1],
-                        "change_rate": round(change_rate, 2)
-                    }
+            # 관심 코인 전체를 한 번의 시세 스냅샷 요청으로 조회
+            tickers = [f"KRW-{coin}" for coin in self.target_coins]
+            if snapshot is not None and set(tickers) <= set(snapshot.index):
+                snapshot = snapshot.loc[tickers]
+            else:
+                snapshot = self.trade.get_ticker_snapshot(tickers)
+            
+            # 일봉 지표 (스트림으로 갱신되는 값이므로 추가 요청 없음, 모의 거래에서는 생략)
+            k = self.strategy_params['k'] if self.strategy_params else 0.5
+            indicators = {} if self.simulated else get_indicator_registry().snapshots(list(snapshot.index), k=k)
+            
+            for ticker, row in snapshot.iterrows():
+                coin = ticker.split('-')[1]
+                market_info[coin] = {
+                    "korean_name": coin if self.simulated else get_market_metadata().korean_name(ticker),
+                    "current_price": row['trade_price'],
+                    "open_price": row['opening_price'],
+                    "high_price": row['high_price'],
+                    "low_price": row['low_price'],
+                    "volume": row['acc_trade_volume'],
+                    "change_rate": round(row['change_rate'], 2),
+                    "indicators": indicators.get(ticker, {})
+                }
             
             return market_info
         except Exception as e:
             self.log(f"시장 정보 가져오기 실패: {str(e)}", "ERROR")
             return {}
     
-    async def get_trading_decision(self):
-        """LLM에게 거래 결정 요청"""
+    async def get_trading_decision(self, snapshot=None):
+        """LLM에게 거래 결정 요청 (최종 응답 텍스트 반환, 실패하면 None)"""
         try:
             agent = self.create_agent()
             if not agent:
                 return None
             
+            # 계좌/시세 조회가 공유 이벤트 루프를 막지 않도록 스레드에서 상태 수집
+            state = await asyncio.to_thread(self.build_decision_input, snapshot)
             prompt = "현재 시장 상황과 포트폴리오를 분석하여 매수 또는 매도 결정을 내리고, 필요하다면 거래 도구를 직접 사용하여 거래를 실행해주세요."
             
             result = await Runner.run(
                 agent, 
-                input=prompt,
+                input=[
+                    {"role": "user", "content": f"현재 상태: {state}"},
+                    {"role": "user", "content": prompt},
+                ],
                 run_config=RunConfig(
                     workflow_name="Auto Trading Decision",
                     group_id=f"auto_trading_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
                 )
             )
             
-            return result
+            if result is None or result.final_output is None:
+                return None
+            return str(result.final_output)
         except Exception as e:
             self.log(f"거래 결정 요청 실패: {str(e)}", "ERROR")
             return None
     
-    async def check_and_trade(self):
-        """시장 분석 및 거래 실행"""
+    async def evaluate_triggers(self, snapshot=None):
+        """트리거 모드 조건 확인 (LLM 결정을 실행할 사유 목록, 없으면 빈 목록)"""
+        try:
+            reasons = await asyncio.to_thread(self.trigger_engine.evaluate, snapshot)
+        except Exception as e:
+            self.log(f"트리거 조건 확인 실패: {str(e)}", "ERROR")
+            return []
+        if reasons:
+            self.log(f"트리거 발생: {'; '.join(reasons)}", "INFO")
+        elif self.trigger_engine.backing_off():
+            self.status = self.trigger_engine.hold_reason
+        else:
+            self.status = "조건 대기 중"
+        return reasons
+    
+    async def check_and_trade(self, snapshot=None, reasons=None):
+        """시장 분석 및 거래 실행 (reasons: 트리거 모드에서 결정을 시작한 조건)"""
+        self.trigger_reasons = reasons or []
         try:
             self.status = "분석 중..."
             self.last_check_time = datetime.now()
@@ -465,57 +568,49 @@ class AutoTrader:
             
             self.log("시장 분석 및 거래 결정 시작", "INFO")
             
+            # 규칙으로 거래가 불가능한 주기면 LLM 호출 생략
+            skip_reason = await asyncio.to_thread(self.prefilter.check, self, snapshot, self.trigger_reasons)
+            if skip_reason:
+                self.log(f"LLM 결정 생략: {skip_reason}", "INFO")
+                self.status = "대기 중 (거래 조건 없음)"
+                # 같은 트리거가 매 확인마다 다시 발생하지 않도록 기준값을 옮기고,
+                # 정해진 시각까지 조건이 바뀌지 않으면(일일 거래 한도 등) 그때까지 트리거 확인을 쉼
+                self.trigger_engine.mark_decided()
+                if self.prefilter.resume_at:
+                    self.trigger_engine.pause_until(self.prefilter.resume_at, "대기 중 (거래 조건 없음)")
+                return
+            
             # LLM에게 거래 결정 요청
-            decision_text = await self.get_trading_decision()
+            started = time.perf_counter()
+            decision_text = await self.get_trading_decision(snapshot)
+            self.prefilter.record_llm_call(time.perf_counter() - started)
             
             if not decision_text:
                 self.log("거래 결정을 가져오지 못했습니다.", "WARNING")
                 self.status = "분석 실패"
+                self.trigger_engine.mark_failed()
                 return
             
+            # 결정이 끝났으므로 로그 형식과 관계없이 먼저 기준값 갱신
+            self.trigger_engine.mark_decided()
+            self.status = "대기 중"
+            
             # 거래 실행 결과 저장
             self.log(f"거래 결정 결과: {decision_text[:100]}...", "INFO")
-            self.status = "대기 중"
             
             self.log(f"거래 사이클 완료", "INFO")
             
         except Exception as e:
             self.log(f"거래 사이클 중 오류 발생: {str(e)}", "ERROR")
             self.status = "오류 발생"
-    
-    async def run_loop(self):
-        """주기적으로 거래 결정을 내리는 메인 루프"""
-        self.log("자동 거래 루프 시작", "INFO")
-        
-        while self.is_running:
-            try:
-                await self.check_and_trade()
-                
-                # 다음 체크 시간까지 대기
-                wait_seconds = self.interval_minutes * 60
-                self.log(f"{wait_seconds}초 후 다음 분석 예정", "INFO")
-                
-                # 비동기 대기 (작은 간격으로 나누어 취소 가능하게)
-                wait_chunk = 5  # 5초 단위로 체크
-                for _ in range(wait_seconds // wait_chunk):
-                    if not self.is_running:
-                        break
-                    await asyncio.sleep(wait_chunk)
-                
-                # 남은 시간 대기
-                if self.is_running and wait_seconds % wait_chunk > 0:
-                    await asyncio.sleep(wait_seconds % wait_chunk)
-                    
-            except Exception as e:
-                self.log(f"자동 거래 루프 오류: {str(e)}", "ERROR")
-                await asyncio.sleep(60)  # 오류 발생 시 1분 대기 후 재시도
+            self.trigger_engine.mark_failed()
     
     def start(self):
         """자동 거래 시작"""
         if self.is_running:
             return False
         
-        if not self.access_key or not self.secret_key:
+        if not self.simulated and (not self.access_key or not self.secret_key):
             self.log("Upbit API 키가 설정되지 않았습니다.", "ERROR")
             return False
         
@@ -523,29 +618,29 @@ class AutoTrader:
             self.log("OpenAI API 키가 설정되지 않았습니다.", "ERROR")
             return False
         
-        # 전체 시장 상태 확인
+        # 전체 시장 상태 확인 (저장된 마켓 정보 사용)
         market_all = self.trade.get_market_all()
         if not market_all:
             self.log("시장 정보를 가져오지 못했습니다. API 키를 확인하세요.", "ERROR")
             return False
         
+        # 관심 코인 중 상장되지 않았거나 투자유의로 지정된 코인 안내
+        metadata = get_market_metadata()
+        for coin in ([] if self.simulated else self.target_coins):
+            market = f"KRW-{coin}"
+            if not metadata.is_listed(market):
+                self.log(f"{coin}: 원화 마켓에 상장되지 않은 코인입니다.", "WARNING")
+            elif metadata.is_warning(market):
+                self.log(f"{coin}({metadata.korean_name(market)}): 투자유의 종목입니다.", "WARNING")
+        
         self.is_running = True
         self.status = "시작됨"
         self.log("자동 거래 시작", "INFO")
+        if self.order_watcher:
+            self.order_watcher.add_listener(self.on_order_update)
         
-        # 비동기 루프 실행
-        async def start_loop():
-            await self.run_loop()
-        
-        # 새 스레드에서 이벤트 루프 실행
-        def run_async_loop():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(start_loop())
-        
-        self.thread = threading.Thread(target=run_async_loop)
-        self.thread.daemon = True
-        self.thread.start()
+        # 공유 스케줄러의 이벤트 루프에 작업으로 등록
+        get_scheduler().add(self)
         
         return True
     
@@ -557,12 +652,11 @@ class AutoTrader:
         self.is_running = False
         self.status = "중지됨"
         self.log("자동 거래 중지", "INFO")
+        if self.order_watcher:
+            self.order_watcher.remove_listener(self.on_order_update)
         
-        if self.thread and self.thread.is_alive():
-            # 스레드 종료 대기 (최대 10초)
-            self.thread.join(timeout=10)
-        
-        self.thread = None
+        # 대기 중이거나 진행 중인 거래 결정을 바로 취소
+        get_scheduler().remove(self)
         return True
     
     def get_status(self):
@@ -576,7 +670,10 @@ class AutoTrader:
             "max_trading_count": self.max_trading_count,
             "trading_history_count": len(self.trading_history),
             "model": self.model_options,
-            "interval_minutes": self.interval_minutes
+            "interval_minutes": self.interval_minutes,
+            "trigger_mode": self.trigger_mode,
+            "trigger_stats": self.trigger_engine.stats(),
+            "prefilter_stats": self.prefilter.stats(),
         }
     
     def update_settings(self, settings):
@@ -601,6 +698,15 @@ class AutoTrader:
         if 'risk_level' in settings:
             self.risk_level = settings['risk_level']
         
+        if 'strategy_params' in settings:
+            self.strategy_params = settings['strategy_params']
+        
+        if 'trigger_mode' in settings:
+            self.trigger_mode = bool(settings['trigger_mode'])
+        
+        if 'trigger_settings' in settings:
+            self.trigger_engine = TriggerEngine(self, settings['trigger_settings'])
+        
         if 'model_options' in settings:
             if self.model_options != settings['model_options']:
                 self.model_options = settings['model_options']
@@ -624,6 +730,25 @@ class AutoTrader:
             
         return True
 
+    def watch_order(self, order):
+        """주문을 주문 추적기에 등록"""
+        if self.order_watcher:
+            self.order_watcher.watch(order)
+    
+    def on_order_update(self, order, previous):
+        """주문 추적기 리스너: 거래 기록의 주문 상태/체결 수량 갱신"""
+        for record in reversed(self.trading_history):
+            if record.get("result", {}).get("uuid") != order["uuid"]:
+                continue
+            record["result"] = order
+            record["state"] = order.get("state")
+            record["executed_volume"] = order.get("executed_volume")
+            self.log(f"주문 상태 변경: {record['ticker']} {record['action']} -> {order.get('state')} "
+                     f"(체결 {order.get('executed_volume')})", "INFO")
+            if order.get("state") != (previous or {}).get("state"):
+                self.notify_trade(record)
+            break
+    
     def set_trade_callback(self, callback_func):
         """거래 발생 시 호출할 콜백 함수 설정"""
         self.trade_callback = callback_func
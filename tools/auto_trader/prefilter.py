@@ -0,0 +1,172 @@
+import math
+from collections import deque
+from datetime import datetime, timedelta
+
+from tools.upbit.portfolio_valuation import value_portfolio
+
+# 업비트 최소 주문 금액 (원)
+MIN_ORDER_KRW = 5000
+# 관심 코인이 모두 이 변동률(%) 안에 있으면 보합으로 봄
+FLAT_CHANGE_PCT = 0.3
+# 보관할 최근 판단 기록 수
+MAX_RECORDS = 100
+
+
+class Rule:
+    """
+    LLM 결정 전 규칙
+
+    check(ctx)가 사유 문자열을 반환하면 그 주기는 LLM을 호출하지 않고 "거래 없음"으로 끝냅니다.
+    조건이 정해진 시각 전에는 바뀌지 않는 규칙은 resume_at에서 그 시각(timestamp)을 반환합니다.
+    """
+
+    name = "rule"
+
+    def check(self, ctx):
+        return None
+
+    def resume_at(self, ctx):
+        return None
+
+
+class TradingLimitRule(Rule):
+    """일일 최대 거래 횟수를 모두 사용함"""
+
+    name = "trading_limit"
+
+    def check(self, ctx):
+        if ctx["daily_trading_count"] >= ctx["max_trading_count"]:
+            return f"일일 최대 거래 횟수({ctx['max_trading_count']}회)를 모두 사용했습니다."
+        return None
+
+    def resume_at(self, ctx):
+        # 거래 횟수는 날짜가 바뀌면 초기화됨
+        tomorrow = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+        return tomorrow.timestamp()
+
+
+class NoFundsRule(Rule):
+    """원화가 최소 주문 금액보다 적고 매도할 관심 코인도 없음"""
+
+    name = "no_funds"
+
+    def check(self, ctx):
+        # 계좌를 조회하지 못했으면 잔고가 없다고 판단하지 않음
+        if ctx["krw"] is None:
+            return None
+        if ctx["krw"] < MIN_ORDER_KRW and not ctx["holdings"]:
+            return f"원화 잔고({ctx['krw']:,.0f}원)가 최소 주문 금액보다 적고 매도할 관심 코인이 없습니다."
+        return None
+
+
+class FlatMarketRule(Rule):
+    """관심 코인이 모두 보합 (전일 대비 변동률이 threshold% 이내, 트리거가 발생한 주기는 제외)"""
+
+    name = "flat_market"
+
+    def __init__(self, threshold=FLAT_CHANGE_PCT):
+        self.threshold = threshold
+
+    def check(self, ctx):
+        # 전일 대비로는 보합이어도 트리거(ATR 대비 급변, 익절/손절 등)가 발생했으면 LLM에 맡김
+        if ctx["trigger_reasons"]:
+            return None
+        rates = ctx["change_rates"]
+        if rates and all(abs(rate) < self.threshold for rate in rates.values()):
+            return f"관심 코인이 모두 보합입니다 (변동률 ±{self.threshold}% 이내)."
+        return None
+
+
+class PreFilter:
+    """
+    LLM 거래 결정 전 규칙 단계
+
+    트레이더 상태(거래 횟수, 원화/보유 코인, 관심 코인 변동률)를 한 번 모은 뒤 규칙을
+    순서대로 확인하고, 처음으로 사유를 낸 규칙에서 멈춥니다. 규칙에 걸리면 에이전트를
+    만들지 않으므로 그만큼의 LLM 호출과 지연이 줄어들며, 줄어든 호출 수와 평균 결정
+    시간으로 아낀 시간을 기록합니다. 규칙은 add_rule로 추가하거나 rules 목록을 바꿔
+    교체할 수 있습니다.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = list(rules) if rules is not None else [TradingLimitRule(), NoFundsRule(), FlatMarketRule()]
+        self.records = deque(maxlen=MAX_RECORDS)
+        # 마지막으로 걸린 규칙의 조건이 바뀔 수 있는 시각 (없으면 None)
+        self.resume_at = None
+        self.counters = {"checks": 0, "saved_calls": 0, "llm_calls": 0, "llm_seconds": 0.0}
+        self.saved_by = {}
+
+    def add_rule(self, rule, index=None):
+        """규칙 추가 (index가 없으면 마지막에)"""
+        if index is None:
+            self.rules.append(rule)
+        else:
+            self.rules.insert(index, rule)
+
+    def _context(self, trader, snapshot, reasons):
+        markets = [f"KRW-{coin}" for coin in trader.target_coins]
+        if snapshot is None or not set(markets) <= set(snapshot.index):
+            snapshot = trader.trade.get_ticker_snapshot(markets)
+        rates = snapshot.reindex(markets)["change_rate"]
+        change_rates = {m: float(r) for m, r in rates.items() if math.isfinite(r)}
+
+        krw, holdings = None, {}
+        valuation = value_portfolio(trader.trade)
+        if valuation:
+            krw = valuation["summary"]["보유현금"]
+            held = valuation["holdings"]
+            held = held[held["코인"].isin(trader.target_coins) & (held["평가금액"] >= MIN_ORDER_KRW)]
+            holdings = dict(zip(held["코인"], held["평가금액"].astype(float)))
+        # 거래 횟수는 날짜가 바뀐 뒤 첫 주문 때 초기화되므로 여기서 날짜를 함께 확인
+        daily_count = trader.daily_trading_count if trader.last_trading_date == datetime.now().date() else 0
+        return {
+            "daily_trading_count": daily_count,
+            "max_trading_count": trader.max_trading_count,
+            "krw": krw,
+            "holdings": holdings,
+            "change_rates": change_rates,
+            "trigger_reasons": list(reasons or []),
+        }
+
+    def check(self, trader, snapshot=None, reasons=None):
+        """
+        규칙 확인
+
+        Args:
+            reasons (list): 트리거 모드에서 이번 결정을 시작한 조건 (없으면 정기 실행)
+
+        Returns:
+            str: LLM 결정을 건너뛸 사유 (없으면 None)
+        """
+        self.counters["checks"] += 1
+        self.resume_at = None
+        ctx = self._context(trader, snapshot, reasons)
+        for rule in self.rules:
+            reason = rule.check(ctx)
+            if reason:
+                self.resume_at = rule.resume_at(ctx)
+                self.counters["saved_calls"] += 1
+                self.saved_by[rule.name] = self.saved_by.get(rule.name, 0) + 1
+                self.records.append({
+                    "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "rule": rule.name,
+                    "reason": reason,
+                })
+                return reason
+        return None
+
+    def record_llm_call(self, seconds):
+        """실제로 실행한 LLM 결정 시간 기록 (아낀 시간 추정에 사용)"""
+        self.counters["llm_calls"] += 1
+        self.counters["llm_seconds"] += seconds
+
+    def stats(self):
+        calls = self.counters["llm_calls"]
+        average = self.counters["llm_seconds"] / calls if calls else 0.0
+        return dict(
+            self.counters,
+            saved_by=dict(self.saved_by),
+            average_llm_seconds=round(average, 2),
+            saved_seconds=round(average * self.counters["saved_calls"], 1),
+            last_reason=self.records[-1]["reason"] if self.records else None,
+        )
@@ -0,0 +1,226 @@
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+# 실행 간격에 더하는 무작위 편차 비율 (여러 트레이더가 같은 순간에 몰리지 않도록)
+DEFAULT_JITTER = 0.1
+# 한 번 받은 시세 스냅샷을 다른 트레이더가 재사용하는 시간 (초)
+SNAPSHOT_TTL = 5.0
+# 동시에 진행할 LLM 거래 결정 수
+LLM_CONCURRENCY = 2
+# 오류 후 다시 시도하기까지 기다리는 시간 (초)
+ERROR_BACKOFF = 60.0
+
+
+def _snapshot_source(trade):
+    """
+    시세 스냅샷을 공유할 수 있는 범위 키
+
+    실제 Trade는 모두 같은 업비트 시세를 보므로 하나로 묶고, 모의 거래소는 거래소마다 따로 둡니다.
+    """
+    exchange = getattr(trade, "exchange", None)
+    return id(exchange) if exchange is not None else "upbit"
+
+
+class TraderScheduler:
+    """
+    여러 AutoTrader를 하나의 이벤트 루프에서 실행하는 스케줄러
+
+    백그라운드 스레드 하나가 이벤트 루프를 계속 돌리고, 트레이더마다 작업(Task) 하나를
+    올립니다. 각 작업은 check_and_trade 후 interval_minutes(± jitter)만큼 asyncio.Event를
+    기다리므로, 중지/즉시 실행 요청은 잠들어 있는 시간과 관계없이 바로 반영됩니다.
+
+    거래 결정 전에는 등록된 트레이더들의 관심 마켓 전체를 한 번에 조회한 시세
+    스냅샷을 SNAPSHOT_TTL 동안 공유하고, LLM 호출은 LLM_CONCURRENCY개까지만 동시에
+    진행합니다. 트레이더를 늘려도 스레드와 이벤트 루프는 하나로 유지됩니다.
+    """
+
+    def __init__(self, jitter=DEFAULT_JITTER, snapshot_ttl=SNAPSHOT_TTL, llm_concurrency=LLM_CONCURRENCY):
+        self.jitter = jitter
+        self.snapshot_ttl = snapshot_ttl
+        self.llm_concurrency = llm_concurrency
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._llm_slots = None
+        # id(trader) -> {"trader", "task", "wake"}
+        self._entries = {}
+        # 스냅샷 범위 키 -> {"markets", "snapshot", "fetched_at"}
+        self._snapshots = {}
+        self._snapshot_lock = None
+        self.counters = {"ticks": 0, "snapshot_fetches": 0, "snapshot_hits": 0, "errors": 0}
+
+    # ----- 이벤트 루프 -----
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop and self._thread and self._thread.is_alive():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                self._llm_slots = asyncio.Semaphore(self.llm_concurrency)
+                self._snapshot_lock = asyncio.Lock()
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._loop = loop
+            self._thread = threading.Thread(target=run, name="trader-scheduler", daemon=True)
+            self._thread.start()
+        ready.wait()
+        return loop
+
+    def _call(self, coroutine):
+        """다른 스레드에서 루프의 코루틴 실행 후 결과 대기"""
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    # ----- 등록/해제 -----
+
+    def add(self, trader):
+        """트레이더 작업 등록 (이미 등록되어 있으면 False)"""
+        return self._call(self._add(trader))
+
+    async def _add(self, trader):
+        key = id(trader)
+        entry = self._entries.get(key)
+        if entry and not entry["task"].done():
+            return False
+        entry = {"trader": trader, "wake": asyncio.Event(), "task": None}
+        entry["task"] = asyncio.get_running_loop().create_task(self._run_trader(entry))
+        self._entries[key] = entry
+        return True
+
+    def remove(self, trader, timeout=10):
+        """트레이더 작업 취소 (진행 중인 결정은 취소 지점에서 바로 중단)"""
+        entry = self._entries.get(id(trader))
+        if not entry or not self._loop:
+            return False
+        if threading.current_thread() is self._thread:
+            # 루프 안(예: 도구 실행 중)에서 호출되면 기다리지 않고 취소만 예약
+            self._entries.pop(id(trader), None)
+            entry["task"].cancel()
+            return True
+        future = asyncio.run_coroutine_threadsafe(self._remove(id(trader)), self._loop)
+        try:
+            future.result(timeout)
+        except Exception as e:
+            print(f"트레이더 작업 취소 대기 중 오류: {e}")
+        return True
+
+    async def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        entry["task"].cancel()
+        try:
+            await entry["task"]
+        except asyncio.CancelledError:
+            pass
+
+    def wake(self, trader):
+        """다음 실행 시각을 기다리지 않고 바로 거래 결정 실행"""
+        entry = self._entries.get(id(trader))
+        if entry and self._loop:
+            self._loop.call_soon_threadsafe(entry["wake"].set)
+            return True
+        return False
+
+    def traders(self):
+        return [entry["trader"] for entry in self._entries.values()]
+
+    # ----- 실행 -----
+
+    def _jittered(self, delay):
+        if self.jitter:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(delay, 1.0)
+
+    def _next_delay(self, trader):
+        return self._jittered(trader.interval_minutes * 60)
+
+    async def _sleep(self, entry, delay):
+        """delay초 또는 wake 요청까지 대기"""
+        try:
+            await asyncio.wait_for(entry["wake"].wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+        entry["wake"].clear()
+
+    async def _run_trader(self, entry):
+        trader = entry["trader"]
+        trader.log("자동 거래 루프 시작 (공유 스케줄러)", "INFO")
+        # 처음 등록된 트레이더들이 동시에 시작하지 않도록 짧게 흩어줌
+        await self._sleep(entry, random.uniform(0, min(5.0, self._next_delay(trader) * self.jitter)))
+        while trader.is_running:
+            try:
+                self.counters["ticks"] += 1
+                snapshot = await self.market_snapshot(trader)
+                if getattr(trader, "trigger_mode", False):
+                    # 트리거 모드: 조건은 매번 확인하고 LLM 결정은 조건이 맞을 때만
+                    reasons = await trader.evaluate_triggers(snapshot)
+                    if reasons:
+                        async with self._llm_slots:
+                            await trader.check_and_trade(snapshot=snapshot, reasons=reasons)
+                    delay = self._jittered(trader.trigger_engine.check_seconds)
+                else:
+                    async with self._llm_slots:
+                        await trader.check_and_trade(snapshot=snapshot)
+                    delay = self._next_delay(trader)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counters["errors"] += 1
+                trader.log(f"자동 거래 루프 오류: {str(e)}", "ERROR")
+                delay = ERROR_BACKOFF
+            trader.next_check_time = datetime.now() + timedelta(seconds=delay)
+            if not getattr(trader, "trigger_mode", False):
+                trader.log(f"{int(delay)}초 후 다음 분석 예정", "INFO")
+            await self._sleep(entry, delay)
+
+    async def market_snapshot(self, trader):
+        """
+        트레이더의 관심 마켓 시세 스냅샷 (같은 시세 범위의 트레이더끼리 공유)
+
+        캐시가 없거나 오래되었거나 마켓이 빠져 있으면, 같은 범위에 등록된 모든
+        트레이더의 관심 마켓을 합쳐 한 번에 조회합니다 (조회는 스레드에서 실행).
+        """
+        source = _snapshot_source(trader.trade)
+        markets = [f"KRW-{coin}" for coin in trader.target_coins]
+        async with self._snapshot_lock:
+            cached = self._snapshots.get(source)
+            if (cached and time.time() - cached["fetched_at"] < self.snapshot_ttl
+                    and set(markets) <= cached["markets"]):
+                self.counters["snapshot_hits"] += 1
+                return cached["snapshot"]
+
+            union = set(markets)
+            for entry in self._entries.values():
+                other = entry["trader"]
+                if _snapshot_source(other.trade) == source:
+                    union.update(f"KRW-{coin}" for coin in other.target_coins)
+            try:
+                snapshot = await asyncio.to_thread(trader.trade.get_ticker_snapshot, sorted(union))
+            except Exception as e:
+                trader.log(f"공유 시세 스냅샷 조회 실패: {str(e)}", "WARNING")
+                return None
+            self.counters["snapshot_fetches"] += 1
+            self._snapshots[source] = {"markets": union, "snapshot": snapshot, "fetched_at": time.time()}
+            return snapshot
+
+    def stats(self):
+        return dict(self.counters, traders=len(self._entries),
+                    running=bool(self._thread and self._thread.is_alive()))
+
+
+# 프로세스 전역 스케줄러 (처음 트레이더를 등록할 때 이벤트 루프 시작)
+_SCHEDULER = TraderScheduler()
+
+
+def get_scheduler():
+    """공유 TraderScheduler 반환"""
+    return _SCHEDULER
@@ -0,0 +1,258 @@
+import math
+import time
+
+from tools.upbit.indicators import get_indicator_registry
+from tools.upbit.portfolio_valuation import value_portfolio
+
+# 트리거 모드 기본 설정
+DEFAULT_TRIGGER_SETTINGS = {
+    "check_seconds": 15,          # 조건 확인 간격 (초, 스트림 시세를 쓰므로 API 호출 거의 없음)
+    "atr_multiple": 0.5,          # 마지막 결정 이후 가격 변화가 일봉 ATR의 몇 배를 넘으면 실행
+    "move_pct": 2.0,              # ATR을 알 수 없을 때 쓰는 가격 변화율 기준 (%)
+    "volume_multiple": 3.0,       # 거래대금 증가 속도가 평소의 몇 배를 넘으면 실행
+    "take_profit": 5.0,           # 보유 코인 수익률이 이 값(%) 위로 올라가면 실행
+    "stop_loss": -3.0,            # 보유 코인 수익률이 이 값(%) 아래로 내려가면 실행
+    "max_silence_minutes": 60,    # 조건이 없어도 이 시간이 지나면 실행
+    "retry_minutes": 2,           # LLM 결정이 실패하면 이 시간 동안 조건 확인을 쉼 (연속 실패마다 2배)
+}
+# 거래대금 증가 속도 평균에 쓰는 지수이동평균 계수
+VOLUME_ALPHA = 0.2
+# 거래량 급증을 판단하기 전에 모을 표본 수
+VOLUME_WARMUP = 3
+
+
+class Trigger:
+    """
+    거래 결정 트리거 조건
+
+    check는 이번 확인 시점의 상태(ctx)를 보고 실행 사유 문자열 또는 None을 반환하고,
+    reset은 LLM 결정이 끝난 뒤 기준값을 현재 상태로 옮깁니다.
+    """
+
+    name = "trigger"
+
+    def check(self, ctx):
+        return None
+
+    def reset(self, ctx):
+        pass
+
+
+class PriceMoveTrigger(Trigger):
+    """마지막 결정 시점 대비 가격 변화가 ATR 배수(없으면 move_pct%)를 넘으면 실행"""
+
+    name = "price_move"
+
+    def __init__(self, atr_multiple=0.5, move_pct=2.0):
+        self.atr_multiple = atr_multiple
+        self.move_pct = move_pct
+        self.baseline = {}
+
+    def check(self, ctx):
+        reasons = []
+        for market, price in ctx["prices"].items():
+            base = self.baseline.get(market)
+            if not base:
+                continue
+            move = price - base
+            atr = (ctx["indicators"].get(market) or {}).get("atr14")
+            if atr and math.isfinite(atr):
+                if abs(move) >= atr * self.atr_multiple:
+                    reasons.append(f"{market} 가격 변화 {move:+,.0f}원 (ATR {atr:,.0f}원의 {abs(move) / atr:.1f}배)")
+            elif abs(move) / base * 100 >= self.move_pct:
+                reasons.append(f"{market} 가격 변화 {move / base * 100:+.2f}%")
+        return ", ".join(reasons) or None
+
+    def reset(self, ctx):
+        self.baseline = dict(ctx["prices"])
+
+
+class VolumeSpikeTrigger(Trigger):
+    """당일 누적 거래대금의 증가 속도가 평소(지수이동평균)의 multiple배를 넘으면 실행"""
+
+    name = "volume_spike"
+
+    def __init__(self, multiple=3.0):
+        self.multiple = multiple
+        # market -> {"value", "at", "rate", "samples"}
+        self.state = {}
+
+    def check(self, ctx):
+        reasons = []
+        now = ctx["now"]
+        for market, value in ctx["values"].items():
+            state = self.state.get(market)
+            if state is None or value < state["value"] or now <= state["at"]:
+                # 처음 보거나 일봉이 바뀌어 누적값이 초기화된 경우
+                self.state[market] = {"value": value, "at": now, "rate": None, "samples": 0}
+                continue
+            rate = (value - state["value"]) / (now - state["at"])
+            average = state["rate"]
+            if average and state["samples"] >= VOLUME_WARMUP and rate >= average * self.multiple:
+                reasons.append(f"{market} 거래대금 급증 (평소의 {rate / average:.1f}배)")
+            state["rate"] = rate if average is None else average + VOLUME_ALPHA * (rate - average)
+            state["samples"] += 1
+            state["value"], state["at"] = value, now
+        return ", ".join(reasons) or None
+
+
+class PnLTrigger(Trigger):
+    """보유 코인 수익률이 익절/손절 기준을 새로 넘으면 실행 (기준을 넘은 상태가 계속되면 다시 실행하지 않음)"""
+
+    name = "pnl"
+
+    def __init__(self, take_profit=5.0, stop_loss=-3.0):
+        self.take_profit = take_profit
+        self.stop_loss = stop_loss
+        # coin -> "profit" / "loss" / None
+        self.zone = {}
+
+    def _zone(self, rate):
+        if self.take_profit is not None and rate >= self.take_profit:
+            return "profit"
+        if self.stop_loss is not None and rate <= self.stop_loss:
+            return "loss"
+        return None
+
+    def check(self, ctx):
+        reasons = []
+        for coin, rate in ctx["pnl"].items():
+            zone = self._zone(rate)
+            if zone and zone != self.zone.get(coin):
+                label = "익절 기준" if zone == "profit" else "손절 기준"
+                reasons.append(f"{coin} 수익률 {rate:+.2f}% ({label} 도달)")
+            self.zone[coin] = zone
+        return ", ".join(reasons) or None
+
+
+class MaxSilenceTrigger(Trigger):
+    """마지막 결정 이후 minutes분이 지나면 조건과 관계없이 실행"""
+
+    name = "max_silence"
+
+    def __init__(self, minutes=60):
+        self.minutes = minutes
+        self.last_decision = None
+
+    def check(self, ctx):
+        if self.last_decision is None:
+            return "첫 분석"
+        silent = ctx["now"] - self.last_decision
+        if self.minutes and silent >= self.minutes * 60:
+            return f"{int(silent // 60)}분 동안 분석 없음"
+        return None
+
+    def reset(self, ctx):
+        self.last_decision = ctx["now"]
+
+
+class TriggerEngine:
+    """
+    트리거 모드 조건 평가기
+
+    스케줄러가 check_seconds마다 공유 시세 스냅샷으로 evaluate를 호출하면, 가격/거래대금은
+    스냅샷에서, ATR은 스트림으로 갱신되는 지표 레지스트리에서, 수익률은 공유 포트폴리오
+    평가에서 읽어 조건만 계산합니다. 하나라도 실행 사유를 내면 LLM 결정을 실행하고,
+    결정이 끝나면 mark_decided로 기준값을 옮깁니다. 결정이 실패하면 mark_failed로
+    retry_minutes(연속 실패마다 2배, 최대 max_silence_minutes) 동안 조건 확인을 쉬고,
+    규칙상 정해진 시각까지 거래할 수 없으면 pause_until로 그때까지 쉽니다.
+    """
+
+    def __init__(self, trader, settings=None):
+        self.trader = trader
+        self.settings = dict(DEFAULT_TRIGGER_SETTINGS, **(settings or {}))
+        s = self.settings
+        self.triggers = [
+            PriceMoveTrigger(s["atr_multiple"], s["move_pct"]),
+            VolumeSpikeTrigger(s["volume_multiple"]),
+            PnLTrigger(s["take_profit"], s["stop_loss"]),
+            MaxSilenceTrigger(s["max_silence_minutes"]),
+        ]
+        self.last_ctx = None
+        # 조건 확인을 다시 시작할 시각, 쉬는 이유(상태 표시용), 연속 실패 횟수
+        self.retry_after = 0.0
+        self.hold_reason = None
+        self.failures = 0
+        self.counters = {"checks": 0, "fired": 0, "failed": 0}
+        self.fired_by = {trigger.name: 0 for trigger in self.triggers}
+
+    @property
+    def check_seconds(self):
+        return self.settings["check_seconds"]
+
+    def _context(self, snapshot):
+        trader = self.trader
+        markets = [f"KRW-{coin}" for coin in trader.target_coins]
+        if snapshot is None or not set(markets) <= set(snapshot.index):
+            snapshot = trader.trade.get_ticker_snapshot(markets)
+        rows = snapshot.reindex(markets)
+        prices = {m: float(p) for m, p in rows["trade_price"].items() if math.isfinite(p) and p > 0}
+        values = {m: float(v) for m, v in rows["acc_trade_price"].items() if math.isfinite(v)}
+
+        indicators = {}
+        if not getattr(trader, "simulated", False):
+            indicators = get_indicator_registry().snapshots(list(prices), k=0.5)
+
+        pnl = {}
+        valuation = value_portfolio(trader.trade)
+        if valuation:
+            holdings = valuation["holdings"]
+            pnl = dict(zip(holdings["코인"], holdings["수익률"].astype(float)))
+        return {"now": time.time(), "prices": prices, "values": values, "indicators": indicators, "pnl": pnl}
+
+    def evaluate(self, snapshot=None):
+        """
+        조건 확인
+
+        Returns:
+            list: 실행 사유 목록 (비어 있으면 LLM 결정 생략)
+        """
+        if self.backing_off():
+            return []
+        ctx = self._context(snapshot)
+        self.last_ctx = ctx
+        self.counters["checks"] += 1
+        reasons = []
+        for trigger in self.triggers:
+            reason = trigger.check(ctx)
+            if reason:
+                reasons.append(reason)
+                self.fired_by[trigger.name] += 1
+        if reasons:
+            self.counters["fired"] += 1
+        return reasons
+
+    def mark_decided(self):
+        """LLM 결정 완료: 가격 기준/마지막 결정 시각을 현재 상태로 갱신"""
+        if self.last_ctx is None:
+            return
+        self.retry_after = 0.0
+        self.hold_reason = None
+        self.failures = 0
+        ctx = dict(self.last_ctx, now=time.time())
+        for trigger in self.triggers:
+            trigger.reset(ctx)
+
+    def mark_failed(self):
+        """LLM 결정 실패: 기준값은 그대로 두고 일정 시간 뒤에 다시 조건 확인"""
+        self.failures += 1
+        self.counters["failed"] += 1
+        minutes = self.settings["retry_minutes"] * 2 ** (self.failures - 1)
+        if self.settings["max_silence_minutes"]:
+            minutes = min(minutes, self.settings["max_silence_minutes"])
+        self.retry_after = time.time() + minutes * 60
+        self.hold_reason = "분석 실패 (재시도 대기 중)"
+
+    def pause_until(self, timestamp, reason):
+        """timestamp까지 조건 확인을 쉼 (일일 거래 한도 도달 등)"""
+        if timestamp > self.retry_after:
+            self.retry_after = timestamp
+            self.hold_reason = reason
+
+    def backing_off(self):
+        """결정 실패 후 재시도 대기 또는 일시 중지 중인지"""
+        return time.time() < self.retry_after
+
+    def stats(self):
+        return dict(self.counters, fired_by=dict(self.fired_by),
+                    retry_in=max(0, round(self.retry_after - time.time())))
@@ -7,38 +7,99 @@ from urllib.parse import urlencode, unquote
 
 import pyupbit
 
+from tools.upbit.account_snapshot import AccountSnapshot, AccountUnavailable
+from tools.upbit.candle_store import get_candle_store
+from tools.upbit.market_metadata import get_market_metadata
+from tools.upbit.market_snapshot import get_current_price, get_current_prices, get_ticker_snapshot
+from tools.upbit.upbit_http import get_transport
+from tools.upbit.upbit_ratelimit import throttle
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 import time
 
+# 주문 내역 동시 조회 시 워커 수
+ORDER_HISTORY_WORKERS = 4
+
+
+def _format_number(value):
+    """주문 수량/가격 문자열 (지수 표기 없이 소수점 8자리까지)"""
+    text = f"{float(value):.8f}".rstrip("0").rstrip(".")
+    return text or "0"
+
+
 class Trade:
-    def __init__(self, access_key=None, secret_key=None):
+    def __init__(self, access_key=None, secret_key=None, validate=True):
+        """
+        Args:
+            access_key (str): 업비트 액세스 키
+            secret_key (str): 업비트 시크릿 키
+            validate (bool): 생성 시 잔고 조회로 키 유효성을 바로 검사할지 여부.
+                False이면 validate()를 따로 호출해야 합니다 (trade_pool에서 사용).
+        """
         self.access_key = access_key if access_key else '{ACCESS KEY 입력 : }'
         self.secret_key = secret_key if secret_key else '{SECRET KEY 입력 : }'
         self.server_url = 'https://api.upbit.com'
-        
+
         # API 키 유효성 상태
         self.is_valid = False
-        
+        # 인증 실패(401) 시 호출할 콜백 (trade_pool이 재검증 표시용으로 설정)
+        self.on_auth_failure = None
+        # 계좌 스냅샷 (잔고 조회는 모두 이 스냅샷을 통해 한 번의 /v1/accounts 요청으로 처리)
+        self.account = AccountSnapshot(self)
+
         try:
             if self.access_key != '{ACCESS KEY 입력 : }' and self.secret_key != '{SECRET KEY 입력 : }':
                 # pyupbit 인스턴스 생성
                 self.upbit = pyupbit.Upbit(access_key, secret_key)
-                # 간단한 유효성 검사
-                try:
-                    balance = self.upbit.get_balance("KRW")
-                    if balance is not None:
-                        self.is_valid = True
-                    else:
-                        print("⚠️ 경고: API 키 인증 실패")
-                except Exception as e:
-                    print(f"⚠️ 경고: API 인증 중 오류 발생: {e}")
+                if validate:
+                    self.validate()
             else:
                 self.upbit = None
                 print("⚠️ 경고: 실제 API 키가 설정되지 않았습니다. 일부 기능이 제한될 수 있습니다.")
         except Exception as e:
             self.upbit = None
             print(f"⚠️ 경고: 업비트 API 초기화 중 오류: {e}")
-    
+
+    def validate(self):
+        """잔고 조회로 API 키 유효성 검사 (결과는 is_valid에 저장)"""
+        if not self.upbit:
+            self.is_valid = False
+            return False
+
+        try:
+            # 계좌 조회에 성공하면 유효한 키 (조회 결과는 스냅샷으로 재사용)
+            self.is_valid = self.account.refresh()
+        except Exception as e:
+            self.is_valid = False
+            print(f"⚠️ 경고: API 인증 중 오류 발생: {e}")
+        return self.is_valid
+
+    def _auth_failed(self):
+        """인증 실패(401) 처리: 무효 표시 후 trade_pool이 다음 조회 시 재검증하도록 알림"""
+        self.is_valid = False
+        if self.on_auth_failure:
+            self.on_auth_failure(self)
+
+    def _auth_headers(self, query=None):
+        """JWT 인증 헤더 생성 (query가 있으면 query_hash 포함, 문자열이면 그대로 해시)"""
+        payload = {
+            'access_key': self.access_key,
+            'nonce': str(uuid.uuid4()),
+        }
+        if query:
+            query_string = query if isinstance(query, str) else urlencode(query)
+            m = hashlib.sha512()
+            m.update(query_string.encode())
+            payload['query_hash'] = m.hexdigest()
+            payload['query_hash_alg'] = 'SHA512'
+
+        jwt_token = jwt.encode(payload, self.secret_key)
+        # JWT 인코딩 결과가 bytes인 경우 문자열로 변환
+        if isinstance(jwt_token, bytes):
+            jwt_token = jwt_token.decode('utf-8')
+        return {'Authorization': f'Bearer {jwt_token}'}
+
     def get_order_history(self, ticker_or_uuid="", state=None, page=1, limit=100, states=None):
         """주문 내역 조회 (개선된 버전, 페이지네이션 지원 강화)
         
@@ -81,6 +142,7 @@ class Trade:
                     call_args['page'] = page
                     
                     print(f"[Debug] pyupbit.get_order 호출: {call_args}")
+                    throttle("default")
                     result = self.upbit.get_order(**call_args)
                     print(f"[Debug] pyupbit.get_order 결과 ({current_state}, page={page}): {type(result)}")
                     
@@ -114,6 +176,96 @@ class Trade:
             print(f"get_order_history(page={page}) 실행 중 예외 발생: {str(e)}")
             return []
     
+    def get_order_history_concurrent(self, ticker_or_uuid="", states=None, max_pages=5, limit=100,
+                                     max_workers=ORDER_HISTORY_WORKERS, prefetch=2, return_failed=False):
+        """주문 내역 동시 조회 (상태 x 페이지 요청을 병렬로 처리)
+
+        상태별로 prefetch개 페이지를 먼저 요청하고, 가득 찬 페이지가 돌아오면 다음 페이지를
+        이어서 요청합니다. 요청 개수보다 적은 페이지가 오면 그 상태의 이후 페이지는 취소합니다.
+        요청은 공유 전송 계층의 rate governor를 거치므로 워커 수와 관계없이 한도를 지킵니다.
+        오류가 난 페이지는 짧은 페이지로 보지 않고 실패 페이지로 따로 기록하며, 그 상태는
+        더 이어서 요청하지 않습니다 (결과가 중간에 비어 있을 수 있음).
+
+        Args:
+            ticker_or_uuid (str): 티커명 또는 주문 UUID (빈 값: 전체 주문 조회)
+            states (list): 조회할 주문 상태 리스트 (None이면 wait/done/cancel)
+            max_pages (int): 상태별 최대 페이지 수
+            limit (int): 페이지당 요청 개수 (최대 100)
+            max_workers (int): 동시 요청 수
+            prefetch (int): 상태별로 미리 요청할 페이지 수
+            return_failed (bool): True면 (주문 목록, {상태: 실패한 페이지 목록})을 반환
+
+        Returns:
+            list: uuid 기준 중복 제거 후 주문 시각 최신순으로 정렬한 주문 내역 목록
+            (return_failed=True면 실패 페이지 dict와 함께 tuple, 비어 있으면 모두 조회한 것)
+        """
+        if not self.is_valid or not self.upbit:
+            print("유효한 API 키가 설정되지 않았습니다.")
+            return ([], {state: [1] for state in (states or ["wait", "done", "cancel"])}) if return_failed else []
+
+        target_states = states or ["wait", "done", "cancel"]
+        next_page = {state: 1 for state in target_states}
+        # 상태별 마지막 페이지 (짧은 페이지가 온 페이지 번호)
+        last_page = {state: None for state in target_states}
+        # 상태별 요청에 실패한 페이지 번호
+        failed = {}
+        pages = {}
+        pending = {}
+
+        def submit(executor, state):
+            page = next_page[state]
+            next_page[state] += 1
+            future = executor.submit(self._get_orders_direct_api, ticker_or_uuid or None, state, page, limit)
+            pending[future] = (state, page)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for state in target_states:
+                for _ in range(min(prefetch, max_pages)):
+                    submit(executor, state)
+
+            while pending:
+                finished, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    state, page = pending.pop(future)
+                    if future.cancelled():
+                        continue
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"{state} 상태 주문 조회 중 오류 (page={page}): {e}")
+                        result = None
+
+                    if not isinstance(result, list):
+                        # 오류 응답: 끝으로 보지 않고 실패로 기록, 이 상태는 더 요청하지 않음
+                        print(f"{state} 상태 주문 조회 실패 (page={page}): {result}")
+                        failed.setdefault(state, []).append(page)
+                        continue
+                    pages[(state, page)] = result
+                    if len(result) < limit:
+                        # 이 상태는 여기까지: 뒤 페이지 요청 취소
+                        if last_page[state] is None or page < last_page[state]:
+                            last_page[state] = page
+                        for other, (other_state, other_page) in list(pending.items()):
+                            if other_state == state and other_page > page:
+                                other.cancel()
+                    elif last_page[state] is None and state not in failed and next_page[state] <= max_pages:
+                        submit(executor, state)
+
+        merged = {}
+        for (state, page), orders in pages.items():
+            if last_page[state] is not None and page > last_page[state]:
+                continue
+            for order in orders:
+                if isinstance(order, dict) and "uuid" in order:
+                    merged[order["uuid"]] = order
+        orders = sorted(merged.values(), key=lambda o: o.get("created_at") or "", reverse=True)
+        if not return_failed:
+            return orders
+        # 마지막 페이지 이후의 실패는 결과에 영향이 없음
+        failed = {state: sorted(p for p in failed_pages if last_page[state] is None or p < last_page[state])
+                  for state, failed_pages in failed.items()}
+        return orders, {state: p for state, p in failed.items() if p}
+    
     def _get_orders_direct_api(self, ticker_or_uuid=None, state=None, page=1, limit=100):
         """직접 API를 호출하여 주문 내역 조회"""
         try:
@@ -126,31 +278,16 @@ class Trade:
             if state:
                 query['state'] = state
             
-            query_string = urlencode(query).encode()
-            m = hashlib.sha512()
-            m.update(query_string)
-            query_hash = m.hexdigest()
-            
-            payload = {
-                'access_key': self.access_key,
-                'nonce': str(uuid.uuid4()),
-                'query_hash': query_hash,
-                'query_hash_alg': 'SHA512'
-            }
-            
-            jwt_token = jwt.encode(payload, self.secret_key)
-            if isinstance(jwt_token, bytes):
-                jwt_token = jwt_token.decode('utf-8')
-                
-            authorize_token = f'Bearer {jwt_token}'
-            headers = {'Authorization': authorize_token}
-            
             print(f"[Debug] 직접 API 호출: GET {self.server_url}/v1/orders, Params: {query}")
-            response = requests.get(f"{self.server_url}/v1/orders", params=query, headers=headers)
+            # 재시도마다 새 nonce로 서명
+            response = get_transport().get("/v1/orders", params=query, headers=lambda: self._auth_headers(query))
             
             if response.status_code == 200:
                 return response.json()
             else:
+                if response.status_code == 401:
+                    # 인증 실패: trade_pool이 다음 조회 시 재검증하도록 무효화
+                    self._auth_failed()
                 print(f"API 요청 실패 (HTTP {response.status_code}): {response.text}")
                 try:
                     return response.json()
@@ -158,41 +295,62 @@ class Trade:
                     return []
         except Exception as e:
             print(f"직접 API 호출 중 오류: {e}")
-            return []
+            # 빈 페이지와 구분되도록 오류 형식으로 반환
+            return {"error": {"name": "request_failed", "message": str(e)}}
+    
+    def get_orders_by_uuids(self, uuids, batch_size=100):
+        """
+        여러 주문 상세를 /v1/orders/uuids로 한 번에 조회 (요청당 최대 100개)
+
+        uuids[] 배열 파라미터는 urlencode로 만들면 query_hash와 실제 요청이 달라지므로
+        "uuids[]=a&uuids[]=b" 형태의 문자열을 직접 만들어 해시와 요청에 함께 사용합니다.
+
+        Returns:
+            list: 주문 목록 (찾지 못한 uuid는 빠짐, 요청 실패 시 None)
+        """
+        if not self.is_valid:
+            return None
+        uuids = list(uuids)
+        orders = []
+        for i in range(0, len(uuids), batch_size):
+            query_string = "&".join(f"uuids[]={order_uuid}" for order_uuid in uuids[i:i + batch_size])
+            try:
+                response = get_transport().get(f"/v1/orders/uuids?{query_string}",
+                                               headers=lambda: self._auth_headers(query_string))
+                if response.status_code != 200:
+                    if response.status_code == 401:
+                        self._auth_failed()
+                    print(f"주문 일괄 조회 실패 (HTTP {response.status_code}): {response.text}")
+                    return None
+                orders.extend(response.json())
+            except Exception as e:
+                print(f"주문 일괄 조회 중 오류: {e}")
+                return None
+        return orders
     
     def orders_status(self, orderid): 
-        """개별 주문 상세 조회"""
+        """개별 주문 상세 조회 (주문이 없으면 {"error": {"name": "order_not_found"}}, 요청 실패 시 {})"""
         if not self.is_valid:
             return {}
             
         try:
             query = {'uuid': orderid}
-            query_string = urlencode(query).encode()
-            
-            m = hashlib.sha512()
-            m.update(query_string)
-            query_hash = m.hexdigest()
-            
-            payload = {
-                'access_key': self.access_key,
-                'nonce': str(uuid.uuid4()),
-                'query_hash': query_hash,
-                'query_hash_alg': 'SHA512'
-            }
-            
-            jwt_token = jwt.encode(payload, self.secret_key)
-            # JWT 인코딩 결과가 bytes인 경우 문자열로 변환
-            if isinstance(jwt_token, bytes):
-                jwt_token = jwt_token.decode('utf-8')
-                
-            authorize_token = f'Bearer {jwt_token}'
-            headers = {'Authorization': authorize_token}
-            
-            response = requests.get(f"{self.server_url}/v1/order", params=query, headers=headers)
+            response = get_transport().get("/v1/order", params=query, headers=lambda: self._auth_headers(query))
             
             if response.status_code == 200:
                 return response.json()
+            elif response.status_code == 404:
+                # 없는 주문은 요청 실패와 구분해 업비트 오류 응답 그대로 반환
+                try:
+                    error = response.json()
+                except ValueError:
+                    error = None
+                if not isinstance(error, dict) or "error" not in error:
+                    error = {"error": {"name": "order_not_found", "message": "주문을 찾지 못했습니다."}}
+                return error
             else:
+                if response.status_code == 401:
+                    self._auth_failed()
                 print(f"주문 상세 조회 실패 (HTTP {response.status_code}): {response.text}")
                 return {}
         except Exception as e:
@@ -200,58 +358,47 @@ class Trade:
             return {}
     
     def get_balance(self, ticker): 
-        """특정 코인 잔고 조회"""
+        """특정 코인 잔고 조회 (계좌 스냅샷 사용)"""
         if not self.is_valid or not self.upbit:
             return 0
             
         try:
-            return self.upbit.get_balance(ticker)
+            return self.account.balance(ticker)
+        except AccountUnavailable:
+            # 잔고 0과 구분되도록 조회 실패는 호출한 쪽에 전달
+            raise
         except Exception as e:
             print(f"잔고 조회 실패: {e}")
-            try:
-                # 직접 API 호출 시도
-                query = {}
-                query_string = urlencode(query).encode()
-                
-                m = hashlib.sha512()
-                m.update(query_string)
-                query_hash = m.hexdigest()
-                
-                payload = {
-                    'access_key': self.access_key,
-                    'nonce': str(uuid.uuid4()),
-                    'query_hash': query_hash,
-                    'query_hash_alg': 'SHA512'
-                }
-                
-                jwt_token = jwt.encode(payload, self.secret_key)
-                if isinstance(jwt_token, bytes):
-                    jwt_token = jwt_token.decode('utf-8')
-                    
-                authorize_token = f'Bearer {jwt_token}'
-                headers = {'Authorization': authorize_token}
-                
-                response = requests.get(f"{self.server_url}/v1/accounts", headers=headers)
-                
-                if response.status_code == 200:
-                    accounts = response.json()
-                    for account in accounts:
-                        if account['currency'] == ticker.split('-')[-1]:
-                            return float(account['balance'])
-                    return 0
-                else:
-                    return 0
-            except Exception:
-                return 0
+            return 0
+    
+    def get_balances(self):
+        """전체 잔고 목록 조회 (pyupbit get_balances와 같은 형식, 계좌 스냅샷 사용)"""
+        if not self.is_valid or not self.upbit:
+            return []
+            
+        try:
+            return self.account.balances()
+        except AccountUnavailable:
+            raise
+        except Exception as e:
+            print(f"잔고 목록 조회 실패: {e}")
+            return []
     
     def get_current_price(self, ticker): 
-        """특정 코인 현재 시세 조회"""
+        """특정 코인 현재 시세 조회 (시세 스트림 우선, 오래된 경우 REST 조회)"""
         try:
-            return pyupbit.get_current_price(ticker)
+            if isinstance(ticker, (list, tuple)):
+                return get_current_prices(ticker)
+            price = get_current_price(ticker)
+            return price if price is not None else 0
         except Exception as e:
             print(f"현재가 조회 실패: {e}")
             return 0
     
+    def get_ticker_snapshot(self, markets):
+        """여러 마켓 시세 표 조회 (market_snapshot.get_ticker_snapshot 형식, 시세 스트림 우선)"""
+        return get_ticker_snapshot(markets)
+    
     def get_order(self, orderid): 
         """특정 주문 정보 조회"""
         return self.orders_status(orderid)
@@ -259,21 +406,19 @@ class Trade:
     def get_ohlcv(self, ticker, interval, count): 
         """특정 코인 차트 조회"""
         try:
-            return pyupbit.get_ohlcv(ticker, interval=interval, count=count)
+            # 로컬 캔들 저장소에 없는 구간만 조회
+            return get_candle_store().get_ohlcv(ticker, interval=interval, count=count)
         except Exception as e:
             print(f"차트 데이터 조회 실패: {e}")
             return None
     
     def get_market_all(self): 
-        """모든 코인 시세 조회"""
+        """모든 마켓 목록 조회 (디스크에 저장된 마켓 정보, 오래되면 백그라운드 갱신)"""
         try:
-            url = "https://api.upbit.com/v1/market/all"
-            response = requests.get(url)
-            if response.status_code == 200:
-                return response.json()
-            else:
-                print(f"시장 데이터 조회 실패 (HTTP {response.status_code})")
-                return []
+            markets = get_market_metadata().raw()
+            if not markets:
+                print("시장 데이터 조회 실패")
+            return markets
         except Exception as e:
             print(f"시장 데이터 조회 중 오류: {e}")
             return []
@@ -293,7 +438,9 @@ class Trade:
             return None
             
         try:
+            throttle("order")
             result = self.upbit.buy_market_order(ticker, amount)
+            self.account.invalidate()
             print(f"시장가 매수 주문: {ticker}, {amount}KRW")
             return result
         except Exception as e:
@@ -310,9 +457,11 @@ class Trade:
         try:
             if volume is None:
                 # 전량 매도
-                available_volume = self.upbit.get_balance(ticker)
+                available_volume = self.get_balance(ticker)
                 if available_volume > 0:
+                    throttle("order")
                     result = self.upbit.sell_market_order(ticker, available_volume)
+                    self.account.invalidate()
                     print(f"전량 시장가 매도 주문: {ticker}, {available_volume}{ticker.split('-')[1]}")
                     return result
                 else:
@@ -320,7 +469,9 @@ class Trade:
                     return None
             else:
                 # 지정 수량 매도
+                throttle("order")
                 result = self.upbit.sell_market_order(ticker, volume)
+                self.account.invalidate()
                 print(f"시장가 매도 주문: {ticker}, {volume}{ticker.split('-')[1]}")
                 return result
         except Exception as e:
@@ -334,7 +485,9 @@ class Trade:
             return None
             
         try:
+            throttle("order")
             result = self.upbit.buy_limit_order(ticker, price, volume)
+            self.account.invalidate()
             print(f"지정가 매수 주문: {ticker}, 가격: {price}KRW, 수량: {volume}")
             return result
         except Exception as e:
@@ -350,9 +503,11 @@ class Trade:
         try:
             if volume is None:
                 # 전량 매도
-                available_volume = self.upbit.get_balance(ticker)
+                available_volume = self.get_balance(ticker)
                 if available_volume > 0:
+                    throttle("order")
                     result = self.upbit.sell_limit_order(ticker, price, available_volume)
+                    self.account.invalidate()
                     print(f"전량 지정가 매도 주문: {ticker}, 가격: {price}KRW, 수량: {available_volume}")
                     return result
                 else:
@@ -360,13 +515,70 @@ class Trade:
                     return None
             else:
                 # 지정 수량 매도
+                throttle("order")
                 result = self.upbit.sell_limit_order(ticker, price, volume)
+                self.account.invalidate()
                 print(f"지정가 매도 주문: {ticker}, 가격: {price}KRW, 수량: {volume}")
                 return result
         except Exception as e:
             print(f"지정가 매도 주문 실패: {e}")
             return None
 
+    def place_order(self, market, side, ord_type, volume=None, price=None, identifier=None):
+        """
+        주문 요청 (POST /v1/orders, pyupbit를 거치지 않고 공유 전송 계층 사용)
+
+        identifier를 붙이면 같은 주문을 다시 보내도 업비트가 중복으로 거절하므로,
+        응답을 받지 못한 주문은 get_order_by_identifier로 접수 여부를 확인할 수 있습니다.
+
+        Args:
+            market (str): 마켓 코드 (예: "KRW-BTC")
+            side (str): "bid"(매수) 또는 "ask"(매도)
+            ord_type (str): "limit"(지정가), "price"(시장가 매수), "market"(시장가 매도)
+            volume (float): 주문 수량 (지정가, 시장가 매도)
+            price (float): 주문 가격 (지정가) 또는 주문 금액 (시장가 매수)
+            identifier (str): 조회/중복 방지용 사용자 지정 주문 ID
+
+        Returns:
+            dict: 주문 응답 또는 {"error": {...}} (요청 자체가 실패하면 예외 발생)
+        """
+        if not self.is_valid or not self.upbit:
+            return {"error": {"name": "invalid_access_key", "message": "유효한 API 키가 설정되지 않았습니다."}}
+
+        body = {"market": market, "side": side, "ord_type": ord_type}
+        if volume is not None:
+            body["volume"] = _format_number(volume)
+        if price is not None:
+            body["price"] = _format_number(price)
+        if identifier:
+            body["identifier"] = identifier
+
+        response = get_transport().post("/v1/orders", json=body, headers=lambda: self._auth_headers(body))
+        self.account.invalidate()
+        if response.status_code == 401:
+            self._auth_failed()
+        try:
+            result = response.json()
+        except ValueError:
+            result = {"error": {"name": f"http_{response.status_code}", "message": response.text}}
+        if response.status_code >= 400 and "error" not in result:
+            result = {"error": {"name": f"http_{response.status_code}", "message": str(result)}}
+        return result
+
+    def get_order_by_identifier(self, identifier):
+        """identifier로 주문 조회 (없거나 실패하면 None)"""
+        if not self.is_valid:
+            return None
+        try:
+            query = {"identifier": identifier}
+            response = get_transport().get("/v1/order", params=query, headers=lambda: self._auth_headers(query))
+            if response.status_code == 200:
+                return response.json()
+            return None
+        except Exception as e:
+            print(f"identifier 주문 조회 중 오류: {e}")
+            return None
+
     def cancel_order(self, uuid): 
         """주문 취소"""
         if not self.is_valid or not self.upbit:
@@ -374,7 +586,9 @@ class Trade:
             return None
             
         try:
+            throttle("default")
             result = self.upbit.cancel_order(uuid)
+            self.account.invalidate()
             print(f"주문 취소: {uuid}")
             return result
         except Exception as e:
@@ -382,7 +596,7 @@ class Trade:
             return None
 
     def Strategy(self, ticker, k):
-        df=pyupbit.get_ohlcv(ticker, interval="day", count=200)
+        df=self.get_ohlcv(ticker, interval="day", count=200)
         df['range']=df['high']-df['low']
         df['target']=df['open']+df['range'].shift(1)
         df['bull']=df['open']>df['target']
@@ -411,7 +625,7 @@ class Trade:
         self.schedule_job()
         self.run()
     
-    def auto_trade(self, ticker, invest_amount, strategy="vb", k=0.5): # 자동 매매 실행
+    def auto_trade(self, ticker, invest_amount, strategy="vb", k=0.5, ma_window=0, entry_hours=(9, 20)): # 자동 매매 실행
         """
         자동 매매 실행
     
@@ -420,6 +634,8 @@ class Trade:
             invest_amount (float): 투자 금액(KRW)
             strategy (str, optional): 전략 선택 ("vb": 변동성 돌파)
             k (float, optional): 변동성 돌파 전략의 k값
+            ma_window (int, optional): 전일 종가가 이 기간 이동평균보다 높을 때만 매수 (0이면 사용 안 함)
+            entry_hours (tuple, optional): 매수 허용 시간 (시, [시작, 끝))
         
         Returns:
             dict: 주문 결과
@@ -430,19 +646,25 @@ class Trade:
         
             if strategy == "vb":
                 # 변동성 돌파 전략
-                df = pyupbit.get_ohlcv(ticker, interval="day", count=2)
+                df = self.get_ohlcv(ticker, interval="day", count=max(2, ma_window + 1))
             
                 # 변동성 계산
                 prev_range = df['high'].iloc[-2] - df['low'].iloc[-2]
                 target_price = df['open'].iloc[-1] + (prev_range * k)
             
+                # 이동평균 조건: 전일 종가 > 전일까지의 이동평균
+                trend_ok = True
+                if ma_window:
+                    ma = df['close'].iloc[:-1].rolling(window=ma_window).mean().iloc[-1]
+                    trend_ok = df['close'].iloc[-2] > ma
+            
                 # 현재가 확인
-                current_price = pyupbit.get_current_price(ticker)
+                current_price = self.get_current_price(ticker)
             
-                # 매수 조건: 현재가가 목표가 이상이고, 09:00~20:00 사이
-                if (current_price >= target_price) and (9 <= now.hour < 20):
+                # 매수 조건: 현재가가 목표가 이상이고, 매수 허용 시간(기본 09:00~20:00) 사이
+                if (current_price >= target_price) and trend_ok and (entry_hours[0] <= now.hour < entry_hours[1]):
                     # 보유 현금 확인
-                    krw_balance = self.upbit.get_balance("KRW")
+                    krw_balance = self.get_balance("KRW")
                 
                     # 최소 주문 금액 확인 (최소 5000원)
                     order_amount = min(invest_amount, krw_balance)
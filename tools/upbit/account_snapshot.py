@@ -0,0 +1,155 @@
+import threading
+import time
+
+from tools.upbit.upbit_http import get_transport
+
+# 계좌 스냅샷 유지 시간 (초)
+ACCOUNT_TTL = 3.0
+# 조회 실패 후 다시 조회하기까지 기다리는 시간 (초)
+FAILURE_BACKOFF = 5.0
+# 조회 실패 중에 마지막으로 받은 계좌를 대신 쓸 수 있는 최대 시간 (초)
+MAX_STALE = 60.0
+
+
+class AccountUnavailable(Exception):
+    """계좌 조회에 실패했고 대신 쓸 수 있는 최근 계좌도 없음"""
+
+
+def _currency(ticker):
+    """"KRW-BTC" 또는 "BTC" -> "BTC" """
+    return ticker.split("-")[-1] if ticker else ticker
+
+
+class AccountSnapshot:
+    """
+    /v1/accounts 한 번의 조회 결과를 통화별 dict로 보관하는 계좌 스냅샷
+
+    pyupbit의 get_balance는 통화 하나를 위해 매번 전체 계좌 목록을 받아오므로,
+    포트폴리오 한 번 조회에 5~8회의 요청이 발생했습니다. 스냅샷은 ttl 동안 같은
+    결과를 재사용하고, 우리 쪽에서 주문/취소를 보내면 invalidate()로 즉시
+    무효화되어 다음 조회 때 새로 받아옵니다.
+
+    조회에 실패하면 FAILURE_BACKOFF 동안 다시 요청하지 않고, MAX_STALE 안에 받은
+    계좌가 있으면 그 값을 쓰며(is_stale()가 True), 없으면 AccountUnavailable을
+    발생시켜 호출한 쪽이 잔고 0과 조회 실패를 구분할 수 있게 합니다.
+    """
+
+    def __init__(self, trade, ttl=ACCOUNT_TTL):
+        self.trade = trade
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # currency -> {"currency", "balance", "locked", "avg_buy_price", "unit_currency"}
+        self._accounts = {}
+        # pyupbit get_balances()와 같은 형식의 원본 목록
+        self._raw = []
+        self.fetched_at = 0.0
+        self.fetch_count = 0
+        # 마지막 성공/실패 시각과 실패 사유
+        self.succeeded_at = 0.0
+        self.failed_at = 0.0
+        self.last_error = None
+        self.failures = 0
+
+    def is_fresh(self):
+        return self.fetched_at > 0 and (time.time() - self.fetched_at) < self.ttl
+
+    def is_stale(self):
+        """마지막 조회가 실패해 이전 계좌를 쓰고 있는지 여부"""
+        return self.failed_at > self.succeeded_at
+
+    def status(self):
+        return {
+            "stale": self.is_stale(),
+            "last_error": self.last_error,
+            "failures": self.failures,
+            "age": time.time() - self.succeeded_at if self.succeeded_at else None,
+            "fetch_count": self.fetch_count,
+        }
+
+    def _fail(self, message):
+        print(message)
+        self.failed_at = time.time()
+        self.last_error = message
+        self.failures += 1
+        return False
+
+    def invalidate(self):
+        """다음 조회 시 계좌를 새로 받아오도록 표시 (주문/취소 직후 호출)"""
+        self.fetched_at = 0.0
+
+    def refresh(self):
+        """/v1/accounts 조회로 스냅샷 갱신 (성공 여부 반환)"""
+        try:
+            response = get_transport().get("/v1/accounts", headers=self.trade._auth_headers)
+        except Exception as e:
+            return self._fail(f"계좌 조회 중 오류: {e}")
+
+        if response.status_code == 401:
+            self.trade._auth_failed()
+            return self._fail("⚠️ 경고: API 키 인증 실패")
+        if response.status_code != 200:
+            return self._fail(f"계좌 조회 실패 (HTTP {response.status_code}): {response.text}")
+
+        raw = response.json()
+        accounts = {}
+        for item in raw:
+            accounts[item["currency"]] = {
+                "currency": item["currency"],
+                "balance": float(item.get("balance") or 0),
+                "locked": float(item.get("locked") or 0),
+                "avg_buy_price": float(item.get("avg_buy_price") or 0),
+                "unit_currency": item.get("unit_currency", "KRW"),
+            }
+        self._raw = raw
+        self._accounts = accounts
+        self.fetched_at = time.time()
+        self.succeeded_at = self.fetched_at
+        self.last_error = None
+        self.failures = 0
+        self.fetch_count += 1
+        return True
+
+    def _ensure(self):
+        if self.is_fresh():
+            return True
+        # 여러 스레드가 동시에 만료를 보더라도 조회는 한 번만
+        with self._lock:
+            if self.is_fresh():
+                return True
+            now = time.time()
+            if now - self.failed_at >= FAILURE_BACKOFF and self.refresh():
+                return True
+            # 조회 실패 (또는 실패 직후 대기 중): 최근 계좌가 있으면 그 값을 사용
+            if self.succeeded_at and now - self.succeeded_at < MAX_STALE:
+                return False
+            raise AccountUnavailable(self.last_error or "계좌 조회에 실패했습니다.")
+
+    def get(self, ticker):
+        """통화별 계좌 정보 dict (보유하지 않으면 None)"""
+        self._ensure()
+        return self._accounts.get(_currency(ticker))
+
+    def balance(self, ticker):
+        """주문 가능 수량"""
+        account = self.get(ticker)
+        return account["balance"] if account else 0.0
+
+    def locked(self, ticker):
+        """주문에 묶인 수량"""
+        account = self.get(ticker)
+        return account["locked"] if account else 0.0
+
+    def avg_buy_price(self, ticker):
+        """평균 매수가"""
+        account = self.get(ticker)
+        return account["avg_buy_price"] if account else 0.0
+
+    def accounts(self):
+        """{currency: 계좌 정보} 전체"""
+        self._ensure()
+        return dict(self._accounts)
+
+    def balances(self):
+        """pyupbit get_balances()와 같은 형식의 목록"""
+        self._ensure()
+        return list(self._raw)
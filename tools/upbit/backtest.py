@@ -0,0 +1,339 @@
+import numpy as np
+import pandas as pd
+
+from tools.upbit.candle_store import INTERVALS, get_candle_store, normalize_interval
+
+# 업비트 원화 마켓 거래 수수료 (0.05%)
+UPBIT_FEE = 0.0005
+# 시장가 체결 시 목표가 대비 불리하게 체결되는 비율
+DEFAULT_SLIPPAGE = 0.0005
+# auto_trade의 매수 허용 시간 (KST 시, [시작, 끝))
+ENTRY_HOURS = (9, 20)
+KST_OFFSET = 9 * 3600
+DAY = 86400
+
+
+def load_arrays(markets=None, interval="day", start=None, end=None, store=None):
+    """
+    저장소에 기록된 캔들을 (마켓 x 시각) 격자 배열로 정렬 (API 호출 없음)
+
+    Args:
+        markets (list): 마켓 코드 목록 (없으면 저장된 모든 마켓)
+        interval (str): 캔들 주기
+        start, end (float): 시각 범위 (epoch 초, UTC)
+
+    Returns:
+        dict: {
+            "markets": 마켓 목록, "times": (T,) 캔들 시작 시각(epoch 초),
+            "open"/"high"/"low"/"close"/"volume"/"value": (M, T) float64 배열 (캔들이 없으면 NaN)
+        }
+    """
+    store = store or get_candle_store()
+    interval = normalize_interval(interval)
+    period = INTERVALS[interval][1]
+    if markets is None:
+        markets = store.stored_markets(interval)
+
+    stored = {}
+    for market in markets:
+        rows = store.read_stored(market, interval, start, end)
+        if len(rows):
+            stored[market] = rows
+
+    markets = [m for m in markets if m in stored]
+    if not markets:
+        empty = np.empty((0, 0), dtype="float64")
+        return {"markets": [], "times": np.empty(0, dtype="int64"),
+                **{field: empty for field in ("open", "high", "low", "close", "volume", "value")}}
+
+    t0 = int(min(rows[0, 0] for rows in stored.values()))
+    t1 = int(max(rows[-1, 0] for rows in stored.values()))
+    times = np.arange(t0, t1 + period, period, dtype="int64")
+
+    data = np.full((6, len(markets), len(times)), np.nan)
+    for i, market in enumerate(markets):
+        rows = stored[market]
+        col = (rows[:, 0].astype("int64") - t0) // period
+        data[:, i, col] = rows[:, 1:].T
+
+    return {
+        "markets": markets,
+        "times": times,
+        "open": data[0],
+        "high": data[1],
+        "low": data[2],
+        "close": data[3],
+        "volume": data[4],
+        "value": data[5],
+    }
+
+
+def load_intraday(markets, days, store=None):
+    """
+    1시간봉을 (마켓 x 일 x 24) 배열로 정렬 (시간 인덱스 0 = 09:00 KST)
+
+    Args:
+        markets (list): 마켓 코드 목록
+        days (np.ndarray): 일봉 시작 시각 배열 (load_arrays의 "times")
+
+    Returns:
+        dict: {"open": (M, D, 24), "high": (M, D, 24),
+               "covered": (M, D) 1시간봉을 하루 전체 확보한 칸, "coverage": covered 비율}
+        (저장된 1시간봉이 없으면 None)
+    """
+    if len(markets) == 0 or len(days) == 0:
+        return None
+    store = store or get_candle_store()
+    hourly = load_arrays(markets, interval="minute60", start=int(days[0]), end=int(days[-1]) + DAY, store=store)
+    if not hourly["markets"]:
+        return None
+
+    out = {field: np.full((len(markets), len(days), 24), np.nan) for field in ("open", "high")}
+    rows = np.array([markets.index(m) for m in hourly["markets"]])
+    day = (hourly["times"] - int(days[0])) // DAY
+    hour = (hourly["times"] % DAY) // 3600
+    keep = (day >= 0) & (day < len(days))
+    for field in out:
+        out[field][rows[:, None], day[keep], hour[keep]] = hourly[field][:, keep]
+
+    # 저장소가 조회를 마친 구간으로 판단 (거래가 없던 시간은 캔들이 없어도 확보한 것)
+    covered = np.zeros((len(markets), len(days)), dtype=bool)
+    day_start = np.asarray(days, dtype="int64")
+    for i, market in enumerate(markets):
+        for range_start, range_end in store.coverage(market, "minute60"):
+            covered[i] |= (day_start >= range_start) & (day_start + DAY <= range_end)
+    out["covered"] = covered
+    out["coverage"] = float(covered.mean())
+    return out
+
+
+def moving_average(values, window):
+    """(M, T) 배열의 시간축 단순 이동평균 (구간에 NaN이 있으면 NaN)"""
+    valid = np.isfinite(values)
+    filled = np.where(valid, values, 0.0)
+    csum = np.cumsum(filled, axis=1)
+    ccount = np.cumsum(valid, axis=1)
+    csum = np.concatenate([np.zeros((len(values), 1)), csum], axis=1)
+    ccount = np.concatenate([np.zeros((len(values), 1), dtype=ccount.dtype), ccount], axis=1)
+
+    out = np.full(values.shape, np.nan)
+    if window <= values.shape[1]:
+        total = csum[:, window:] - csum[:, :-window]
+        count = ccount[:, window:] - ccount[:, :-window]
+        out[:, window - 1:] = np.where(count == window, total / window, np.nan)
+    return out
+
+
+def _shift(values, n=1):
+    """시간축으로 n칸 뒤로 밀기 (앞은 NaN)"""
+    out = np.full(values.shape, np.nan)
+    out[:, n:] = values[:, :-n]
+    return out
+
+
+def _max_drawdown(equity):
+    """자산 곡선(마지막 축 기준)의 최대 낙폭 (0 ~ 1)"""
+    peak = np.maximum.accumulate(equity, axis=-1)
+    return np.max(1 - equity / peak, axis=-1)
+
+
+def simulate_vb(data, k=0.5, ma_window=5, fee=UPBIT_FEE, slippage=DEFAULT_SLIPPAGE,
+                entry_hours=ENTRY_HOURS, intraday=None, ma=None):
+    """
+    변동성 돌파 전략의 마켓 x 일 거래 결과 계산 (backtest_vb의 핵심 연산)
+
+    Args:
+        ma (np.ndarray): 미리 계산한 moving_average(close, ma_window) (파라미터 탐색 시 재사용)
+
+    Returns:
+        tuple: (trade_return, entered, tradable)
+            trade_return: 수수료/슬리피지 반영 거래 수익률 (거래하지 않은 날은 NaN)
+            entered: 매수한 날 (bool)
+            tradable: 목표가를 계산할 수 있고 이동평균 조건을 통과한 날 (bool)
+    """
+    opens, highs, lows, closes = data["open"], data["high"], data["low"], data["close"]
+
+    prev_range = _shift(highs - lows)
+    target = opens + prev_range * k
+    with np.errstate(invalid="ignore"):
+        tradable = np.isfinite(target) & np.isfinite(closes) & (prev_range > 0)
+
+    if ma_window:
+        if ma is None:
+            ma = moving_average(closes, ma_window)
+        with np.errstate(invalid="ignore"):
+            tradable &= _shift(closes) > _shift(ma)
+
+    with np.errstate(invalid="ignore"):
+        entered = (highs >= target) & tradable
+    entry = np.maximum(target, opens)
+
+    if intraday is not None:
+        # 1시간봉을 확보한 칸만 시간 단위로 판단하고, 나머지는 일봉 규칙 그대로 사용
+        covered = intraday.get("covered")
+        if covered is None:
+            covered = np.isfinite(intraday["high"]).any(axis=2)
+        covered = np.asarray(covered, dtype=bool)
+        # 시간 인덱스 h의 KST 시각은 (9 + h) % 24
+        kst_hour = (np.arange(24) + 9) % 24
+        window = (kst_hour >= entry_hours[0]) & (kst_hour < entry_hours[1])
+        with np.errstate(invalid="ignore"):
+            hit = (intraday["high"] >= target[:, :, None]) & window
+        first = hit.argmax(axis=2)
+        hour_open = np.take_along_axis(intraday["open"], first[:, :, None], axis=2)[:, :, 0]
+        entered = np.where(covered, hit.any(axis=2) & tradable, entered)
+        entry = np.where(covered, np.where(np.isfinite(hour_open), np.maximum(target, hour_open), target), entry)
+
+    buy_cost = entry * (1 + slippage) * (1 + fee)
+    sell_proceeds = closes * (1 - slippage) * (1 - fee)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        trade_return = np.where(entered, sell_proceeds / buy_cost - 1, np.nan)
+    return trade_return, entered, tradable
+
+
+def portfolio_equity(trade_return, entered, tradable):
+    """
+    그날 거래 가능한 마켓 수로 자금을 똑같이 나눴을 때의 자산 곡선
+
+    Returns:
+        tuple: (equity, invested) - 자산 곡선(시작 1.0)과 날짜별 투자 비중
+    """
+    days = trade_return.shape[1]
+    active = tradable.sum(axis=0)
+    daily = np.divide(np.nansum(trade_return, axis=0), active, out=np.zeros(days), where=active > 0)
+    invested = np.divide(entered.sum(axis=0), active, out=np.zeros(days), where=active > 0)
+    return np.cumprod(1 + daily), invested
+
+
+def summarize(trade_return, entered, tradable, listed_days):
+    """
+    전체 성과 지표 (수익률/낙폭/승률은 % 단위)
+
+    Args:
+        listed_days (int): 한 마켓이라도 캔들이 있는 날 수 (연환산 기준)
+    """
+    equity, invested = portfolio_equity(trade_return, entered, tradable)
+    trades = int(entered.sum())
+    wins = int((trade_return > 0).sum())
+    years = max(int(listed_days), 1) / 365
+    final = float(equity[-1])
+    daily = np.diff(np.r_[1.0, equity]) / np.r_[1.0, equity[:-1]]
+    std = float(daily.std())
+    return {
+        "총수익률": (final - 1) * 100,
+        "연환산수익률": (final ** (1 / years) - 1) * 100 if final > 0 else -100.0,
+        "최대낙폭": float(_max_drawdown(equity)) * 100,
+        "승률": (wins / trades * 100) if trades else 0.0,
+        "거래수": trades,
+        "평균수익률": float(np.nanmean(trade_return)) * 100 if trades else 0.0,
+        # 일간 수익률 기준 연환산 샤프 지수 (무위험 수익률 0)
+        "샤프지수": float(daily.mean() / std * np.sqrt(365)) if std > 0 else 0.0,
+        # 매수+매도 거래대금 합계 / 자산 (자산이 몇 번 회전했는지)
+        "회전율": float(2 * invested.sum()),
+        "투자비중": float(invested.mean()) * 100,
+    }
+
+
+def summarize_markets(trade_return, entered):
+    """
+    마켓 하나에 전액 투자했을 때의 마켓별 성과 지표
+
+    Returns:
+        tuple: (market_equity, stats) - (M, D) 자산 곡선과 {지표: (M,) 배열}
+    """
+    markets = trade_return.shape[0]
+    market_equity = np.cumprod(1 + np.nan_to_num(trade_return), axis=1)
+    trades = entered.sum(axis=1)
+    wins = (trade_return > 0).sum(axis=1)
+    return market_equity, {
+        "거래수": trades,
+        "승률": np.divide(wins, trades, out=np.zeros(markets), where=trades > 0) * 100,
+        "총수익률": (market_equity[:, -1] - 1) * 100,
+        "최대낙폭": _max_drawdown(market_equity) * 100,
+        "평균수익률": np.divide(np.nansum(trade_return, axis=1), trades,
+                           out=np.zeros(markets), where=trades > 0) * 100,
+    }
+
+
+def backtest_vb(data, k=0.5, ma_window=5, fee=UPBIT_FEE, slippage=DEFAULT_SLIPPAGE,
+                entry_hours=ENTRY_HOURS, intraday=None):
+    """
+    변동성 돌파 전략 백테스트 (여러 마켓 동시, 일봉 배열 연산)
+
+    Trade.auto_trade와 같은 규칙을 사용합니다.
+      - 목표가 = 당일 시가 + 전일 (고가 - 저가) x k
+      - 가격이 목표가에 닿으면 매수 (entry_hours 안에서만), 다음 날 09:00 직전(08:50)에 전량 매도
+      - ma_window가 있으면 전일 종가가 전일까지의 이동평균보다 높을 때만 매수 (Strategy의 MA5 조건)
+    매수는 목표가(갭 상승으로 이미 넘었으면 그 시각 시가)에, 매도는 일봉 종가에 체결된 것으로
+    보고, 양쪽에 수수료와 슬리피지를 적용합니다. intraday(1시간봉)가 없거나 그날의 1시간봉을
+    확보하지 못한 칸은 일봉 고가로 돌파 여부만 판단하므로 매수 허용 시간은 반영되지 않습니다
+    (반영된 비율은 stats의 "시간봉반영률").
+
+    자금은 매일 그날 거래 가능한 마켓 수로 똑같이 나누고, 돌파하지 않은 마켓 몫은 현금으로 둡니다.
+
+    Args:
+        data (dict): load_arrays 결과 (일봉)
+        k (float): 변동성 돌파 계수
+        ma_window (int): 이동평균 필터 기간 (0 또는 None이면 사용 안 함)
+        fee (float): 거래 수수료율 (매수/매도 각각)
+        slippage (float): 체결 불리 비율 (매수/매도 각각)
+        entry_hours (tuple): 매수 허용 시간 (KST 시, [시작, 끝))
+        intraday (dict): load_intraday 결과 (없으면 일봉만 사용)
+
+    Returns:
+        dict: {
+            "stats": 전체 성과 dict (총수익률, 연환산수익률, 최대낙폭, 승률, 거래수, 회전율 등),
+            "equity": 포트폴리오 자산 곡선 pd.Series (시작 1.0, KST 날짜 인덱스),
+            "market_equity": 마켓별 자산 곡선 DataFrame (마켓 하나에 전액 투자했을 때),
+            "per_market": 마켓별 성과 DataFrame,
+            "returns": 마켓 x 일 거래 수익률 배열 (거래하지 않은 날은 NaN)
+        }
+    """
+    markets = data["markets"]
+    if not markets or len(data["times"]) < 2:
+        return None
+
+    trade_return, entered, tradable = simulate_vb(
+        data, k=k, ma_window=ma_window, fee=fee, slippage=slippage,
+        entry_hours=entry_hours, intraday=intraday
+    )
+    equity, _ = portfolio_equity(trade_return, entered, tradable)
+    listed_days = int(np.isfinite(data["close"]).any(axis=0).sum())
+    market_equity, market_stats = summarize_markets(trade_return, entered)
+
+    index = pd.to_datetime(data["times"] + KST_OFFSET, unit="s")
+    per_market = pd.DataFrame(market_stats, index=pd.Index(markets, name="market"))
+
+    stats = {
+        "시작일": index[0].strftime("%Y-%m-%d"),
+        "종료일": index[-1].strftime("%Y-%m-%d"),
+        "마켓수": len(markets),
+        **summarize(trade_return, entered, tradable, listed_days),
+        "k": k,
+        "ma_window": ma_window or 0,
+        "entry_hours": list(entry_hours) if intraday is not None else None,
+        "시간봉반영률": intraday["coverage"] * 100 if intraday is not None and "coverage" in intraday else 0.0,
+    }
+    return {
+        "stats": stats,
+        "equity": pd.Series(equity, index=index, name="equity"),
+        "market_equity": pd.DataFrame(market_equity.T, index=index, columns=markets),
+        "per_market": per_market.sort_values("총수익률", ascending=False),
+        "returns": trade_return,
+    }
+
+
+def run_backtest(markets=None, k=0.5, ma_window=5, fee=UPBIT_FEE, slippage=DEFAULT_SLIPPAGE,
+                 entry_hours=ENTRY_HOURS, start=None, end=None, use_intraday=False, store=None):
+    """
+    저장된 캔들로 변동성 돌파 전략 백테스트 (오프라인)
+
+    use_intraday=True면 저장된 1시간봉으로 매수 시각을 판단해 매수 허용 시간까지 반영합니다.
+
+    Returns:
+        dict: backtest_vb 결과 (저장된 캔들이 없으면 None)
+    """
+    data = load_arrays(markets, interval="day", start=start, end=end, store=store)
+    intraday = load_intraday(data["markets"], data["times"], store=store) if use_intraday else None
+    return backtest_vb(data, k=k, ma_window=ma_window, fee=fee, slippage=slippage,
+                       entry_hours=entry_hours, intraday=intraday)
@@ -0,0 +1,79 @@
+import numpy as np
+
+# 주기별 캔들 길이(초)와 시작 기준점
+# 업비트 일봉은 09:00 KST(= 00:00 UTC)에 시작하므로 epoch 초 기준 격자와 그대로 맞고,
+# 주봉은 월요일 09:00 KST에 시작하므로 1970-01-05(월) 00:00 UTC 기준으로 4일 이동합니다.
+PERIODS = {
+    "minute1": 60,
+    "minute3": 180,
+    "minute5": 300,
+    "minute10": 600,
+    "minute15": 900,
+    "minute30": 1800,
+    "minute60": 3600,
+    "minute240": 14400,
+    "day": 86400,
+    "week": 604800,
+}
+OFFSETS = {"week": 4 * 86400}
+
+# 직접 조회하지 않고 더 작은 주기에서 만들어 쓰는 주기: 대상 -> 원본
+# 일봉은 1시간봉으로도 만들 수 있지만, 긴 기간 조회 시 요청 수가 24배로 늘어나므로 직접 저장합니다.
+RESAMPLE_SOURCES = {
+    "minute3": "minute1",
+    "minute5": "minute1",
+    "minute10": "minute1",
+    "minute15": "minute1",
+    "minute30": "minute1",
+    "minute240": "minute60",
+    "week": "day",
+}
+
+
+def can_resample(source, target):
+    """source 주기 캔들로 target 주기 캔들을 만들 수 있는지"""
+    if source not in PERIODS or target not in PERIODS:
+        return False
+    sp, tp = PERIODS[source], PERIODS[target]
+    return tp >= sp and tp % sp == 0 and (OFFSETS.get(target, 0) - OFFSETS.get(source, 0)) % sp == 0
+
+
+def bucket_start(ts, interval):
+    """각 시각(epoch 초 배열)이 속한 interval 캔들의 시작 시각"""
+    period = PERIODS[interval]
+    offset = OFFSETS.get(interval, 0)
+    ts = np.asarray(ts, dtype="int64")
+    return (ts - offset) // period * period + offset
+
+
+def resample_rows(rows, target):
+    """
+    캔들 배열을 더 큰 주기로 집계
+
+    Args:
+        rows (np.ndarray): 시간순 (N, 7) 배열 [시작시각(epoch 초, UTC), 시가, 고가, 저가, 종가, 거래량, 거래대금]
+        target (str): 만들 주기 (예: "minute5", "minute240", "week")
+
+    Returns:
+        np.ndarray: 같은 형식의 (M, 7) 배열. 시가는 구간 첫 캔들, 종가는 마지막 캔들,
+        고가/저가는 최대/최소, 거래량/거래대금은 합계입니다.
+    """
+    rows = np.asarray(rows, dtype="float64")
+    if len(rows) == 0:
+        return np.empty((0, 7), dtype="float64")
+
+    buckets = bucket_start(rows[:, 0], target)
+    # 구간이 바뀌는 위치 (rows가 시간순이므로 같은 구간은 연속해 있음)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(rows)] - 1
+
+    out = np.empty((len(starts), 7), dtype="float64")
+    out[:, 0] = buckets[starts]
+    out[:, 1] = rows[starts, 1]
+    out[:, 2] = np.maximum.reduceat(rows[:, 2], starts)
+    out[:, 3] = np.minimum.reduceat(rows[:, 3], starts)
+    out[:, 4] = rows[ends, 4]
+    out[:, 5] = np.add.reduceat(rows[:, 5], starts)
+    out[:, 6] = np.add.reduceat(rows[:, 6], starts)
+    return out
+
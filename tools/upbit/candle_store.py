@@ -0,0 +1,414 @@
+import io
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyupbit
+
+from tools.upbit.candle_resample import RESAMPLE_SOURCES, can_resample, resample_rows
+from tools.upbit.upbit_http import get_transport
+from tools.upbit.upbit_ratelimit import throttle
+
+# 캔들 저장 위치 (UPBIT_CANDLE_DIR 환경변수로 변경 가능)
+CANDLE_DIR = os.environ.get("UPBIT_CANDLE_DIR", os.path.join("data", "candles"))
+# 업비트 캔들 API 1회 최대 조회 개수
+MAX_CANDLES_PER_REQUEST = 200
+# pyupbit.get_ohlcv와 같은 컬럼 구성
+COLUMNS = ["open", "high", "low", "close", "volume", "value"]
+KST_OFFSET = 9 * 3600
+# 주봉은 월요일 00:00 UTC(09:00 KST) 시작, 1970-01-01은 목요일이므로 4일 이동
+WEEK_OFFSET = 4 * 86400
+
+# 저장소에서 관리하는 주기: interval -> (API 경로, 캔들 길이(초))
+# 월봉은 길이가 일정하지 않아 저장하지 않고 그대로 조회합니다.
+INTERVALS = {
+    "minute1": ("/v1/candles/minutes/1", 60),
+    "minute3": ("/v1/candles/minutes/3", 180),
+    "minute5": ("/v1/candles/minutes/5", 300),
+    "minute10": ("/v1/candles/minutes/10", 600),
+    "minute15": ("/v1/candles/minutes/15", 900),
+    "minute30": ("/v1/candles/minutes/30", 1800),
+    "minute60": ("/v1/candles/minutes/60", 3600),
+    "minute240": ("/v1/candles/minutes/240", 14400),
+    "day": ("/v1/candles/days", 86400),
+    "week": ("/v1/candles/weeks", 604800),
+}
+
+
+def normalize_interval(interval):
+    """pyupbit 방식의 주기 이름 정규화 (예: "days" -> "day", "minutes5" -> "minute5")"""
+    interval = (interval or "day").lower()
+    if interval in ("day", "days"):
+        return "day"
+    if interval in ("week", "weeks"):
+        return "week"
+    if interval in ("month", "months"):
+        return "month"
+    if interval.startswith("minute"):
+        unit = interval.lstrip("minutes") or "1"
+        return f"minute{unit}"
+    return interval
+
+
+def interval_offset(interval):
+    """주기별 캔들 시작 시각 기준점 (epoch 초)"""
+    return WEEK_OFFSET if interval == "week" else 0
+
+
+def candle_start(ts, interval):
+    """ts가 속한 캔들의 시작 시각 (epoch 초, UTC)"""
+    period = INTERVALS[interval][1]
+    offset = interval_offset(interval)
+    return int((ts - offset) // period * period + offset)
+
+
+def _subtract_ranges(start, end, ranges):
+    """[start, end) 구간에서 이미 확보한 ranges를 뺀 나머지 구간 목록"""
+    gaps = []
+    cursor = start
+    for s, e in ranges:
+        if e <= cursor:
+            continue
+        if s >= end:
+            break
+        if s > cursor:
+            gaps.append([cursor, min(s, end)])
+        cursor = max(cursor, e)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append([cursor, end])
+    return gaps
+
+
+def _add_range(ranges, start, end):
+    """ranges에 [start, end) 구간을 추가하고 겹치거나 맞닿은 구간을 병합"""
+    if start >= end:
+        return ranges
+    merged = []
+    for s, e in sorted(ranges + [[start, end]]):
+        if merged and s <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], e)
+        else:
+            merged.append([s, e])
+    return merged
+
+
+def _to_iso(ts):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts))
+
+
+def _to_frame(rows):
+    """(N, 7) 배열 [ts, open, high, low, close, volume, value]을 pyupbit 형식 DataFrame으로 변환"""
+    index = pd.to_datetime(rows[:, 0].astype("int64") + KST_OFFSET, unit="s")
+    return pd.DataFrame(np.array(rows[:, 1:]), index=index, columns=COLUMNS)
+
+
+class CandleStore:
+    """
+    (마켓, 주기)별 OHLCV 캔들을 디스크에 누적 저장하는 저장소
+
+    캔들은 [시작시각(epoch 초, UTC), 시가, 고가, 저가, 종가, 거래량, 거래대금] 행으로
+    이루어진 .npy 배열에 시간순으로 저장하고 메모리 맵으로 읽습니다. 이미 조회한
+    시간 구간은 같은 이름의 .json 파일에 기록해, 요청 구간 중 빠진 부분(과거 공백과
+    최신 꼬리)만 업비트에서 가져옵니다. 거래가 없던 분봉은 업비트가 내려주지 않으므로
+    행이 아닌 구간으로 확보 여부를 판단합니다. 아직 끝나지 않은 현재 캔들은 파일에
+    쓰지 않고 메모리에만 두어 매번 새로 조회하며, 새로 마감된 캔들이 저장된 끝보다
+    뒤에 있으면 파일 끝에 이어 쓰기만 하므로 조회 비용은 전체 기록이 아닌 요청 구간에
+    비례합니다.
+    """
+
+    def __init__(self, root=CANDLE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._locks = {}
+        # (market, interval) -> (배열, 확보 구간 목록)
+        self._cache = {}
+        # (market, interval) -> 현재 진행 중인 캔들 행 (저장하지 않음)
+        self._live = {}
+
+    def _key_lock(self, key):
+        with self._lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = threading.Lock()
+                self._locks[key] = lock
+            return lock
+
+    def _paths(self, market, interval):
+        base = os.path.join(self.root, f"{market}_{interval}")
+        return base + ".npy", base + ".json"
+
+    def _load(self, market, interval):
+        key = (market, interval)
+        if key in self._cache:
+            return self._cache[key]
+
+        data_path, meta_path = self._paths(market, interval)
+        rows = np.empty((0, 7), dtype="float64")
+        ranges = []
+        try:
+            if os.path.exists(data_path) and os.path.exists(meta_path):
+                rows = np.load(data_path, mmap_mode="r")
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    ranges = json.load(f).get("ranges", [])
+        except Exception as e:
+            print(f"캔들 저장소 읽기 실패 ({market}, {interval}): {e}")
+            rows = np.empty((0, 7), dtype="float64")
+            ranges = []
+
+        self._cache[key] = (rows, ranges)
+        return rows, ranges
+
+    def _save_ranges(self, market, interval, ranges):
+        os.makedirs(self.root, exist_ok=True)
+        _, meta_path = self._paths(market, interval)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"market": market, "interval": interval, "ranges": ranges}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def _save(self, market, interval, rows, ranges):
+        os.makedirs(self.root, exist_ok=True)
+        data_path, _ = self._paths(market, interval)
+        # 임시 파일에 쓴 뒤 교체하여 읽는 쪽이 깨진 파일을 보지 않도록 함
+        with open(data_path + ".tmp", "wb") as f:
+            np.save(f, rows)
+        os.replace(data_path + ".tmp", data_path)
+        self._save_ranges(market, interval, ranges)
+        self._cache[(market, interval)] = (np.load(data_path, mmap_mode="r"), ranges)
+
+    def _append(self, market, interval, new_rows, ranges):
+        """
+        저장된 끝보다 뒤의 행을 파일 끝에 이어 쓰기 (헤더의 행 수만 갱신)
+
+        np.save는 행 수가 늘어날 자리를 헤더에 남겨 두므로 보통 헤더 길이가 그대로이며,
+        길이가 달라지는 경우에만 전체를 다시 씁니다. 행을 먼저 쓰고 헤더를 나중에 바꾸므로
+        중간에 멈춰도 파일은 이전 행 수로 읽힙니다.
+        """
+        data_path, _ = self._paths(market, interval)
+        rows, _ = self._cache[(market, interval)]
+        if not os.path.exists(data_path) or len(rows) == 0:
+            self._save(market, interval, np.ascontiguousarray(new_rows, dtype="float64"), ranges)
+            return
+
+        total = len(rows) + len(new_rows)
+        header = io.BytesIO()
+        np.lib.format.write_array_header_1_0(
+            header, {"descr": np.lib.format.dtype_to_descr(np.dtype("float64")),
+                     "fortran_order": False, "shape": (total, 7)})
+        with open(data_path, "r+b") as f:
+            np.lib.format.read_magic(f)
+            np.lib.format.read_array_header_1_0(f)
+            offset = f.tell()
+            if header.tell() != offset:
+                f.close()
+                self._save(market, interval, np.concatenate([np.asarray(rows), new_rows]), ranges)
+                return
+            f.seek(offset + len(rows) * 7 * 8)
+            f.write(np.ascontiguousarray(new_rows, dtype="<f8").tobytes())
+            f.truncate()
+            f.flush()
+            f.seek(0)
+            f.write(header.getvalue())
+        self._save_ranges(market, interval, ranges)
+        self._cache[(market, interval)] = (np.load(data_path, mmap_mode="r"), ranges)
+
+    def _fetch_range(self, market, interval, start, end):
+        """[start, end) 구간 캔들을 최신 쪽부터 200개씩 조회 (실패 시 None)"""
+        path, period = INTERVALS[interval]
+        now = time.time()
+        rows = []
+        to = end
+        while to > start:
+            count = min(MAX_CANDLES_PER_REQUEST, int(-(-(to - start) // period)))
+            params = {"market": market, "count": count}
+            if to <= now:
+                params["to"] = _to_iso(to)
+            response = get_transport().get(path, params=params)
+            if response.status_code != 200:
+                print(f"캔들 조회 실패 ({market}, {interval}, HTTP {response.status_code}): {response.text}")
+                return None
+
+            items = response.json()
+            if not items:
+                break
+            times = pd.to_datetime([item["candle_date_time_utc"] for item in items]).values
+            times = times.astype("datetime64[s]").astype("int64")
+            for ts, item in zip(times, items):
+                rows.append([
+                    float(ts),
+                    item["opening_price"],
+                    item["high_price"],
+                    item["low_price"],
+                    item["trade_price"],
+                    item["candle_acc_trade_volume"],
+                    item["candle_acc_trade_price"],
+                ])
+            earliest = int(times.min())
+            # 요청한 개수보다 적게 왔으면 더 이전 데이터가 없음 (상장 이전)
+            if earliest <= start or len(items) < count:
+                break
+            to = earliest
+
+        if not rows:
+            return np.empty((0, 7), dtype="float64")
+        rows = np.array(rows, dtype="float64")
+        return rows[(rows[:, 0] >= start) & (rows[:, 0] < end)]
+
+    def _read_rows(self, market, interval, start):
+        """start부터 현재 캔들까지의 (N, 7) 배열 (빠진 구간과 현재 캔들만 조회)"""
+        period = INTERVALS[interval][1]
+        current = candle_start(time.time(), interval)
+        start = candle_start(start, interval)
+        end = current + period
+
+        with self._key_lock((market, interval)):
+            rows, ranges = self._load(market, interval)
+
+            # 빠진 구간 + 현재 캔들 (맞닿은 구간은 한 번에 조회)
+            gaps = _subtract_ranges(start, current, ranges)
+            if gaps and gaps[-1][1] == current:
+                gaps[-1][1] = end
+            else:
+                gaps.append([current, end])
+
+            fetched = []
+            old_ranges = ranges
+            live = None
+            for gap_start, gap_end in gaps:
+                try:
+                    new_rows = self._fetch_range(market, interval, gap_start, gap_end)
+                except Exception as e:
+                    print(f"캔들 조회 중 오류 ({market}, {interval}): {e}")
+                    new_rows = None
+                if new_rows is None:
+                    continue
+                # 현재 캔들은 아직 확정되지 않았으므로 메모리에만 두고 확보 구간에서 제외
+                is_live = new_rows[:, 0] >= current
+                if is_live.any():
+                    live = new_rows[is_live][-1:]
+                if (~is_live).any():
+                    fetched.append(new_rows[~is_live])
+                ranges = _add_range(ranges, gap_start, min(gap_end, current))
+            if live is not None:
+                self._live[(market, interval)] = live
+
+            if fetched:
+                new_rows = np.concatenate(fetched)
+                new_rows = new_rows[np.argsort(new_rows[:, 0], kind="stable")]
+                if len(rows) == 0 or new_rows[0, 0] > rows[-1, 0]:
+                    # 최신 꼬리만 늘어난 경우: 새 행만 이어 쓰기
+                    self._append(market, interval, new_rows, ranges)
+                else:
+                    # 과거 공백을 채운 경우: 새로 받은 값이 기존 값을 덮어쓰도록 앞에 두고 시각 기준 중복 제거
+                    combined = np.concatenate([new_rows[::-1], np.asarray(rows)])
+                    _, first = np.unique(combined[:, 0], return_index=True)
+                    self._save(market, interval, combined[first], ranges)
+                rows, ranges = self._cache[(market, interval)]
+            elif ranges != old_ranges:
+                # 거래가 없던 구간만 확보된 경우 구간 정보만 갱신
+                self._save_ranges(market, interval, ranges)
+                self._cache[(market, interval)] = (rows, ranges)
+
+            lo = np.searchsorted(rows[:, 0], start, side="left")
+            hi = np.searchsorted(rows[:, 0], current, side="left")
+            window = np.array(rows[lo:hi])
+            live = self._live.get((market, interval))
+            if live is not None and live[0, 0] >= current:
+                window = np.concatenate([window, live])
+            return window
+
+    def get_ohlcv(self, market, interval="day", count=200, resample=True):
+        """
+        최근 count개 구간의 캔들 조회 (현재 진행 중인 캔들 포함)
+
+        RESAMPLE_SOURCES에 있는 주기(3~30분봉, 4시간봉, 주봉)는 더 작은 주기의
+        저장된 캔들을 집계해 만들므로, 차트 주기를 바꿔도 추가 요청이 거의 없고
+        주기 간 값이 서로 일치합니다. resample=False면 해당 주기를 직접 조회합니다.
+
+        Returns:
+            pd.DataFrame: pyupbit.get_ohlcv와 같은 형식 (KST 시각 인덱스,
+            open/high/low/close/volume/value 컬럼). 조회 실패 시 None
+        """
+        interval = normalize_interval(interval)
+        if interval not in INTERVALS:
+            # 월봉 등 저장소에서 관리하지 않는 주기는 그대로 조회
+            throttle("candles", count=max(1, -(-count // MAX_CANDLES_PER_REQUEST)))
+            return pyupbit.get_ohlcv(market, interval=interval, count=count)
+
+        period = INTERVALS[interval][1]
+        start = candle_start(time.time(), interval) - (count - 1) * period
+
+        source = RESAMPLE_SOURCES.get(interval) if resample else None
+        if source and can_resample(source, interval):
+            window = resample_rows(self._read_rows(market, source, start), interval)
+        else:
+            window = self._read_rows(market, interval, start)
+
+        if len(window) == 0:
+            return None
+        return _to_frame(window)
+
+    def read_stored(self, market, interval, start=None, end=None):
+        """
+        저장된 캔들만 읽기 (API를 호출하지 않음, 백테스트 등 오프라인 용도)
+
+        Returns:
+            np.ndarray: [start, end) 구간의 (N, 7) 배열
+        """
+        interval = normalize_interval(interval)
+        with self._key_lock((market, interval)):
+            rows, _ = self._load(market, interval)
+            lo = 0 if start is None else np.searchsorted(rows[:, 0], start, side="left")
+            hi = len(rows) if end is None else np.searchsorted(rows[:, 0], end, side="left")
+            return np.array(rows[lo:hi])
+
+    def stored_markets(self, interval="day"):
+        """interval 캔들이 저장된 마켓 목록"""
+        interval = normalize_interval(interval)
+        if not os.path.isdir(self.root):
+            return []
+        suffix = f"_{interval}.npy"
+        return sorted(name[:-len(suffix)] for name in os.listdir(self.root) if name.endswith(suffix))
+
+    def coverage(self, market, interval):
+        """저장소에 확보된 구간 목록 [[시작, 끝), ...] (epoch 초)"""
+        interval = normalize_interval(interval)
+        with self._key_lock((market, interval)):
+            return [list(r) for r in self._load(market, interval)[1]]
+
+    def clear(self, market=None, interval=None):
+        """저장된 캔들 삭제 (인자가 없으면 전체)"""
+        interval = normalize_interval(interval) if interval else None
+        with self._lock:
+            keys = [k for k in self._cache
+                    if (market is None or k[0] == market) and (interval is None or k[1] == interval)]
+            for key in keys:
+                self._cache.pop(key, None)
+                self._live.pop(key, None)
+        if not os.path.isdir(self.root):
+            return
+        for name in os.listdir(self.root):
+            stem = name.rsplit(".", 1)[0]
+            if "_" not in stem:
+                continue
+            m, i = stem.rsplit("_", 1)
+            if (market is None or m == market) and (interval is None or i == interval):
+                os.remove(os.path.join(self.root, name))
+
+
+# 프로세스 전역 캔들 저장소
+_STORE = CandleStore()
+
+
+def get_candle_store():
+    """공유 CandleStore 반환"""
+    return _STORE
+
+
+def get_ohlcv(market, interval="day", count=200, resample=True):
+    """공유 저장소에서 캔들 조회 (pyupbit.get_ohlcv 대체)"""
+    return _STORE.get_ohlcv(market, interval=interval, count=count, resample=resample)
@@ -0,0 +1,477 @@
+import math
+import threading
+import time
+from collections import deque
+
+from tools.upbit.candle_store import INTERVALS, candle_start, get_candle_store
+from tools.upbit.market_snapshot import get_current_prices
+from tools.upbit.market_stream import get_market_stream
+
+# 지표 초기화에 쓰는 과거 캔들 수
+SEED_CANDLES = 200
+
+
+class SMA:
+    """단순 이동평균 (합계를 유지하여 갱신 O(1))"""
+
+    def __init__(self, window):
+        self.window = window
+        self._values = deque(maxlen=window)
+        self._sum = 0.0
+
+    def update(self, value):
+        if len(self._values) == self.window:
+            self._sum -= self._values[0]
+        self._values.append(value)
+        self._sum += value
+
+    @property
+    def value(self):
+        return self._sum / self.window if len(self._values) == self.window else None
+
+    def preview(self, value):
+        """진행 중인 캔들이 value로 끝난다고 했을 때의 값"""
+        if len(self._values) < self.window - 1:
+            return None
+        total = self._sum + value
+        if len(self._values) == self.window:
+            total -= self._values[0]
+        return total / self.window
+
+
+class EMA:
+    """지수 이동평균 (첫 window개의 평균으로 시작)"""
+
+    def __init__(self, window):
+        self.window = window
+        self.alpha = 2 / (window + 1)
+        self._seed = SMA(window)
+        self.value = None
+
+    def update(self, value):
+        if self.value is None:
+            self._seed.update(value)
+            self.value = self._seed.value
+        else:
+            self.value += self.alpha * (value - self.value)
+
+    def preview(self, value):
+        if self.value is None:
+            return self._seed.preview(value)
+        return self.value + self.alpha * (value - self.value)
+
+
+class RSI:
+    """상대강도지수 (Wilder 평활)"""
+
+    def __init__(self, window=14):
+        self.window = window
+        self._prev = None
+        self._count = 0
+        self._gain = 0.0
+        self._loss = 0.0
+
+    def _next(self, value):
+        """value를 반영한 (평균 상승폭, 평균 하락폭, 개수)"""
+        change = value - self._prev
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        count = self._count + 1
+        if count <= self.window:
+            # 처음 window개는 단순 평균
+            return self._gain + (gain - self._gain) / count, self._loss + (loss - self._loss) / count, count
+        n = self.window
+        return (self._gain * (n - 1) + gain) / n, (self._loss * (n - 1) + loss) / n, count
+
+    @staticmethod
+    def _rsi(gain, loss):
+        if loss == 0:
+            return 100.0 if gain > 0 else 50.0
+        return 100 - 100 / (1 + gain / loss)
+
+    def update(self, value):
+        if self._prev is not None:
+            self._gain, self._loss, self._count = self._next(value)
+        self._prev = value
+
+    @property
+    def value(self):
+        return self._rsi(self._gain, self._loss) if self._count >= self.window else None
+
+    def preview(self, value):
+        if self._prev is None:
+            return None
+        gain, loss, count = self._next(value)
+        return self._rsi(gain, loss) if count >= self.window else None
+
+
+class ATR:
+    """평균 실제 범위 (Wilder 평활)"""
+
+    def __init__(self, window=14):
+        self.window = window
+        self._prev_close = None
+        self._count = 0
+        self.value = None
+
+    def _true_range(self, high, low):
+        if self._prev_close is None:
+            return high - low
+        return max(high, self._prev_close) - min(low, self._prev_close)
+
+    def _next(self, high, low):
+        tr = self._true_range(high, low)
+        count = self._count + 1
+        if self.value is None or count <= self.window:
+            current = self.value or 0.0
+            return current + (tr - current) / count, count
+        return (self.value * (self.window - 1) + tr) / self.window, count
+
+    def update(self, high, low, close):
+        value, self._count = self._next(high, low)
+        self.value = value
+        self._prev_close = close
+
+    @property
+    def ready(self):
+        return self._count >= self.window
+
+    def preview(self, high, low):
+        value, count = self._next(high, low)
+        return value if count >= self.window else None
+
+
+class RollingStats:
+    """이동 평균/표준편차 (합계와 제곱합을 유지하여 갱신 O(1))"""
+
+    def __init__(self, window):
+        self.window = window
+        self._values = deque(maxlen=window)
+        self._sum = 0.0
+        self._sumsq = 0.0
+
+    def update(self, value):
+        if len(self._values) == self.window:
+            old = self._values[0]
+            self._sum -= old
+            self._sumsq -= old * old
+        self._values.append(value)
+        self._sum += value
+        self._sumsq += value * value
+
+    def _stats(self, total, sumsq, n):
+        mean = total / n
+        return mean, math.sqrt(max(sumsq / n - mean * mean, 0.0))
+
+    @property
+    def value(self):
+        """(평균, 표준편차) 또는 None"""
+        if len(self._values) < self.window:
+            return None
+        return self._stats(self._sum, self._sumsq, self.window)
+
+    def preview(self, value):
+        if len(self._values) < self.window - 1:
+            return None
+        total, sumsq = self._sum + value, self._sumsq + value * value
+        if len(self._values) == self.window:
+            old = self._values[0]
+            total, sumsq = total - old, sumsq - old * old
+        return self._stats(total, sumsq, self.window)
+
+
+class Bollinger:
+    """볼린저 밴드 (중심선 = window 이동평균, 폭 = 표준편차 x width)"""
+
+    def __init__(self, window=20, width=2.0):
+        self.width = width
+        self._stats = RollingStats(window)
+
+    def update(self, value):
+        self._stats.update(value)
+
+    def _bands(self, stats):
+        if stats is None:
+            return None
+        mean, std = stats
+        return {"upper": mean + std * self.width, "middle": mean, "lower": mean - std * self.width}
+
+    @property
+    def value(self):
+        return self._bands(self._stats.value)
+
+    def preview(self, value):
+        return self._bands(self._stats.preview(value))
+
+
+class Volatility:
+    """종가 로그 수익률의 이동 표준편차 (%)"""
+
+    def __init__(self, window=20):
+        self._prev = None
+        self._stats = RollingStats(window)
+
+    def update(self, value):
+        if self._prev and value > 0:
+            self._stats.update(math.log(value / self._prev))
+        self._prev = value
+
+    @property
+    def value(self):
+        stats = self._stats.value
+        return stats[1] * 100 if stats else None
+
+    def preview(self, value):
+        if not self._prev or value <= 0:
+            return self.value
+        stats = self._stats.preview(math.log(value / self._prev))
+        return stats[1] * 100 if stats else None
+
+
+class VWAP:
+    """거래량 가중 평균가 (캔들 구간마다 초기화)"""
+
+    def __init__(self):
+        self.value_sum = 0.0
+        self.volume_sum = 0.0
+
+    def reset(self, value_sum=0.0, volume_sum=0.0):
+        self.value_sum = value_sum
+        self.volume_sum = volume_sum
+
+    def add(self, price, volume):
+        self.value_sum += price * volume
+        self.volume_sum += volume
+
+    @property
+    def value(self):
+        return self.value_sum / self.volume_sum if self.volume_sum > 0 else None
+
+
+class MarketIndicators:
+    """
+    한 마켓의 지표 묶음
+
+    확정된 캔들은 update_candle()로 각 지표에 한 번씩 반영하고, 체결/현재가는
+    on_trade()로 진행 중인 캔들(시가/고가/저가/종가/거래량)만 고칩니다. 조회할 때는
+    진행 중인 캔들이 현재가로 끝난다고 보고 각 지표의 preview 값을 돌려주므로,
+    갱신과 조회 모두 캔들 수와 관계없이 O(1)입니다. 체결 시각이 다음 캔들 구간으로
+    넘어가면 진행 중인 캔들을 확정하고 새 캔들을 시작합니다.
+    """
+
+    def __init__(self, market, interval="day"):
+        self.market = market
+        self.interval = interval
+        self.period = INTERVALS[interval][1]
+        self._lock = threading.Lock()
+
+        self.sma = {window: SMA(window) for window in (5, 20, 60)}
+        self.ema = {window: EMA(window) for window in (12, 26)}
+        self.rsi = RSI(14)
+        self.atr = ATR(14)
+        self.bollinger = Bollinger(20, 2.0)
+        self.volatility = Volatility(20)
+        self.vwap = VWAP()
+
+        # 진행 중인 캔들 {"start", "open", "high", "low", "close", "volume"}
+        self.pending = None
+        # 직전 확정 캔들 (변동성 돌파 목표가 계산용)
+        self.last_closed = None
+        self.closed_count = 0
+        self.updated_at = 0.0
+
+    def _apply_closed(self, candle):
+        close = candle["close"]
+        for indicator in self.sma.values():
+            indicator.update(close)
+        for indicator in self.ema.values():
+            indicator.update(close)
+        self.rsi.update(close)
+        self.atr.update(candle["high"], candle["low"], close)
+        self.bollinger.update(close)
+        self.volatility.update(close)
+        self.last_closed = candle
+        self.closed_count += 1
+
+    def update_candle(self, start, open_, high, low, close, volume=0.0, value=0.0, closed=True):
+        """캔들 반영 (closed=False면 진행 중인 캔들로 설정)"""
+        candle = {"start": int(start), "open": open_, "high": high, "low": low, "close": close, "volume": volume}
+        with self._lock:
+            if self.pending is not None and self.pending["start"] < candle["start"]:
+                self._apply_closed(self.pending)
+                self.pending = None
+            if closed:
+                self._apply_closed(candle)
+            else:
+                self.pending = candle
+                self.vwap.reset(value, volume)
+            self.updated_at = time.time()
+
+    def on_trade(self, price, volume=0.0, ts=None):
+        """체결(또는 현재가) 반영"""
+        ts = ts or time.time()
+        start = candle_start(ts, self.interval)
+        with self._lock:
+            pending = self.pending
+            if pending is not None and start < pending["start"]:
+                return
+            if pending is None or start > pending["start"]:
+                if pending is not None:
+                    self._apply_closed(pending)
+                self.pending = {"start": start, "open": price, "high": price, "low": price, "close": price, "volume": 0.0}
+                self.vwap.reset()
+                pending = self.pending
+            pending["high"] = max(pending["high"], price)
+            pending["low"] = min(pending["low"], price)
+            pending["close"] = price
+            if volume:
+                pending["volume"] += volume
+                self.vwap.add(price, volume)
+            self.updated_at = time.time()
+
+    def snapshot(self, k=0.5):
+        """
+        현재 지표 값 (진행 중인 캔들 반영)
+
+        Returns:
+            dict: price, sma5/20/60, ema12/26, rsi14, atr14, bb_upper/middle/lower,
+            volatility20(%), vwap, vb_target(변동성 돌파 목표가), candles(확정 캔들 수), updated_at
+        """
+        with self._lock:
+            pending = self.pending
+            if pending is None:
+                price = self.last_closed["close"] if self.last_closed else None
+                values = {
+                    **{f"sma{w}": i.value for w, i in self.sma.items()},
+                    **{f"ema{w}": i.value for w, i in self.ema.items()},
+                    "rsi14": self.rsi.value,
+                    "atr14": self.atr.value if self.atr.ready else None,
+                    "volatility20": self.volatility.value,
+                }
+                bands = self.bollinger.value
+            else:
+                price = pending["close"]
+                values = {
+                    **{f"sma{w}": i.preview(price) for w, i in self.sma.items()},
+                    **{f"ema{w}": i.preview(price) for w, i in self.ema.items()},
+                    "rsi14": self.rsi.preview(price),
+                    "atr14": self.atr.preview(pending["high"], pending["low"]),
+                    "volatility20": self.volatility.preview(price),
+                }
+                bands = self.bollinger.preview(price)
+
+            vb_target = None
+            if pending is not None and self.last_closed is not None:
+                vb_target = pending["open"] + (self.last_closed["high"] - self.last_closed["low"]) * k
+
+            return {
+                "market": self.market,
+                "interval": self.interval,
+                "price": price,
+                **values,
+                "bb_upper": bands["upper"] if bands else None,
+                "bb_middle": bands["middle"] if bands else None,
+                "bb_lower": bands["lower"] if bands else None,
+                "vwap": self.vwap.value,
+                "vb_target": vb_target,
+                "candles": self.closed_count,
+                "updated_at": self.updated_at,
+            }
+
+
+class IndicatorRegistry:
+    """
+    마켓별 MarketIndicators 보관소
+
+    처음 조회하는 마켓은 캔들 저장소의 과거 캔들로 지표를 초기화하고, 시세 스트림에
+    구독을 추가합니다. 이후에는 스트림 리스너가 체결/ticker 메시지로 진행 중인 캔들을
+    갱신하므로 조회할 때 캔들을 다시 받아 계산하지 않습니다.
+    """
+
+    def __init__(self, interval="day", stream=None):
+        self.interval = interval
+        self.stream = stream or get_market_stream()
+        self._lock = threading.Lock()
+        self._markets = {}
+        self._attached = False
+
+    def _seed(self, market):
+        indicators = MarketIndicators(market, self.interval)
+        try:
+            df = get_candle_store().get_ohlcv(market, interval=self.interval, count=SEED_CANDLES)
+        except Exception as e:
+            print(f"지표 초기화용 캔들 조회 실패 ({market}): {e}")
+            df = None
+        if df is not None and not df.empty:
+            current = candle_start(time.time(), self.interval)
+            starts = df.index.values.astype("datetime64[s]").astype("int64") - 9 * 3600
+            has_value = "value" in df.columns
+            for start, row in zip(starts, df.itertuples(index=False)):
+                indicators.update_candle(
+                    start, row.open, row.high, row.low, row.close, row.volume,
+                    row.value if has_value else 0.0, closed=start < current
+                )
+        return indicators
+
+    def _attach(self):
+        if self._attached:
+            return
+        self._attached = True
+        self.stream.add_listener(self._on_message)
+
+    def _on_message(self, channel, market, data):
+        indicators = self._markets.get(market)
+        if indicators is None:
+            return
+        if channel == "trade":
+            ts = data.get("trade_timestamp")
+            indicators.on_trade(data["trade_price"], data.get("trade_volume", 0.0), ts / 1000 if ts else None)
+        elif channel == "ticker" and "trade" not in self.stream.channels:
+            # 체결 채널을 받지 않는 경우 현재가만 반영 (거래량 없음)
+            ts = data.get("trade_timestamp")
+            indicators.on_trade(data["trade_price"], 0.0, ts / 1000 if ts else None)
+
+    def get(self, market):
+        """마켓의 MarketIndicators (없으면 과거 캔들로 초기화하고 스트림 구독)"""
+        indicators = self._markets.get(market)
+        if indicators is not None:
+            return indicators
+        with self._lock:
+            indicators = self._markets.get(market)
+            if indicators is None:
+                indicators = self._seed(market)
+                self._markets[market] = indicators
+                self._attach()
+        self.stream.watch([market])
+        return indicators
+
+    def snapshots(self, markets, k=0.5):
+        """{market: 지표 dict}"""
+        items = {market: self.get(market) for market in markets}
+        # 스트림이 없으면 REST 현재가(한 번의 요청)로 진행 중인 캔들 갱신
+        if not self.stream.is_live():
+            for market, price in get_current_prices(list(items)).items():
+                if price and market in items:
+                    items[market].on_trade(price)
+        return {market: indicators.snapshot(k=k) for market, indicators in items.items()}
+
+    def snapshot(self, market, k=0.5):
+        """마켓의 현재 지표 값 dict"""
+        return self.snapshots([market], k=k)[market]
+
+    def markets(self):
+        return list(self._markets)
+
+
+# 프로세스 전역 일봉 지표 보관소
+_REGISTRY = IndicatorRegistry()
+
+
+def get_indicator_registry():
+    """공유 IndicatorRegistry 반환"""
+    return _REGISTRY
+
+
+def get_indicators(market, k=0.5):
+    """마켓의 현재 일봉 지표 값 dict"""
+    return _REGISTRY.snapshot(market, k=k)
+
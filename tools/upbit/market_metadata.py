@@ -0,0 +1,210 @@
+import json
+import os
+import threading
+import time
+
+from tools.upbit.upbit_http import get_transport
+
+# 마켓 정보 저장 위치 (UPBIT_MARKET_METADATA 환경변수로 변경 가능)
+METADATA_PATH = os.environ.get("UPBIT_MARKET_METADATA", os.path.join("data", "market_metadata.json"))
+# 이 시간이 지나면 백그라운드에서 다시 받아옴 (초)
+METADATA_TTL = 6 * 3600
+# 갱신 실패 후 다시 시도하기까지 기다리는 시간 (초)
+RETRY_AFTER = 60.0
+
+
+def _parse(item):
+    """/v1/market/all?isDetails=true 항목 -> 조회용 dict"""
+    event = item.get("market_event") or {}
+    caution = event.get("caution") or {}
+    flags = sorted(name for name, on in caution.items() if on)
+    market = item["market"]
+    return {
+        "market": market,
+        "quote": market.split("-")[0],
+        "currency": market.split("-")[-1],
+        "korean_name": item.get("korean_name", ""),
+        "english_name": item.get("english_name", ""),
+        # 투자유의 (구 응답의 market_warning 또는 새 응답의 market_event.warning)
+        "warning": item.get("market_warning") == "CAUTION" or bool(event.get("warning")),
+        # 주의 종목 사유 (가격 급등락, 거래량 급등, 입금량 급등 등)
+        "caution": flags,
+    }
+
+
+class MarketMetadata:
+    """
+    업비트 마켓 목록(이름, 투자유의/주의 정보) 색인
+
+    /v1/market/all 응답을 디스크에 저장해 두고 생성 시 읽어오므로, 평소에는 API를
+    호출하지 않고 마켓 코드 또는 통화 코드로 이름과 경고 여부를 dict에서 바로 찾습니다.
+    조회할 때 ttl이 지났으면 백그라운드 스레드 하나가 다시 받아오고, 그동안에는 기존
+    값을 계속 사용합니다. 서버가 ETag를 주면 조건부 요청으로 바뀐 경우에만 본문을 받습니다.
+    디스크에 저장된 값이 없을 때(첫 실행)만 조회가 끝날 때까지 기다립니다.
+    """
+
+    def __init__(self, path=METADATA_PATH, ttl=METADATA_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._raw = []
+        # market -> 항목, currency -> 원화 마켓 항목(없으면 첫 항목)
+        self._markets = {}
+        self._currencies = {}
+        self.fetched_at = 0.0
+        self.etag = None
+        self.last_attempt = 0.0
+        self.refresh_count = 0
+        self._load()
+
+    # ----- 저장/색인 -----
+
+    def _index(self, raw):
+        markets = {}
+        currencies = {}
+        for item in raw:
+            if not item.get("market"):
+                continue
+            entry = _parse(item)
+            markets[entry["market"]] = entry
+            if entry["quote"] == "KRW" or entry["currency"] not in currencies:
+                currencies[entry["currency"]] = entry
+        # 읽는 쪽은 락 없이 조회하므로 dict를 통째로 교체
+        self._raw = raw
+        self._markets = markets
+        self._currencies = currencies
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            self._index(saved.get("markets", []))
+            self.fetched_at = float(saved.get("fetched_at", 0))
+            self.etag = saved.get("etag")
+        except Exception as e:
+            print(f"마켓 정보 파일 읽기 실패: {e}")
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"fetched_at": self.fetched_at, "etag": self.etag, "markets": self._raw}, f, ensure_ascii=False)
+        os.replace(self.path + ".tmp", self.path)
+
+    # ----- 갱신 -----
+
+    def refresh(self):
+        """/v1/market/all 조회로 갱신 (성공 여부 반환)"""
+        self.last_attempt = time.time()
+        headers = {"If-None-Match": self.etag} if self.etag and self._raw else {}
+        try:
+            response = get_transport().get("/v1/market/all", params={"isDetails": "true"}, headers=headers)
+        except Exception as e:
+            print(f"마켓 정보 조회 중 오류: {e}")
+            return False
+
+        if response.status_code == 304:
+            self.fetched_at = time.time()
+        elif response.status_code == 200:
+            self._index(response.json())
+            self.etag = response.headers.get("ETag")
+            self.fetched_at = time.time()
+            self.refresh_count += 1
+        else:
+            print(f"마켓 정보 조회 실패 (HTTP {response.status_code}): {response.text}")
+            return False
+
+        try:
+            self._save()
+        except Exception as e:
+            print(f"마켓 정보 파일 저장 실패: {e}")
+        return True
+
+    def is_stale(self):
+        return time.time() - self.fetched_at >= self.ttl
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        finally:
+            self._refreshing = False
+
+    def ensure(self):
+        """값이 없으면 바로 조회하고, 오래되었으면 백그라운드 갱신 시작"""
+        if not self._markets:
+            with self._lock:
+                if not self._markets and time.time() - self.last_attempt >= RETRY_AFTER:
+                    self.refresh()
+            return
+        if not self.is_stale() or time.time() - self.last_attempt < RETRY_AFTER:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+    # ----- 조회 -----
+
+    def get(self, ticker):
+        """
+        마켓 정보 dict (market, quote, currency, korean_name, english_name, warning, caution)
+
+        Args:
+            ticker (str): 마켓 코드("KRW-BTC") 또는 통화 코드("BTC")
+        """
+        if not ticker:
+            return None
+        self.ensure()
+        ticker = ticker.upper()
+        return self._markets.get(ticker) or self._currencies.get(ticker)
+
+    def korean_name(self, ticker, default=None):
+        entry = self.get(ticker)
+        if entry and entry["korean_name"]:
+            return entry["korean_name"]
+        return default if default is not None else ticker.split("-")[-1]
+
+    def english_name(self, ticker, default=None):
+        entry = self.get(ticker)
+        if entry and entry["english_name"]:
+            return entry["english_name"]
+        return default if default is not None else ticker.split("-")[-1]
+
+    def is_warning(self, ticker):
+        """투자유의 마켓인지"""
+        entry = self.get(ticker)
+        return bool(entry and entry["warning"])
+
+    def is_listed(self, market):
+        self.ensure()
+        return market in self._markets
+
+    def markets(self, quote="KRW"):
+        """마켓 정보 목록 (quote가 None이면 전체)"""
+        self.ensure()
+        return [entry for entry in self._markets.values() if quote is None or entry["quote"] == quote]
+
+    def raw(self):
+        """/v1/market/all 응답 형식의 목록 (Trade.get_market_all 호환)"""
+        self.ensure()
+        return list(self._raw)
+
+    def stats(self):
+        return {
+            "markets": len(self._markets),
+            "fetched_at": self.fetched_at,
+            "stale": self.is_stale(),
+            "refresh_count": self.refresh_count,
+        }
+
+
+# 프로세스 전역 마켓 정보 (import 시 디스크에서 읽음)
+_METADATA = MarketMetadata()
+
+
+def get_market_metadata():
+    """공유 MarketMetadata 반환"""
+    return _METADATA
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+from tools.upbit.market_metadata import get_market_metadata
+from tools.upbit.market_snapshot import get_ticker_snapshot
+
+# 유동성 필터: 24시간 거래대금 하한 (원)
+MIN_TRADE_VALUE = 1_000_000_000
+# 점수 가중치 (각 지표의 전체 마켓 내 백분위 순위에 곱함)
+DEFAULT_WEIGHTS = {
+    "volume": 0.4,       # 24시간 거래대금
+    "change": 0.2,       # 전일 대비 변동률
+    "volatility": 0.2,   # 당일 (고가 - 저가) / 전일 종가
+    "position": 0.2,     # 당일 고가/저가 범위 안의 현재가 위치
+}
+# 스캔 결과 컬럼
+SCAN_COLUMNS = ["market", "korean_name", "price", "change_rate", "value_24h", "volatility",
+                "range_position", "high_52w_gap", "warning", "score"]
+
+
+def _krw_markets():
+    """원화 마켓 목록 DataFrame (market, korean_name, english_name, warning)"""
+    entries = get_market_metadata().markets("KRW")
+    return pd.DataFrame({
+        "market": [entry["market"] for entry in entries],
+        "korean_name": [entry["korean_name"] for entry in entries],
+        "english_name": [entry["english_name"] for entry in entries],
+        "warning": [entry["warning"] for entry in entries],
+    }, columns=["market", "korean_name", "english_name", "warning"])
+
+
+def score_markets(snapshot, weights=None):
+    """
+    시세 스냅샷 표에 파생 지표와 점수 컬럼 추가 (전체 마켓 배열 연산)
+
+    Args:
+        snapshot (pd.DataFrame): get_ticker_snapshot 결과
+        weights (dict): DEFAULT_WEIGHTS와 같은 키의 가중치
+
+    Returns:
+        pd.DataFrame: price, change_rate, value_24h, volatility(%), range_position(0~1),
+        high_52w_gap(52주 최고가 대비 %), score(0~100) 컬럼
+    """
+    weights = weights or DEFAULT_WEIGHTS
+    price = snapshot["trade_price"].to_numpy(dtype="float64")
+    high = snapshot["high_price"].to_numpy(dtype="float64")
+    low = snapshot["low_price"].to_numpy(dtype="float64")
+    prev_close = snapshot["prev_closing_price"].to_numpy(dtype="float64")
+    high_52w = snapshot["highest_52_week_price"].to_numpy(dtype="float64")
+
+    span = high - low
+    with np.errstate(invalid="ignore", divide="ignore"):
+        volatility = np.where(prev_close > 0, span / prev_close * 100, np.nan)
+        # 고가/저가가 같으면(거래 없음) 가운데로 간주
+        position = np.where(span > 0, (price - low) / span, 0.5)
+        high_52w_gap = np.where(high_52w > 0, (price / high_52w - 1) * 100, np.nan)
+
+    df = pd.DataFrame({
+        "price": price,
+        "change_rate": snapshot["change_rate"].to_numpy(dtype="float64"),
+        "value_24h": snapshot["acc_trade_price_24h"].to_numpy(dtype="float64"),
+        "volatility": volatility,
+        "range_position": position,
+        "high_52w_gap": high_52w_gap,
+    }, index=snapshot.index)
+
+    ranks = {
+        "volume": df["value_24h"].rank(pct=True),
+        "change": df["change_rate"].rank(pct=True),
+        "volatility": df["volatility"].rank(pct=True),
+        "position": df["range_position"].rank(pct=True),
+    }
+    total = sum(weights.values()) or 1.0
+    score = sum(ranks[name].fillna(0.0) * weight for name, weight in weights.items() if name in ranks)
+    df["score"] = score / total * 100
+    return df
+
+
+def scan_markets(top=20, min_value=MIN_TRADE_VALUE, sort_by="score", weights=None, exclude_warning=True):
+    """
+    원화 마켓 전체 스캔
+
+    마켓 목록은 저장된 마켓 정보에서 읽고 시세는 한 번의 /v1/ticker 요청으로 받으며,
+    점수는 배열 연산으로 한 번에 계산합니다. 일회성 조회이므로 시세 스트림 구독은 늘리지 않습니다.
+
+    Args:
+        top (int): 반환할 개수 (None이면 전체)
+        min_value (float): 24시간 거래대금 하한 (원)
+        sort_by (str): 정렬 기준 컬럼 (score, change_rate, value_24h, volatility 등, 내림차순)
+        weights (dict): 점수 가중치
+        exclude_warning (bool): 투자유의 마켓 제외 여부
+
+    Returns:
+        pd.DataFrame: SCAN_COLUMNS 컬럼 표 (정렬 기준 내림차순)
+    """
+    markets = _krw_markets()
+    if markets.empty:
+        return pd.DataFrame(columns=SCAN_COLUMNS)
+
+    snapshot = get_ticker_snapshot(markets["market"].tolist(), watch=False)
+    snapshot = snapshot[snapshot["trade_price"] > 0]
+    if snapshot.empty:
+        return pd.DataFrame(columns=SCAN_COLUMNS)
+
+    scored = score_markets(snapshot, weights).reset_index()
+    df = scored.merge(markets[["market", "korean_name", "warning"]], on="market", how="left")
+    df["warning"] = df["warning"].fillna(False).astype(bool)
+
+    mask = df["value_24h"].to_numpy() >= min_value
+    if exclude_warning:
+        mask &= ~df["warning"].to_numpy()
+    df = df[mask]
+
+    if sort_by not in df.columns:
+        sort_by = "score"
+    df = df.sort_values(sort_by, ascending=False)[SCAN_COLUMNS]
+    if top:
+        df = df.head(top)
+    return df.reset_index(drop=True)
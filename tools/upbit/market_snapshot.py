@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+from tools.upbit.market_metadata import get_market_metadata
+from tools.upbit.market_stream import get_market_stream
+from tools.upbit.upbit_http import get_transport
+
+# /v1/ticker 응답 중 숫자형으로 사용하는 필드
+NUMERIC_FIELDS = [
+    "trade_price",            # 현재가
+    "prev_closing_price",     # 전일 종가 (UTC 0시 기준)
+    "opening_price",          # 당일 시가
+    "high_price",             # 당일 고가
+    "low_price",              # 당일 저가
+    "signed_change_price",    # 전일 대비 변화액
+    "signed_change_rate",     # 전일 대비 변화율 (소수)
+    "trade_volume",           # 최근 거래량
+    "acc_trade_volume",       # 당일 누적 거래량
+    "acc_trade_price",        # 당일 누적 거래대금
+    "acc_trade_volume_24h",   # 24시간 누적 거래량
+    "acc_trade_price_24h",    # 24시간 누적 거래대금
+    "highest_52_week_price",  # 52주 최고가
+    "lowest_52_week_price",   # 52주 최저가
+    "timestamp",              # 시세 타임스탬프 (ms)
+]
+
+SNAPSHOT_COLUMNS = NUMERIC_FIELDS + ["change_rate"]
+
+
+def _empty_snapshot():
+    df = pd.DataFrame({col: pd.Series(dtype="float64") for col in SNAPSHOT_COLUMNS})
+    df.index.name = "market"
+    return df
+
+
+def _request_tickers(markets):
+    response = get_transport().get("/v1/ticker", params={"markets": ",".join(markets)})
+    if response.status_code == 200:
+        return response.json()
+    if response.status_code == 404:
+        # 상장 폐지 등 존재하지 않는 마켓이 섞이면 전체 요청이 실패하므로 유효한 마켓만 다시 요청
+        listed = _listed_markets()
+        valid = [m for m in markets if m in listed]
+        if valid and len(valid) < len(markets):
+            retry = get_transport().get("/v1/ticker", params={"markets": ",".join(valid)})
+            if retry.status_code == 200:
+                return retry.json()
+    print(f"시세 스냅샷 조회 실패 (HTTP {response.status_code}): {response.text}")
+    return []
+
+
+def _listed_markets():
+    metadata = get_market_metadata()
+    # 404는 상장 폐지 직후일 수 있으므로 저장된 목록을 먼저 갱신
+    metadata.refresh()
+    return {entry["market"] for entry in metadata.markets(quote=None)}
+
+
+def get_ticker_snapshot(markets, watch=True):
+    """
+    여러 마켓의 현재 시세 조회
+
+    시세 스트림에 최신 ticker가 있는 마켓은 메모리에서 읽고, 나머지만 한 번의
+    /v1/ticker 요청으로 조회합니다. 조회한 마켓은 스트림 구독 목록에 추가됩니다.
+
+    Args:
+        markets (list): 마켓 코드 목록 (예: ["KRW-BTC", "KRW-ETH"]) 또는 단일 문자열
+        watch (bool): 조회한 마켓을 스트림 구독에 추가할지 (전체 마켓 스캔처럼 일회성 조회는 False)
+
+    Returns:
+        pd.DataFrame: market을 인덱스로 하고 NUMERIC_FIELDS(float64)와
+        change_rate(전일 대비 %)를 컬럼으로 가지는 표. 요청 순서를 유지하며,
+        조회되지 않은 마켓은 포함되지 않습니다.
+    """
+    if isinstance(markets, str):
+        markets = [markets]
+    markets = list(dict.fromkeys(m for m in markets if m))
+    if not markets:
+        return _empty_snapshot()
+
+    stream = get_market_stream()
+    if watch:
+        stream.watch(markets)
+
+    rows = []
+    missing = []
+    for market in markets:
+        ticker = stream.get_ticker(market)
+        if ticker is None:
+            missing.append(market)
+        else:
+            rows.append(dict(ticker, market=market))
+
+    if missing:
+        try:
+            rows.extend(_request_tickers(missing))
+        except Exception as e:
+            print(f"시세 스냅샷 조회 중 오류: {e}")
+    if not rows:
+        return _empty_snapshot()
+
+    raw = pd.DataFrame.from_records(rows)
+    df = pd.DataFrame(index=pd.Index(raw["market"].to_numpy(), name="market"))
+    for field in NUMERIC_FIELDS:
+        if field in raw.columns:
+            df[field] = pd.to_numeric(raw[field], errors="coerce").to_numpy(dtype="float64")
+        else:
+            df[field] = np.nan
+    df["change_rate"] = df["signed_change_rate"].to_numpy() * 100.0
+
+    # 요청 순서대로 정렬
+    order = [m for m in markets if m in df.index]
+    return df.loc[order]
+
+
+def get_current_prices(markets):
+    """여러 마켓의 현재가를 {market: price} dict로 반환 (스트림 우선, 부족분은 한 번의 요청)"""
+    if isinstance(markets, str):
+        markets = [markets]
+    stream = get_market_stream()
+    stream.watch(markets)
+    prices = stream.get_prices(markets)
+    missing = [m for m in markets if m not in prices]
+    if missing:
+        snapshot = get_ticker_snapshot(missing)
+        prices.update(zip(snapshot.index, snapshot["trade_price"].to_numpy()))
+    return {m: prices[m] for m in markets if m in prices}
+
+
+def get_current_price(market):
+    """단일 마켓 현재가 (조회 실패 시 None)"""
+    return get_current_prices([market]).get(market)
@@ -0,0 +1,273 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+try:
+    import websocket
+except ImportError:  # websocket-client 미설치 시 REST 조회만 사용
+    websocket = None
+
+DEFAULT_ENDPOINT = "wss://api.upbit.com/websocket/v1"
+# 구독 채널
+CHANNELS = ("ticker", "trade", "orderbook")
+# 스트림에서 아무 메시지도 받지 못한 채 이 시간이 지나면 캐시 값을 오래된 것으로 간주 (초)
+STALE_AFTER = 5.0
+# 재연결 대기 시간 (초, 실패할 때마다 두 배, 최대값까지)
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+# 업비트는 약 120초 동안 데이터가 없으면 연결을 끊으므로 주기적으로 ping 전송
+PING_INTERVAL = 60
+PING_TIMEOUT = 10
+
+
+class MarketDataService:
+    """
+    업비트 WebSocket 시세 스트림을 받아 마켓별 최신 값을 메모리에 유지하는 서비스
+
+    ticker/trade/orderbook 채널을 구독하고, 백그라운드 스레드 하나가 채널별 dict에
+    (수신 시각, 메시지) 튜플을 통째로 교체해 넣습니다. 쓰는 스레드가 하나뿐이고
+    dict 항목 교체는 원자적이므로 읽는 쪽은 락 없이 최신 값을 가져갈 수 있습니다.
+    스트림이 끊겼거나 조용하면 값은 오래된 것으로 취급되고, 호출자는 REST로 대체 조회합니다.
+
+    endpoint는 생성자 인자 또는 UPBIT_WS_ENDPOINT 환경변수로 바꿀 수 있어
+    로컬 WebSocket 서버로 동작을 재현할 수 있습니다.
+    """
+
+    def __init__(self, endpoint=None, channels=CHANNELS, stale_after=STALE_AFTER):
+        self.endpoint = endpoint or os.environ.get("UPBIT_WS_ENDPOINT", DEFAULT_ENDPOINT)
+        self.channels = tuple(channels)
+        self.stale_after = stale_after
+
+        # channel -> {market: (received_at, data)}
+        self._latest = {channel: {} for channel in self.channels}
+        self._markets = []
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._ws = None
+        self._thread = None
+        self._running = False
+
+        self.connected = False
+        self.connected_at = 0.0
+        self.last_message_at = 0.0
+        self.messages = 0
+        self.reconnects = 0
+
+    # ----- 수명 주기 -----
+
+    def start(self):
+        """백그라운드 수신 스레드 시작 (이미 실행 중이면 무시)"""
+        if websocket is None:
+            return False
+        with self._lock:
+            if self._running:
+                return True
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="upbit-market-stream", daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self):
+        """수신 중지 및 연결 종료"""
+        with self._lock:
+            self._running = False
+            ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    @property
+    def running(self):
+        return self._running
+
+    def _run(self):
+        delay = RECONNECT_DELAY
+        while self._running:
+            app = websocket.WebSocketApp(
+                self.endpoint,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_error=self._on_error,
+                on_close=self._on_close,
+            )
+            self._ws = app
+            opened_before = self.connected_at
+            try:
+                app.run_forever(ping_interval=PING_INTERVAL, ping_timeout=PING_TIMEOUT)
+            except Exception as e:
+                print(f"시세 스트림 오류: {e}")
+            self._ws = None
+            self.connected = False
+
+            if not self._running:
+                break
+            # 연결에 성공했다가 끊긴 경우 대기 시간 초기화
+            if self.connected_at != opened_before:
+                delay = RECONNECT_DELAY
+            self.reconnects += 1
+            time.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    # ----- 구독 -----
+
+    def watch(self, markets):
+        """마켓을 구독 목록에 추가 (새 마켓이 있으면 구독 요청을 다시 보냄)"""
+        if isinstance(markets, str):
+            markets = [markets]
+        with self._lock:
+            new = [m for m in dict.fromkeys(markets) if m and m not in self._markets]
+            if new:
+                self._markets = self._markets + new
+        if not self._running:
+            self.start()
+        elif new and self.connected:
+            self._subscribe(self._ws)
+        return new
+
+    @property
+    def markets(self):
+        return list(self._markets)
+
+    def _subscribe(self, ws):
+        if ws is None or not self._markets:
+            return
+        # 업비트는 같은 연결에서 마지막 구독 요청을 기준으로 동작하므로 전체 목록을 보냄
+        request = [{"ticket": str(uuid.uuid4())}]
+        for channel in self.channels:
+            request.append({"type": channel, "codes": list(self._markets)})
+        request.append({"format": "DEFAULT"})
+        try:
+            ws.send(json.dumps(request))
+        except Exception as e:
+            print(f"시세 스트림 구독 요청 실패: {e}")
+
+    # ----- 리스너 -----
+
+    def add_listener(self, callback):
+        """메시지 수신 시 callback(channel, market, data) 호출 (수신 스레드에서 실행됨)"""
+        with self._lock:
+            if callback not in self._listeners:
+                self._listeners = self._listeners + [callback]
+
+    def remove_listener(self, callback):
+        with self._lock:
+            self._listeners = [cb for cb in self._listeners if cb is not callback]
+
+    # ----- WebSocket 콜백 -----
+
+    def _on_open(self, ws):
+        self.connected = True
+        self.connected_at = time.time()
+        self.last_message_at = self.connected_at
+        self._subscribe(ws)
+
+    def _on_message(self, ws, message):
+        if isinstance(message, bytes):
+            message = message.decode("utf-8")
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return
+
+        channel = data.get("type")
+        market = data.get("code")
+        received_at = time.time()
+        self.last_message_at = received_at
+        self.messages += 1
+        if channel not in self._latest or not market:
+            return
+
+        self._latest[channel][market] = (received_at, data)
+        for callback in self._listeners:
+            try:
+                callback(channel, market, data)
+            except Exception as e:
+                print(f"시세 스트림 리스너 오류: {e}")
+
+    def _on_error(self, ws, error):
+        print(f"시세 스트림 오류: {error}")
+
+    def _on_close(self, ws, status_code=None, message=None):
+        self.connected = False
+
+    # ----- 조회 -----
+
+    def is_live(self):
+        """연결되어 있고 최근에 메시지를 받았는지"""
+        return self.connected and (time.time() - self.last_message_at) < self.stale_after
+
+    def _get(self, channel, market, max_age=None):
+        entry = self._latest.get(channel, {}).get(market)
+        if entry is None:
+            return None
+        received_at, data = entry
+        if max_age is not None:
+            return data if time.time() - received_at <= max_age else None
+        # 현재 연결에서 받은 값이고 스트림이 살아 있으면 최신 값으로 간주
+        # (거래가 뜸한 마켓은 메시지가 드물어도 가격이 그대로인 것)
+        if received_at >= self.connected_at and self.is_live():
+            return data
+        return None
+
+    def get_ticker(self, market, max_age=None):
+        """최신 ticker 메시지 (오래되었으면 None)"""
+        return self._get("ticker", market, max_age)
+
+    def get_trade(self, market, max_age=None):
+        """최신 체결 메시지 (오래되었으면 None)"""
+        return self._get("trade", market, max_age)
+
+    def get_orderbook(self, market, max_age=None):
+        """최신 호가 메시지 (오래되었으면 None)"""
+        return self._get("orderbook", market, max_age)
+
+    def get_price(self, market, max_age=None):
+        """최신 현재가 (오래되었으면 None)"""
+        ticker = self.get_ticker(market, max_age)
+        if ticker is not None:
+            return ticker.get("trade_price")
+        trade = self.get_trade(market, max_age)
+        if trade is not None:
+            return trade.get("trade_price")
+        return None
+
+    def get_prices(self, markets, max_age=None):
+        """{market: price} 중 최신 값이 있는 마켓만 반환"""
+        prices = {}
+        for market in markets:
+            price = self.get_price(market, max_age)
+            if price is not None:
+                prices[market] = price
+        return prices
+
+    def stats(self):
+        return {
+            "endpoint": self.endpoint,
+            "running": self._running,
+            "connected": self.connected,
+            "live": self.is_live(),
+            "markets": len(self._markets),
+            "messages": self.messages,
+            "reconnects": self.reconnects,
+        }
+
+
+# 프로세스 전역 시세 스트림
+_SERVICE = MarketDataService()
+
+
+def get_market_stream():
+    """공유 MarketDataService 반환"""
+    return _SERVICE
+
+
+def watch(markets):
+    """공유 시세 스트림에 마켓 구독 추가"""
+    return _SERVICE.watch(markets)
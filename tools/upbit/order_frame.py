@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+# 거래 내역 화면에서 사용하는 컬럼 구성
+ORDER_COLUMNS = ["주문시간", "코인", "종류", "주문방식", "주문가격", "주문수량", "체결수량", "미체결수량", "주문총액", "상태", "주문번호"]
+TRANSACTION_COLUMNS = ["체결시간", "코인", "종류", "거래수량", "거래단가", "거래금액", "수수료", "주문시간", "주문번호"]
+
+SIDE_NAMES = {"bid": "매수", "ask": "매도"}
+# done/wait 외의 상태는 취소로 표시
+STATE_NAMES = {"done": "완료", "wait": "대기"}
+
+FLOAT_FIELDS = ["price", "avg_price", "volume", "executed_volume", "paid_fee"]
+TEXT_FIELDS = ["uuid", "market", "side", "state", "ord_type", "created_at"]
+
+
+def _empty_orders():
+    df = pd.DataFrame({
+        "uuid": pd.Series(dtype="object"),
+        "market": pd.Series(dtype="object"),
+        "coin": pd.Series(dtype="category"),
+        "side": pd.Series(dtype="category"),
+        "state": pd.Series(dtype="category"),
+        "ord_type": pd.Series(dtype="object"),
+        **{field: pd.Series(dtype="float64") for field in FLOAT_FIELDS},
+        "remaining_volume": pd.Series(dtype="float64"),
+        "created_at": pd.Series(dtype="datetime64[ns]"),
+    })
+    return df
+
+
+def normalize_orders(orders):
+    """
+    업비트 주문 응답 목록을 타입이 정해진 컬럼형 DataFrame으로 변환
+
+    Args:
+        orders (list): /v1/orders 응답 형식의 주문 dict 목록
+
+    Returns:
+        pd.DataFrame: uuid, market, coin/side/state(category), ord_type,
+        price/avg_price/volume/executed_volume/paid_fee/remaining_volume(float64),
+        created_at(KST datetime64) 컬럼. 오류 응답과 market/side/state가 없는 항목은
+        제외하고, uuid가 중복되면 처음 항목만 남깁니다.
+    """
+    records = [o for o in orders or [] if isinstance(o, dict) and "error" not in o]
+    if not records:
+        return _empty_orders()
+
+    raw = pd.DataFrame.from_records(records).reindex(columns=TEXT_FIELDS + FLOAT_FIELDS)
+    text = raw[["market", "side", "state"]].fillna("").astype(str)
+    raw = raw[(text != "").all(axis=1).to_numpy()]
+    raw = raw.drop_duplicates(subset="uuid", keep="first")
+    if raw.empty:
+        return _empty_orders()
+
+    df = pd.DataFrame(index=pd.RangeIndex(len(raw)))
+    df["uuid"] = raw["uuid"].fillna("").astype(str).to_numpy()
+    df["market"] = raw["market"].astype(str).to_numpy()
+    df["coin"] = pd.Categorical(df["market"].str.replace("KRW-", "", regex=False))
+    df["side"] = pd.Categorical(raw["side"].astype(str).to_numpy())
+    df["state"] = pd.Categorical(raw["state"].astype(str).to_numpy())
+    df["ord_type"] = raw["ord_type"].fillna("").astype(str).to_numpy()
+    for field in FLOAT_FIELDS:
+        df[field] = pd.to_numeric(raw[field], errors="coerce").fillna(0.0).to_numpy(dtype="float64")
+    df["remaining_volume"] = df["volume"].to_numpy() - df["executed_volume"].to_numpy()
+    created = pd.to_datetime(raw["created_at"], format="ISO8601", utc=True, errors="coerce")
+    df["created_at"] = created.dt.tz_convert("Asia/Seoul").dt.tz_localize(None).to_numpy()
+    return df
+
+
+def to_history_frames(df):
+    """
+    normalize_orders 결과로 주문 내역/체결 내역 표 생성
+
+    체결 내역은 체결수량이 있는 주문만 포함하며, 거래단가는 평균 체결가(avg_price)를
+    쓰되 없으면 주문가격으로 대신합니다. 두 표 모두 최신순으로 정렬됩니다.
+
+    Returns:
+        tuple: (orders_df, transactions_df)
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=ORDER_COLUMNS), pd.DataFrame(columns=TRANSACTION_COLUMNS)
+
+    side_names = df["side"].map(SIDE_NAMES)
+    state_names = df["state"].map(STATE_NAMES).astype("object").fillna("취소").astype("category")
+    price = df["price"].to_numpy()
+    volume = df["volume"].to_numpy()
+
+    orders_df = pd.DataFrame({
+        "주문시간": df["created_at"],
+        "코인": df["coin"],
+        "종류": side_names,
+        "주문방식": df["ord_type"],
+        "주문가격": price,
+        "주문수량": volume,
+        "체결수량": df["executed_volume"],
+        "미체결수량": df["remaining_volume"],
+        "주문총액": np.where(price > 0, price * volume, 0.0),
+        "상태": state_names,
+        "주문번호": df["uuid"],
+    }, columns=ORDER_COLUMNS).sort_values("주문시간", ascending=False).reset_index(drop=True)
+
+    avg_price = df["avg_price"].to_numpy()
+    trade_price = np.where(avg_price > 0, avg_price, price)
+    executed = df["executed_volume"].to_numpy()
+    mask = (executed > 0) & (trade_price > 0)
+
+    transactions_df = pd.DataFrame({
+        "체결시간": df["created_at"][mask],
+        "코인": df["coin"][mask],
+        "종류": side_names[mask],
+        "거래수량": executed[mask],
+        "거래단가": trade_price[mask],
+        "거래금액": trade_price[mask] * executed[mask],
+        "수수료": df["paid_fee"][mask],
+        "주문시간": df["created_at"][mask],
+        "주문번호": df["uuid"][mask],
+    }, columns=TRANSACTION_COLUMNS).sort_values("체결시간", ascending=False).reset_index(drop=True)
+
+    return orders_df, transactions_df
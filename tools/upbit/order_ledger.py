@@ -0,0 +1,296 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from tools.upbit.trade_pool import credential_fingerprint
+
+# 주문 원장 저장 위치 (UPBIT_LEDGER_DIR 환경변수로 변경 가능)
+LEDGER_DIR = os.environ.get("UPBIT_LEDGER_DIR", os.path.join("data", "orders"))
+# 주문 목록 API 페이지 크기
+PAGE_LIMIT = 100
+# 한 번의 동기화에서 상태별로 조회할 최대 페이지 수
+MAX_SYNC_PAGES = 50
+# 이 시간 안에 다시 호출된 동기화는 건너뜀 (초)
+SYNC_INTERVAL = 10.0
+# 더 이상 바뀌지 않는 주문 상태
+TERMINAL_STATES = ("done", "cancel")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    uuid TEXT PRIMARY KEY,
+    market TEXT NOT NULL,
+    side TEXT,
+    ord_type TEXT,
+    state TEXT NOT NULL,
+    price REAL,
+    avg_price REAL,
+    volume REAL,
+    remaining_volume REAL,
+    executed_volume REAL,
+    paid_fee REAL,
+    created_at TEXT,
+    created_ts REAL NOT NULL,
+    synced_at REAL NOT NULL,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_orders_market ON orders (market, created_ts);
+CREATE INDEX IF NOT EXISTS idx_orders_state ON orders (state, created_ts);
+CREATE INDEX IF NOT EXISTS idx_orders_created ON orders (created_ts);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _to_float(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _created_ts(created_at):
+    """"2024-01-01T12:00:00+09:00" -> epoch 초 (파싱 실패 시 0)"""
+    if not created_at:
+        return 0.0
+    try:
+        return datetime.fromisoformat(created_at).timestamp()
+    except ValueError:
+        return 0.0
+
+
+class OrderLedger:
+    """
+    계정별 주문 내역을 SQLite(WAL)에 누적 저장하는 원장
+
+    완료/취소된 주문은 더 이상 바뀌지 않으므로 한 번 저장하면 다시 조회하지 않습니다.
+    sync()는 상태별로 마지막으로 본 주문 시각보다 새로운 주문과 현재 미체결 주문만
+    가져오고, 원장에 대기 상태로 남아 있지만 미체결 목록에서 사라진 주문은 개별
+    조회로 최종 상태를 확인합니다. 화면과 에이전트 도구는 market/state/시각 인덱스로
+    원장을 조회하므로 내역이 늘어나도 API 사용량은 일정합니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self.last_sync = 0.0
+
+    # ----- 저장 -----
+
+    def upsert(self, orders):
+        """주문 dict 목록 저장 (같은 uuid는 최신 값으로 교체)"""
+        now = time.time()
+        rows = []
+        for order in orders:
+            if not isinstance(order, dict) or "uuid" not in order or "error" in order:
+                continue
+            rows.append((
+                order["uuid"],
+                order.get("market", ""),
+                order.get("side"),
+                order.get("ord_type"),
+                order.get("state", ""),
+                _to_float(order.get("price")),
+                _to_float(order.get("avg_price")),
+                _to_float(order.get("volume")),
+                _to_float(order.get("remaining_volume")),
+                _to_float(order.get("executed_volume")),
+                _to_float(order.get("paid_fee")),
+                order.get("created_at"),
+                _created_ts(order.get("created_at")),
+                now,
+                json.dumps(order, ensure_ascii=False),
+            ))
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO orders (uuid, market, side, ord_type, state, price, avg_price, volume,"
+                " remaining_volume, executed_volume, paid_fee, created_at, created_ts, synced_at, raw)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def _get_state(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def _set_state(self, key, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, str(value)))
+            self._conn.commit()
+
+    # ----- 동기화 -----
+
+    def _fetch_pages(self, trade, state, watermark=None, max_pages=MAX_SYNC_PAGES):
+        """
+        state 주문을 최신순으로 페이지 조회 (watermark 이전 주문에 닿으면 중단)
+
+        Returns:
+            tuple: (주문 목록, 완료 여부). watermark에 닿았거나 짧은 페이지로 끝났을 때만
+            완료이며, 오류나 max_pages 초과로 멈췄으면 사이의 주문이 빠졌을 수 있음
+        """
+        orders = []
+        for page in range(1, max_pages + 1):
+            page_orders = trade._get_orders_direct_api(state=state, page=page, limit=PAGE_LIMIT)
+            if not isinstance(page_orders, list):
+                print(f"{state} 주문 동기화 중단 (page={page}): {page_orders}")
+                return orders, False
+            orders.extend(page_orders)
+            if len(page_orders) < PAGE_LIMIT:
+                return orders, True
+            oldest = min(_created_ts(o.get("created_at")) for o in page_orders)
+            if watermark is not None and oldest <= watermark:
+                return orders, True
+        return orders, False
+
+    def sync(self, trade, force=False):
+        """
+        API와 원장 동기화
+
+        Returns:
+            int: 새로 저장/갱신한 주문 수 (동기화를 건너뛰었으면 0)
+        """
+        if not trade or not trade.is_valid:
+            return 0
+        if not force and time.time() - self.last_sync < SYNC_INTERVAL:
+            return 0
+
+        with self._sync_lock:
+            if not force and time.time() - self.last_sync < SYNC_INTERVAL:
+                return 0
+            updated = 0
+
+            watermarks = {state: float(self._get_state(f"watermark:{state}", 0) or 0) for state in TERMINAL_STATES}
+
+            # 1. 처음 동기화하는 상태와 미체결 주문은 상태 x 페이지 동시 조회
+            cold_states = [state for state in TERMINAL_STATES if not watermarks[state]]
+            batch, failed_pages = trade.get_order_history_concurrent(
+                states=cold_states + ["wait"], max_pages=MAX_SYNC_PAGES, limit=PAGE_LIMIT,
+                prefetch=2 if cold_states else 1, return_failed=True
+            )
+            # 페이지 조회에 실패한 상태는 이번 결과로 기준 시각을 정하지 않음 (다음 동기화에서 다시 처음부터)
+            complete = {state: state not in failed_pages for state in cold_states + ["wait"]}
+            fetched = {state: [o for o in batch if o.get("state") == state] for state in cold_states}
+            open_orders = [o for o in batch if o.get("state") not in cold_states]
+
+            # 2. 이미 동기화한 완료/취소 주문은 마지막으로 본 시각 이후만
+            for state in TERMINAL_STATES:
+                if state not in fetched:
+                    fetched[state], complete[state] = self._fetch_pages(trade, state, watermark=watermarks[state])
+
+            updated += self.upsert(batch)
+            for state in TERMINAL_STATES:
+                orders = fetched[state]
+                if state not in cold_states:
+                    updated += self.upsert(orders)
+                # 기준 시각까지 빠짐없이 받은 경우에만 기준 시각을 옮김 (아니면 다음 동기화에서 다시 조회)
+                if orders and complete[state]:
+                    newest = max(_created_ts(o.get("created_at")) for o in orders)
+                    if newest > watermarks[state]:
+                        self._set_state(f"watermark:{state}", newest)
+
+            # 3. 원장에는 대기 중이지만 미체결 목록에서 사라진 주문은 최종 상태 확인
+            #    (미체결 목록을 끝까지 받지 못했으면 사라졌다고 판단할 수 없으므로 건너뜀)
+            open_uuids = {o.get("uuid") for o in open_orders}
+            stale = []
+            if complete["wait"]:
+                with self._lock:
+                    stale = [row["uuid"] for row in self._conn.execute(
+                        "SELECT uuid FROM orders WHERE state = 'wait'"
+                    ) if row["uuid"] not in open_uuids]
+            for order_uuid in stale:
+                detail = trade.orders_status(order_uuid)
+                if detail and "uuid" in detail:
+                    updated += self.upsert([detail])
+
+            self.last_sync = time.time()
+            return updated
+
+    # ----- 조회 -----
+
+    def query(self, market=None, states=None, since=None, until=None, limit=None):
+        """
+        원장 조회 (최신순)
+
+        Args:
+            market (str): 마켓 코드 (예: "KRW-BTC")
+            states (list): 주문 상태 목록 (예: ["done", "cancel"])
+            since, until (float): 주문 생성 시각 범위 (epoch 초)
+            limit (int): 최대 개수
+
+        Returns:
+            list: 업비트 API 응답과 같은 형식의 주문 dict 목록
+        """
+        sql = "SELECT raw FROM orders"
+        clauses = []
+        params = []
+        if market:
+            clauses.append("market = ?")
+            params.append(market)
+        if states:
+            clauses.append(f"state IN ({','.join('?' * len(states))})")
+            params.extend(states)
+        if since is not None:
+            clauses.append("created_ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_ts < ?")
+            params.append(until)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_ts DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row["raw"]) for row in rows]
+
+    def get(self, order_uuid):
+        """uuid로 주문 조회 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute("SELECT raw FROM orders WHERE uuid = ?", (order_uuid,)).fetchone()
+        return json.loads(row["raw"]) if row else None
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# 계정 지문 -> OrderLedger
+_LEDGERS = {}
+_LEDGERS_LOCK = threading.Lock()
+
+
+def get_ledger(trade):
+    """Trade 인스턴스의 계정에 해당하는 공유 원장 반환 (키가 없으면 None)"""
+    if not trade or not trade.upbit:
+        return None
+    key = credential_fingerprint(trade.access_key, trade.secret_key)
+    with _LEDGERS_LOCK:
+        ledger = _LEDGERS.get(key)
+        if ledger is None:
+            ledger = OrderLedger(os.path.join(LEDGER_DIR, f"{key}.sqlite3"))
+            _LEDGERS[key] = ledger
+        return ledger
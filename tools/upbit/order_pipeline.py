@@ -0,0 +1,176 @@
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.upbit.trade_pool import credential_fingerprint
+
+# 동시에 처리할 주문 수 (주문 요청 한도는 전송 계층의 rate governor가 지킴)
+ORDER_WORKERS = 4
+# 도구가 주문 결과를 기다리는 최대 시간 (초)
+ORDER_TIMEOUT = 10.0
+# 같은 identifier로 다시 제출된 주문을 재시도로 보고 합치는 시간 (초)
+DEDUP_WINDOW = 30.0
+# 응답을 받지 못한 주문을 같은 identifier로 다시 보내는 횟수
+SUBMIT_RETRIES = 1
+
+
+def new_identifier(prefix="ai"):
+    """업비트 주문 identifier (계정 안에서 유일해야 함)"""
+    return f"{prefix}-{uuid.uuid4().hex}"
+
+
+def _deliver_late(future, callback):
+    """시간 초과 뒤에 끝난 주문의 응답 전달 (접수된 주문만)"""
+    if future.exception() is not None:
+        return
+    result = future.result()
+    if result and "uuid" in result:
+        try:
+            callback(result)
+        except Exception as e:
+            print(f"늦게 접수된 주문 처리 중 오류: {e}")
+
+
+class OrderPipeline:
+    """
+    비동기 주문 제출기 (계정별 전용 스레드 풀)
+
+    주문 요청은 전용 스레드 풀에서 실행하므로 에이전트의 이벤트 루프는 응답을 기다리는
+    동안 막히지 않고, 서로 다른 주문은 동시에 제출됩니다. 모든 주문에 identifier를
+    붙여, 응답을 받지 못했거나 오류가 온 주문은 같은 identifier로 조회해 실제 접수
+    여부를 확인한 뒤에만 다시 보냅니다.
+
+    같은 identifier의 주문이 처리 중이거나 DEDUP_WINDOW 안에 접수되었으면 새로 제출하지
+    않고 그 결과를 돌려줍니다 (결과에 "deduplicated": True 표시). 도구는 도구 호출 id로
+    identifier를 만들므로 같은 도구 호출의 재시도만 합쳐지고, 내용이 같더라도 따로 요청한
+    주문은 각각 제출됩니다. identifier를 주지 않으면 매번 새로 만듭니다.
+    """
+
+    def __init__(self, trade, max_workers=ORDER_WORKERS):
+        self.trade = trade
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upbit-order")
+        self._lock = threading.Lock()
+        # 주문 키 -> (Future, 제출 시각, identifier)
+        self._recent = {}
+        self.counters = {"submitted": 0, "deduplicated": 0, "recovered": 0, "failed": 0, "timeouts": 0}
+
+    def _place(self, market, side, ord_type, volume, price, identifier):
+        """주문 요청 (스레드 풀에서 실행)"""
+        last_error = None
+        for attempt in range(SUBMIT_RETRIES + 1):
+            try:
+                result = self.trade.place_order(market, side, ord_type, volume=volume, price=price,
+                                                identifier=identifier)
+            except Exception as e:
+                print(f"주문 요청 중 오류 ({identifier}, 시도 {attempt + 1}): {e}")
+                result = None
+                last_error = {"error": {"name": "request_failed", "message": str(e)}}
+
+            if result and "uuid" in result:
+                return result
+            # 응답이 없거나 오류면 먼저 접수된 주문이 있는지 확인 (중복 identifier 거절 포함)
+            existing = self.trade.get_order_by_identifier(identifier)
+            if existing and "uuid" in existing:
+                self.counters["recovered"] += 1
+                return existing
+            if result is not None:
+                # 업비트가 주문을 거절한 경우 (잔고 부족 등): 다시 보내지 않음
+                self.counters["failed"] += 1
+                return result
+        self.counters["failed"] += 1
+        return last_error
+
+    def submit(self, market, side, ord_type, volume=None, price=None, identifier=None):
+        """
+        주문 제출 (concurrent.futures.Future 반환, 결과는 주문 응답 dict 또는 {"error": ...})
+
+        Args:
+            market (str): 마켓 코드
+            side (str): "bid" 또는 "ask"
+            ord_type (str): "limit", "price"(시장가 매수), "market"(시장가 매도)
+            volume (float): 주문 수량
+            price (float): 지정가 또는 시장가 매수 금액
+            identifier (str): 주문 identifier (같은 identifier의 재제출은 합침, 없으면 새로 만듦)
+        """
+        return self._submit(market, side, ord_type, volume, price, identifier)[0]
+
+    def _submit(self, market, side, ord_type, volume, price, identifier):
+        """주문 제출 ((Future, 실제로 쓴 identifier, 기존 주문 재사용 여부) 반환)"""
+        now = time.time()
+        with self._lock:
+            for stale in [k for k, (_, at, _) in self._recent.items() if now - at > DEDUP_WINDOW]:
+                if self._recent[stale][0].done():
+                    del self._recent[stale]
+            recent = self._recent.get(identifier) if identifier else None
+            if recent is not None:
+                future = recent[0]
+                # 처리 중이거나 접수된 주문이면 그대로 재사용 (실패한 주문은 새로 제출)
+                if not future.done() or (future.exception() is None and "uuid" in (future.result() or {})):
+                    self.counters["deduplicated"] += 1
+                    return future, identifier, True
+            identifier = identifier or new_identifier()
+            future = self._executor.submit(self._place, market, side, ord_type, volume, price, identifier)
+            self._recent[identifier] = (future, now, identifier)
+            self.counters["submitted"] += 1
+        return future, identifier, False
+
+    async def submit_async(self, market, side, ord_type, volume=None, price=None, identifier=None,
+                           timeout=ORDER_TIMEOUT, on_late_result=None):
+        """
+        주문 제출 후 결과 대기 (이벤트 루프를 막지 않음)
+
+        timeout 안에 응답이 없으면 {"error": {"name": "timeout", "identifier": ...}}을 반환하며,
+        주문 요청은 취소하지 않고 스레드 풀에서 계속 진행됩니다 (같은 identifier로 다시 제출하면
+        그 결과를 받음). on_late_result를 주면 그 뒤에 접수된 주문 응답으로 호출합니다.
+        """
+        future, identifier, reused = self._submit(market, side, ord_type, volume, price, identifier)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+            if reused and result and "uuid" in result:
+                result = dict(result, deduplicated=True)
+            return result
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            if on_late_result is not None:
+                future.add_done_callback(lambda f: _deliver_late(f, on_late_result))
+            return {"error": {"name": "timeout", "identifier": identifier,
+                              "message": f"{timeout}초 안에 주문 응답을 받지 못했습니다. 주문은 계속 처리 중입니다."}}
+
+    async def submit_many(self, orders, timeout=ORDER_TIMEOUT):
+        """
+        여러 주문을 동시에 제출하고 모두 기다림
+
+        Args:
+            orders (list): submit 인자 dict 목록 (market, side, ord_type, volume, price, identifier)
+
+        Returns:
+            list: 주문 순서대로의 결과
+        """
+        return await asyncio.gather(*(self.submit_async(timeout=timeout, **order) for order in orders))
+
+    def stats(self):
+        with self._lock:
+            in_flight = sum(1 for future, _, _ in self._recent.values() if not future.done())
+        return dict(self.counters, in_flight=in_flight)
+
+
+# 계정 지문 -> OrderPipeline
+_PIPELINES = {}
+_PIPELINES_LOCK = threading.Lock()
+
+
+def get_order_pipeline(trade):
+    """Trade 인스턴스의 계정에 해당하는 공유 주문 제출기 반환 (키가 없으면 None)"""
+    if not trade or not trade.upbit:
+        return None
+    key = credential_fingerprint(trade.access_key, trade.secret_key)
+    with _PIPELINES_LOCK:
+        pipeline = _PIPELINES.get(key)
+        if pipeline is None:
+            pipeline = OrderPipeline(trade)
+            _PIPELINES[key] = pipeline
+        # 키 재검증 등으로 인스턴스가 바뀌었으면 새 인스턴스 사용
+        pipeline.trade = trade
+        return pipeline
@@ -0,0 +1,281 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from tools.upbit.order_ledger import TERMINAL_STATES, get_ledger
+from tools.upbit.trade_pool import credential_fingerprint
+
+# /v1/orders/uuids 한 번에 조회할 수 있는 주문 수
+BATCH_SIZE = 100
+# 주문 직후 조회 간격 (초)
+FAST_INTERVAL = 1.0
+# 변화가 없을 때마다 조회 간격에 곱하는 값
+BACKOFF = 1.5
+# 오래된 주문의 최대 조회 간격 (초)
+MAX_INTERVAL = 30.0
+# 보관할 최근 상태 변화 수 (화면 표시용)
+MAX_EVENTS = 200
+# 일괄 조회 응답에 연속으로 빠지면 개별 조회로 확인 후 추적에서 빼는 횟수
+MAX_MISSES = 5
+
+
+def _changed(previous, order):
+    """상태 또는 체결 수량이 바뀌었는지"""
+    if previous is None:
+        return True
+    return (previous.get("state") != order.get("state")
+            or previous.get("executed_volume") != order.get("executed_volume"))
+
+
+class OrderWatcher:
+    """
+    미체결 주문 추적기 (계정별 백그라운드 스레드 1개)
+
+    추적 중인 주문 uuid를 /v1/orders/uuids 한 번의 요청으로 최대 100개씩 조회합니다.
+    주문마다 다음 조회 시각을 두고, 접수 직후에는 FAST_INTERVAL로 자주 보다가 변화가
+    없을 때마다 간격을 BACKOFF배씩 늘립니다(최대 MAX_INTERVAL). 조회할 때가 된 주문이
+    있으면 묶음의 남는 자리는 다음 차례 주문으로 채우므로, 추적 주문 수가 늘어도 요청
+    수는 거의 일정합니다.
+
+    상태/체결 수량이 바뀌면 주문 원장에 기록하고 계좌 스냅샷을 무효화한 뒤 등록된
+    리스너에 (주문, 이전 주문)을 알립니다. 완료/취소된 주문은 추적에서 뺍니다.
+    일괄 조회 응답에 MAX_MISSES번 연속으로 빠진 주문은 개별 조회로 한 번 확인하고,
+    업비트가 없는 주문이라고 답하면 추적에서 뺍니다.
+    """
+
+    def __init__(self, trade):
+        self.trade = trade
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        # uuid -> {"order", "interval", "next_poll", "added_at", "misses"}
+        self._tracked = {}
+        self._listeners = []
+        self.events = deque(maxlen=MAX_EVENTS)
+        self._thread = None
+        self.counters = {"polls": 0, "requests": 0, "changes": 0, "errors": 0}
+
+    # ----- 등록 -----
+
+    def watch(self, order):
+        """
+        주문 추적 시작
+
+        Args:
+            order (dict | str): 주문 응답 dict 또는 주문 uuid
+        """
+        if isinstance(order, str):
+            order = {"uuid": order}
+        if not order or not order.get("uuid"):
+            return False
+        now = time.time()
+        with self._lock:
+            if order["uuid"] not in self._tracked:
+                self._tracked[order["uuid"]] = {
+                    "order": order if order.get("state") else None,
+                    "interval": FAST_INTERVAL,
+                    "next_poll": now + FAST_INTERVAL,
+                    "added_at": now,
+                    "misses": 0,
+                }
+        self._ensure_thread()
+        self._wakeup.set()
+        return True
+
+    def unwatch(self, order_uuid):
+        with self._lock:
+            return self._tracked.pop(order_uuid, None) is not None
+
+    def add_listener(self, listener):
+        """상태 변화 리스너 등록 (listener(order, previous))"""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    # ----- 조회 -----
+
+    def _due_batches(self, now):
+        """조회할 때가 된 주문이 들어간 묶음 목록 (남는 자리는 다음 차례 주문으로 채움)"""
+        with self._lock:
+            ordered = sorted(self._tracked.items(), key=lambda item: item[1]["next_poll"])
+        due = sum(1 for _, entry in ordered if entry["next_poll"] <= now)
+        if not due:
+            return []
+        count = min(len(ordered), -(-due // BATCH_SIZE) * BATCH_SIZE)
+        uuids = [order_uuid for order_uuid, _ in ordered[:count]]
+        return [uuids[i:i + BATCH_SIZE] for i in range(0, len(uuids), BATCH_SIZE)]
+
+    def poll_once(self, now=None):
+        """조회할 때가 된 주문을 묶음으로 조회 (보낸 요청 수 반환)"""
+        now = now or time.time()
+        batches = self._due_batches(now)
+        for batch in batches:
+            self.counters["requests"] += 1
+            try:
+                orders = self.trade.get_orders_by_uuids(batch)
+            except Exception as e:
+                print(f"주문 추적 조회 중 오류: {e}")
+                orders = None
+            if orders is None:
+                self.counters["errors"] += 1
+            self._apply(batch, orders, time.time())
+        if batches:
+            self.counters["polls"] += 1
+        return len(batches)
+
+    def _apply(self, batch, orders, now):
+        """조회 결과 반영 (orders가 None이면 요청 실패로 보고 빠진 횟수를 세지 않음)"""
+        received = {order["uuid"]: order for order in orders or [] if isinstance(order, dict) and "uuid" in order}
+        changes = []
+        missing = []
+        with self._lock:
+            for order_uuid in batch:
+                entry = self._tracked.get(order_uuid)
+                if entry is None:
+                    continue
+                order = received.get(order_uuid)
+                if order is not None:
+                    entry["misses"] = 0
+                elif orders is not None:
+                    entry["misses"] += 1
+                    if entry["misses"] >= MAX_MISSES:
+                        missing.append(order_uuid)
+                if order is not None and _changed(entry["order"], order):
+                    changes.append((order, entry["order"]))
+                    entry["order"] = order
+                    # 체결이 진행 중이면 다시 빠르게 조회
+                    entry["interval"] = FAST_INTERVAL
+                else:
+                    entry["interval"] = min(entry["interval"] * BACKOFF, MAX_INTERVAL)
+                entry["next_poll"] = now + entry["interval"]
+                if order is not None and order.get("state") in TERMINAL_STATES:
+                    del self._tracked[order_uuid]
+            listeners = list(self._listeners)
+
+        if missing:
+            self._confirm_missing(missing, now)
+        if not changes:
+            return
+        self.counters["changes"] += len(changes)
+        try:
+            ledger = get_ledger(self.trade)
+            if ledger:
+                ledger.upsert([order for order, _ in changes])
+        except Exception as e:
+            print(f"주문 원장 기록 실패: {e}")
+        self.trade.account.invalidate()
+
+        for order, previous in changes:
+            self.events.append({
+                "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "uuid": order["uuid"],
+                "market": order.get("market"),
+                "side": order.get("side"),
+                "state": order.get("state"),
+                "previous_state": previous.get("state") if previous else None,
+                "executed_volume": order.get("executed_volume"),
+                "remaining_volume": order.get("remaining_volume"),
+            })
+            for listener in listeners:
+                try:
+                    listener(order, previous)
+                except Exception as e:
+                    print(f"주문 상태 리스너 오류: {e}")
+
+    def _confirm_missing(self, missing, now):
+        """
+        일괄 조회에서 계속 빠지는 주문을 개별 조회로 확인
+
+        업비트가 주문이 없다고 답한 경우(order_not_found)에만 추적에서 빼고, 조회 자체가
+        실패하면 빠진 횟수를 초기화해 다음에 다시 확인합니다.
+        """
+        confirmed = []
+        for order_uuid in missing:
+            self.counters["requests"] += 1
+            order = self.trade.orders_status(order_uuid)
+            if isinstance(order, dict) and order.get("uuid") == order_uuid:
+                confirmed.append(order)
+                continue
+            error = order.get("error") if isinstance(order, dict) else None
+            with self._lock:
+                if isinstance(error, dict) and error.get("name") == "order_not_found":
+                    self._tracked.pop(order_uuid, None)
+                    print(f"주문 추적 중단: {order_uuid} (조회되지 않는 주문)")
+                elif order_uuid in self._tracked:
+                    self.counters["errors"] += 1
+                    self._tracked[order_uuid]["misses"] = 0
+        if confirmed:
+            self._apply([order["uuid"] for order in confirmed], confirmed, now)
+
+    # ----- 스레드 -----
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._tracked:
+                    # 추적할 주문이 없으면 종료 (다음 watch에서 다시 시작)
+                    self._thread = None
+                    return
+                next_poll = min(entry["next_poll"] for entry in self._tracked.values())
+            delay = next_poll - time.time()
+            if delay > 0:
+                self._wakeup.wait(delay)
+                self._wakeup.clear()
+                continue
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"주문 추적 중 오류: {e}")
+                time.sleep(FAST_INTERVAL)
+
+    # ----- 상태 -----
+
+    def open_orders(self):
+        """추적 중인 주문 목록 (아직 조회 전이면 uuid만 있음)"""
+        with self._lock:
+            return [entry["order"] or {"uuid": order_uuid} for order_uuid, entry in self._tracked.items()]
+
+    def recent_events(self, limit=20):
+        """최근 상태 변화 (최신순)"""
+        return list(self.events)[-limit:][::-1]
+
+    def stats(self):
+        with self._lock:
+            tracked = len(self._tracked)
+        return dict(self.counters, tracked=tracked)
+
+
+# 계정 지문 -> OrderWatcher
+_WATCHERS = {}
+_WATCHERS_LOCK = threading.Lock()
+
+
+def get_order_watcher(trade):
+    """Trade 인스턴스의 계정에 해당하는 공유 주문 추적기 반환 (키가 없으면 None)"""
+    if not trade or not trade.upbit:
+        return None
+    key = credential_fingerprint(trade.access_key, trade.secret_key)
+    with _WATCHERS_LOCK:
+        watcher = _WATCHERS.get(key)
+        if watcher is None:
+            watcher = OrderWatcher(trade)
+            _WATCHERS[key] = watcher
+        return watcher
+
+
+def watch_order(trade, order):
+    """주문 응답을 계정의 주문 추적기에 등록 (추적 불가하면 False)"""
+    watcher = get_order_watcher(trade)
+    return watcher.watch(order) if watcher else False
@@ -0,0 +1,254 @@
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from tools.upbit.backtest import (DEFAULT_SLIPPAGE, ENTRY_HOURS, UPBIT_FEE, load_arrays, load_intraday,
+                                  moving_average, simulate_vb, summarize, summarize_markets)
+
+# 탐색 결과 저장 위치 (UPBIT_STRATEGY_PARAMS 환경변수로 변경 가능, 자동 거래 설정 화면에서 읽음)
+RESULTS_PATH = os.environ.get("UPBIT_STRATEGY_PARAMS", os.path.join("data", "strategy_params.json"))
+# 작업 프로세스와 공유할 배열을 쓰는 위치
+SWEEP_DIR = os.path.join("data", "sweep")
+
+DEFAULT_K_VALUES = [round(k, 2) for k in np.arange(0.1, 1.01, 0.05)]
+DEFAULT_MA_WINDOWS = [0, 3, 5, 10, 20]
+DEFAULT_ENTRY_HOURS = [(9, 20), (9, 15), (9, 24), (12, 20)]
+# 값이 작을수록 좋은 지표
+LOWER_IS_BETTER = {"최대낙폭", "회전율"}
+# 순위 기준으로 쓸 수 있는 지표 (summarize / summarize_markets 결과 키)
+METRICS = {"총수익률", "연환산수익률", "최대낙폭", "승률", "거래수", "평균수익률", "샤프지수", "회전율", "투자비중"}
+MARKET_METRICS = {"총수익률", "최대낙폭", "승률", "거래수", "평균수익률"}
+# 결과 파일에 남길 상위 개수
+DEFAULT_TOP = 100
+
+_DAILY_FIELDS = ("open", "high", "low", "close")
+_INTRADAY_FIELDS = ("open", "high", "covered")
+
+
+def build_grid(k_values=None, ma_windows=None, entry_hours=None):
+    """
+    (k, 이동평균 기간, 매수 허용 시간) 조합 목록
+
+    이동평균과 매수 시간이 같은 조합끼리 모이도록 정렬하여, 작업 프로세스가
+    이동평균을 한 번만 계산하고 재사용할 수 있게 합니다.
+    """
+    k_values = DEFAULT_K_VALUES if k_values is None else k_values
+    ma_windows = DEFAULT_MA_WINDOWS if ma_windows is None else ma_windows
+    entry_hours = DEFAULT_ENTRY_HOURS if entry_hours is None else entry_hours
+    grid = [
+        {"k": float(k), "ma_window": int(ma or 0), "entry_hours": [int(hours[0]), int(hours[1])]}
+        for ma, hours, k in itertools.product(ma_windows, entry_hours, k_values)
+    ]
+    return grid
+
+
+def _share_arrays(data, intraday, directory):
+    """탐색에 쓰는 배열을 .npy로 써서 작업 프로세스가 메모리 맵으로 열 수 있게 함"""
+    paths = {}
+    for field in _DAILY_FIELDS:
+        paths[field] = os.path.join(directory, f"day_{field}.npy")
+        np.save(paths[field], np.ascontiguousarray(data[field]))
+    if intraday is not None:
+        for field in _INTRADAY_FIELDS:
+            paths[f"intraday_{field}"] = os.path.join(directory, f"hour_{field}.npy")
+            np.save(paths[f"intraday_{field}"], np.ascontiguousarray(intraday[field]))
+    return paths
+
+
+# 작업 프로세스 전역: 메모리 맵 배열과 이동평균 캐시
+_ARRAYS = {}
+_MA_CACHE = {}
+
+
+def _init_worker(paths):
+    """작업 프로세스 초기화 (배열은 복사하지 않고 메모리 맵으로 공유)"""
+    _ARRAYS.clear()
+    _MA_CACHE.clear()
+    for name, path in paths.items():
+        _ARRAYS[name] = np.load(path, mmap_mode="r")
+
+
+def _evaluate_chunk(combos, fee, slippage, listed_days, per_market):
+    """조합 묶음 평가 (작업 프로세스에서 실행)"""
+    data = {field: _ARRAYS[field] for field in _DAILY_FIELDS}
+    intraday = None
+    if "intraday_open" in _ARRAYS:
+        intraday = {field: _ARRAYS[f"intraday_{field}"] for field in _INTRADAY_FIELDS}
+
+    results = []
+    for combo in combos:
+        ma_window = combo["ma_window"]
+        ma = None
+        if ma_window:
+            ma = _MA_CACHE.get(ma_window)
+            if ma is None:
+                ma = moving_average(np.asarray(data["close"]), ma_window)
+                _MA_CACHE[ma_window] = ma
+
+        trade_return, entered, tradable = simulate_vb(
+            data, k=combo["k"], ma_window=ma_window, fee=fee, slippage=slippage,
+            entry_hours=combo["entry_hours"], intraday=intraday, ma=ma
+        )
+        if per_market:
+            _, stats = summarize_markets(trade_return, entered)
+            for i in range(trade_return.shape[0]):
+                results.append({**combo, "market_index": i, **{name: float(values[i]) for name, values in stats.items()}})
+        else:
+            results.append({**combo, **summarize(trade_return, entered, tradable, listed_days)})
+    return results
+
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def run_sweep(markets=None, k_values=None, ma_windows=None, entry_hours=None, metric="총수익률",
+              fee=UPBIT_FEE, slippage=DEFAULT_SLIPPAGE, start=None, end=None, use_intraday=False,
+              per_market=False, workers=None, chunk_size=None, top=DEFAULT_TOP, path=RESULTS_PATH, store=None):
+    """
+    변동성 돌파 전략 파라미터 탐색 (프로세스 풀 병렬 실행)
+
+    저장소의 캔들을 한 번 읽어 (마켓 x 일) 배열로 만든 뒤 .npy 파일로 써 두고, 작업
+    프로세스는 이를 메모리 맵으로 열어 복사 없이 공유합니다. 조합은 묶음 단위로 나눠
+    실행하며, 각 묶음 안에서는 같은 기간의 이동평균을 재사용합니다.
+
+    1시간봉은 차트를 본 마켓의 최근 구간만 저장되는 경우가 많아, use_intraday=True여도 탐색
+    기간 전체(마켓 x 일)의 1시간봉이 확보된 경우에만 사용합니다. 그렇지 않으면 일봉만으로
+    평가하고, 매수 허용 시간은 결과에 영향을 주지 않으므로 (9, 20) 하나로 줄입니다.
+    실제 1시간봉 확보 비율은 결과의 "intraday_coverage"(%)에 기록합니다.
+
+    Args:
+        markets (list): 마켓 코드 목록 (없으면 저장된 모든 마켓)
+        k_values, ma_windows, entry_hours (list): 탐색할 값 목록 (없으면 기본 격자)
+        metric (str): 순위 기준 지표 (총수익률, 연환산수익률, 샤프지수, 승률, 최대낙폭 등,
+                      per_market=True면 MARKET_METRICS 중 하나)
+        use_intraday (bool): 1시간봉이 탐색 기간 전체에 있을 때 매수 허용 시간까지 반영할지
+        per_market (bool): True면 조합 x 마켓별로 평가 (마켓 하나에 전액 투자 기준)
+        workers (int): 작업 프로세스 수 (없으면 CPU 수, 1이면 현재 프로세스에서 실행)
+        top (int): 결과 파일에 남길 상위 개수
+        path (str): 결과 저장 경로 (None이면 저장하지 않음)
+
+    Returns:
+        dict: {"created_at", "metric", "markets", "period", "fee", "slippage", "intraday",
+               "intraday_coverage", "combinations", "elapsed", "results": 순위순 결과 목록}
+              (저장된 캔들이 없으면 None)
+
+    Raises:
+        ValueError: 선택한 평가 방식에서 계산하지 않는 지표를 순위 기준으로 지정한 경우
+    """
+    available = MARKET_METRICS if per_market else METRICS
+    if metric not in available:
+        mode = "마켓별 평가" if per_market else "전체 평가"
+        raise ValueError(f"{mode}에서 사용할 수 없는 순위 기준입니다: {metric} "
+                         f"(가능한 지표: {', '.join(sorted(available))})")
+    started = time.time()
+    data = load_arrays(markets, interval="day", start=start, end=end, store=store)
+    if not data["markets"] or len(data["times"]) < 2:
+        print("파라미터 탐색: 저장된 일봉이 없습니다")
+        return None
+
+    intraday = load_intraday(data["markets"], data["times"], store=store) if use_intraday else None
+    coverage = intraday["coverage"] if intraday is not None else 0.0
+    if intraday is not None and coverage < 1.0:
+        # 일부 기간만 시간봉으로 평가하면 조합 간 비교가 왜곡되므로 일봉만 사용
+        print(f"파라미터 탐색: 1시간봉 확보 비율 {coverage * 100:.1f}%로 일봉만 사용합니다")
+        intraday = None
+    if intraday is None:
+        entry_hours = [ENTRY_HOURS]
+    grid = build_grid(k_values, ma_windows, entry_hours)
+    listed_days = int(np.isfinite(data["close"]).any(axis=0).sum())
+
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(grid)))
+    chunk_size = chunk_size or max(1, -(-len(grid) // (workers * 4)))
+    chunks = _chunks(grid, chunk_size)
+
+    os.makedirs(SWEEP_DIR, exist_ok=True)
+    directory = tempfile.mkdtemp(dir=SWEEP_DIR)
+    try:
+        paths = _share_arrays(data, intraday, directory)
+        if workers == 1:
+            _init_worker(paths)
+            outputs = [_evaluate_chunk(chunk, fee, slippage, listed_days, per_market) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(paths,)) as pool:
+                futures = [
+                    pool.submit(_evaluate_chunk, chunk, fee, slippage, listed_days, per_market)
+                    for chunk in chunks
+                ]
+                outputs = [future.result() for future in futures]
+    finally:
+        _ARRAYS.clear()
+        _MA_CACHE.clear()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    results = [row for output in outputs for row in output]
+    for row in results:
+        if "market_index" in row:
+            row["market"] = data["markets"][row.pop("market_index")]
+    reverse = metric not in LOWER_IS_BETTER
+    results.sort(key=lambda row: row[metric], reverse=reverse)
+
+    days = data["times"]
+    report = {
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "metric": metric,
+        "markets": data["markets"],
+        "period": [time.strftime("%Y-%m-%d", time.gmtime(int(days[0]))),
+                   time.strftime("%Y-%m-%d", time.gmtime(int(days[-1])))],
+        "fee": fee,
+        "slippage": slippage,
+        "intraday": intraday is not None,
+        "intraday_coverage": round(coverage * 100, 1),
+        "per_market": per_market,
+        "combinations": len(grid),
+        "workers": workers,
+        "elapsed": round(time.time() - started, 3),
+        "results": results[:top] if top else results,
+    }
+    if path:
+        save_results(report, path)
+    print(f"파라미터 탐색 완료: {len(grid)}개 조합, {len(data['markets'])}개 마켓, {report['elapsed']}초")
+    return report
+
+
+def save_results(report, path=RESULTS_PATH):
+    """탐색 결과를 JSON으로 저장"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def load_results(path=RESULTS_PATH):
+    """저장된 탐색 결과 읽기 (없거나 읽을 수 없으면 None)"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"탐색 결과 읽기 실패: {e}")
+        return None
+
+
+def best_params(path=RESULTS_PATH, market=None):
+    """
+    탐색 결과 1위 파라미터
+
+    Returns:
+        dict: {"k", "ma_window", "entry_hours"} (결과가 없으면 None)
+    """
+    report = load_results(path)
+    if not report:
+        return None
+    for row in report.get("results", []):
+        if market is None or row.get("market") in (None, market):
+            return {"k": row["k"], "ma_window": row["ma_window"], "entry_hours": row["entry_hours"]}
+    return None
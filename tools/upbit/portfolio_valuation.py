@@ -0,0 +1,145 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from tools.upbit.account_snapshot import AccountUnavailable
+from tools.upbit.trade_pool import credential_fingerprint
+
+# 평가 결과 재사용 시간 (초)
+VALUATION_TTL = 5.0
+# 보유 코인 표 컬럼 (포트폴리오 화면 형식)
+HOLDING_COLUMNS = ["코인", "수량", "평균매수가", "현재가", "평가금액", "투자금액", "평가손익", "수익률"]
+
+
+def _empty_holdings():
+    return pd.DataFrame(columns=HOLDING_COLUMNS)
+
+
+def _evaluate(trade):
+    accounts = trade.account.accounts()
+    krw = accounts.get("KRW", {}).get("balance", 0.0)
+
+    coins = [c for c, a in accounts.items() if c != "KRW" and a["balance"] > 0]
+    result = {
+        "summary": {
+            "총보유자산": krw,
+            "총투자금액": 0.0,
+            "총평가손익": 0.0,
+            "총수익률": 0.0,
+            "보유현금": krw,
+            "일평가수익률": 0.0,
+            "코인평가금액": 0.0,
+        },
+        "holdings": _empty_holdings(),
+        "prices": {},
+        "account_fetched_at": trade.account.fetched_at,
+        # 계좌 조회가 실패해 이전 계좌로 평가했는지 여부
+        "account_stale": trade.account.is_stale(),
+        "computed_at": time.time(),
+    }
+    if not coins:
+        return result
+
+    # 보유 마켓만 한 번에 시세 조회 (스트림 우선, 모의 거래소는 재생 시세)
+    markets = [f"KRW-{c}" for c in coins]
+    snapshot = trade.get_ticker_snapshot(markets).reindex(markets)
+    price = snapshot["trade_price"].to_numpy(dtype="float64")
+    prev_close = snapshot["prev_closing_price"].to_numpy(dtype="float64")
+    qty = np.array([accounts[c]["balance"] for c in coins], dtype="float64")
+    avg = np.array([accounts[c]["avg_buy_price"] for c in coins], dtype="float64")
+
+    # 시세가 없는 마켓(원화 마켓 미상장 등)은 제외
+    priced = np.isfinite(price) & (price > 0)
+    coins = np.array(coins, dtype=object)[priced]
+    price, prev_close, qty, avg = price[priced], prev_close[priced], qty[priced], avg[priced]
+
+    value = qty * price
+    invest = qty * avg
+    pnl = value - invest
+    rate = np.divide(price - avg, avg, out=np.zeros_like(price), where=avg > 0) * 100
+
+    total_value = float(value.sum())
+    total_invest = float(invest.sum())
+    # 전일 종가 기준 평가액 대비 일간 수익률 (현금 포함)
+    prev_close = np.where(np.isfinite(prev_close) & (prev_close > 0), prev_close, price)
+    today_total = total_value + krw
+    yesterday_total = float((qty * prev_close).sum()) + krw
+
+    result["summary"].update({
+        "총보유자산": today_total,
+        "총투자금액": total_invest,
+        "총평가손익": total_value - total_invest,
+        "총수익률": ((total_value - total_invest) / total_invest * 100) if total_invest > 0 else 0.0,
+        "일평가수익률": ((today_total - yesterday_total) / yesterday_total * 100) if yesterday_total > 0 else 0.0,
+        "코인평가금액": total_value,
+    })
+    result["holdings"] = pd.DataFrame({
+        "코인": coins,
+        "수량": qty,
+        "평균매수가": avg,
+        "현재가": price,
+        "평가금액": value,
+        "투자금액": invest,
+        "평가손익": pnl,
+        "수익률": rate,
+    }, columns=HOLDING_COLUMNS).sort_values("평가금액", ascending=False).reset_index(drop=True)
+    result["prices"] = dict(zip((f"KRW-{c}" for c in coins), price.tolist()))
+    return result
+
+
+# 계정 지문 -> 평가 결과 / 계산 락
+_CACHE = {}
+_LOCKS = {}
+_LOCK = threading.Lock()
+
+
+def value_portfolio(trade, max_age=VALUATION_TTL):
+    """
+    보유 자산 평가
+
+    계좌 스냅샷(한 번의 /v1/accounts)과 보유 마켓만의 시세 스냅샷으로 수량 x 현재가,
+    투자금액, 평가손익, 수익률을 배열 연산으로 계산합니다. 같은 계정의 결과는
+    max_age 동안 공유되며, 주문으로 계좌 스냅샷이 갱신되면 다시 계산합니다.
+
+    Returns:
+        dict: {
+            "summary": 포트폴리오 요약 dict (총보유자산, 총투자금액, 총평가손익, 총수익률,
+                       보유현금, 일평가수익률, 코인평가금액),
+            "holdings": 보유 코인 DataFrame (HOLDING_COLUMNS, 평가금액 내림차순),
+            "prices": {market: 현재가},
+            ...
+        }
+        API 키가 유효하지 않거나 계좌를 조회할 수 없으면 None
+    """
+    if not trade or not trade.is_valid or not trade.upbit:
+        return None
+
+    key = credential_fingerprint(trade.access_key, trade.secret_key)
+    with _LOCK:
+        lock = _LOCKS.setdefault(key, threading.Lock())
+
+    with lock:
+        # 계좌 스냅샷이 그대로(주문으로 무효화되거나 다시 조회되지 않음)이고 max_age 이내면 재사용
+        cached = _CACHE.get(key)
+        if (cached is not None
+                and cached["account_fetched_at"] == trade.account.fetched_at
+                and time.time() - cached["computed_at"] < max_age):
+            return cached
+        try:
+            result = _evaluate(trade)
+        except AccountUnavailable as e:
+            print(f"포트폴리오 평가 불가: {e}")
+            return None
+        _CACHE[key] = result
+        return result
+
+
+def invalidate(trade=None):
+    """평가 결과 캐시 삭제 (trade가 없으면 전체)"""
+    with _LOCK:
+        if trade is None:
+            _CACHE.clear()
+        else:
+            _CACHE.pop(credential_fingerprint(trade.access_key, trade.secret_key), None)
@@ -0,0 +1,802 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from tools.upbit.candle_resample import PERIODS, can_resample, resample_rows
+from tools.upbit.candle_store import get_candle_store, normalize_interval
+from tools.upbit.market_snapshot import SNAPSHOT_COLUMNS
+
+# 업비트 원화 마켓 수수료 (0.05%)
+SIM_FEE = 0.0005
+# 최소 주문 금액 (원)
+MIN_ORDER_KRW = 5000
+KST = timezone(timedelta(hours=9))
+KST_OFFSET = 9 * 3600
+COLUMNS = ["open", "high", "low", "close", "volume", "value"]
+
+
+def _error(name, message):
+    """업비트 오류 응답 형식"""
+    return {"error": {"name": name, "message": message}}
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, KST).isoformat(timespec="seconds")
+
+
+class _MarketState:
+    """시뮬레이터의 마켓별 상태 (호가창, 당일 시세, 재생용 캔들)"""
+
+    def __init__(self, market):
+        self.market = market
+        # 가격-시간 우선순위 대기 주문: 매수 (-가격, 순번, uuid), 매도 (가격, 순번, uuid)
+        self.bids = []
+        self.asks = []
+        self.price = None
+        self.day = None
+        self.day_open = self.day_high = self.day_low = None
+        self.prev_close = None
+        self.acc_volume = 0.0
+        self.acc_value = 0.0
+        self.updated_at = 0.0
+        # 재생 원본 캔들 (N, 7) 배열과 주기
+        self.rows = None
+        self.interval = None
+
+
+class SimulatedExchange:
+    """
+    프로세스 안에서 동작하는 업비트 모의 거래소
+
+    재생한 캔들(또는 직접 넣은 체결)로 시세를 움직이고, 지정가 주문은 가격-시간
+    우선순위 호가창에 대기시켰다가 체결가가 주문 가격을 지나면 체결합니다. 체결 시
+    수량은 그 체결의 거래량을 우선순위대로 나눠 가지므로 큰 주문은 부분 체결됩니다.
+    시장가 주문과 즉시 체결 가능한 지정가 주문은 현재가에 slippage를 더해 바로 체결합니다.
+    주문/계좌는 업비트 응답과 같은 dict 형식으로 보관하여 Trade 인터페이스를 그대로 흉내냅니다.
+
+    캔들 하나는 시가 -> (양봉이면 저가, 음봉이면 고가) -> 반대쪽 극값 -> 종가 순서의 체결
+    네 번으로 재생합니다.
+    """
+
+    def __init__(self, krw=10_000_000, fee=SIM_FEE, slippage=0.0005):
+        self.fee = fee
+        self.slippage = slippage
+        self._lock = threading.RLock()
+        self._seq = itertools.count()
+        self._markets = {}
+        # currency -> {"balance", "locked", "avg_buy_price"}
+        self._accounts = {"KRW": {"balance": float(krw), "locked": 0.0, "avg_buy_price": 0.0}}
+        self._orders = {}
+        # identifier -> uuid (같은 identifier의 재주문은 업비트처럼 거절)
+        self._identifiers = {}
+        # 재생 대기 체결 (ts, 순번, market, price, volume)
+        self._feed = []
+        self.now = None
+        self._replay_thread = None
+        self._replay_stop = threading.Event()
+        self.counters = {"orders": 0, "fills": 0, "cancels": 0, "rejects": 0, "prints": 0}
+
+    # ----- 시세 재생 -----
+
+    def _market(self, market):
+        state = self._markets.get(market)
+        if state is None:
+            state = _MarketState(market)
+            self._markets[market] = state
+        return state
+
+    def load_candles(self, market, rows, interval="minute1"):
+        """
+        재생할 캔들 등록
+
+        Args:
+            rows (np.ndarray): 시간순 (N, 7) 배열 [시작시각(epoch 초, UTC), 시가, 고가, 저가, 종가, 거래량, 거래대금]
+            interval (str): 캔들 주기 (get_ohlcv 집계 기준)
+        """
+        rows = np.asarray(rows, dtype="float64")
+        interval = normalize_interval(interval)
+        period = PERIODS[interval]
+        with self._lock:
+            state = self._market(market)
+            state.rows = rows
+            state.interval = interval
+            for row in rows:
+                start, o, h, l, c, volume = row[:6]
+                path = (o, l, h, c) if c >= o else (o, h, l, c)
+                for i, price in enumerate(path):
+                    heapq.heappush(self._feed, (start + period * i / 4, next(self._seq), market, price, volume / 4))
+        return len(rows)
+
+    def load_from_store(self, markets, interval="minute1", start=None, end=None, store=None):
+        """캔들 저장소에 기록된 캔들을 재생 데이터로 등록 (API 호출 없음)"""
+        store = store or get_candle_store()
+        loaded = 0
+        for market in markets:
+            rows = store.read_stored(market, interval, start, end)
+            if len(rows):
+                loaded += self.load_candles(market, rows, interval)
+        return loaded
+
+    def push_trade(self, market, price, volume=None, ts=None):
+        """체결 하나를 바로 반영 (volume이 None이면 대기 주문을 모두 체결할 수 있는 것으로 간주)"""
+        with self._lock:
+            self._apply_print(ts if ts is not None else (self.now or time.time()), market, float(price), volume)
+
+    def step(self, count=1):
+        """대기 중인 재생 체결을 count개 처리 (처리한 개수 반환)"""
+        done = 0
+        with self._lock:
+            while self._feed and done < count:
+                ts, _, market, price, volume = heapq.heappop(self._feed)
+                self._apply_print(ts, market, price, volume)
+                done += 1
+        return done
+
+    def run_until(self, ts):
+        """ts 이전의 재생 체결을 모두 처리"""
+        done = 0
+        with self._lock:
+            while self._feed and self._feed[0][0] <= ts:
+                done += self.step()
+            self.now = max(self.now or ts, ts)
+        return done
+
+    def remaining(self):
+        return len(self._feed)
+
+    def start_replay(self, speed=60.0, interval=0.05):
+        """
+        백그라운드 재생 시작
+
+        Args:
+            speed (float): 실제 1초에 진행할 모의 시간 (초)
+            interval (float): 재생 스레드 갱신 간격 (실제 초)
+        """
+        if self._replay_thread and self._replay_thread.is_alive():
+            return
+        self._replay_stop.clear()
+
+        def run():
+            with self._lock:
+                clock = self.now if self.now is not None else (self._feed[0][0] if self._feed else time.time())
+            last = time.time()
+            while not self._replay_stop.is_set() and self._feed:
+                self._replay_stop.wait(interval)
+                current = time.time()
+                clock += (current - last) * speed
+                last = current
+                self.run_until(clock)
+
+        self._replay_thread = threading.Thread(target=run, daemon=True)
+        self._replay_thread.start()
+
+    def stop_replay(self):
+        self._replay_stop.set()
+        if self._replay_thread:
+            self._replay_thread.join(timeout=5)
+        self._replay_thread = None
+
+    def _apply_print(self, ts, market, price, volume):
+        state = self._market(market)
+        self.now = ts if self.now is None else max(self.now, ts)
+        self.counters["prints"] += 1
+
+        # 업비트 일봉 기준(09:00 KST = 00:00 UTC)으로 당일 시세 갱신
+        day = int(ts // 86400)
+        if state.day != day:
+            if state.price is not None:
+                state.prev_close = state.price
+            state.day = day
+            state.day_open = state.day_high = state.day_low = price
+            state.acc_volume = state.acc_value = 0.0
+        state.day_high = max(state.day_high, price)
+        state.day_low = min(state.day_low, price)
+        if volume:
+            state.acc_volume += volume
+            state.acc_value += volume * price
+        state.price = price
+        state.updated_at = ts
+        if state.prev_close is None:
+            state.prev_close = price
+
+        self._match(state, price, volume)
+
+    # ----- 체결 엔진 -----
+
+    def _match(self, state, price, volume):
+        """체결가가 지나간 대기 주문을 가격-시간 우선순위로 체결"""
+        available = float("inf") if volume is None else volume
+        while state.bids and available > 0 and -state.bids[0][0] >= price:
+            available -= self._fill_resting(state.bids, available)
+        available = float("inf") if volume is None else volume
+        while state.asks and available > 0 and state.asks[0][0] <= price:
+            available -= self._fill_resting(state.asks, available)
+
+    def _fill_resting(self, book, available):
+        _, _, order_uuid = book[0]
+        order = self._orders[order_uuid]
+        if order["state"] != "wait":
+            heapq.heappop(book)
+            return 0.0
+        fill = min(float(order["remaining_volume"]), available)
+        self._fill(order, float(order["price"]), fill, maker=True)
+        if order["state"] != "wait":
+            heapq.heappop(book)
+        return fill
+
+    def _fill(self, order, price, volume, maker=False):
+        """주문 체결 반영 (잔고/평균 매수가/수수료)"""
+        if volume <= 0:
+            return
+        market = order["market"]
+        currency = market.split("-")[1]
+        coin = self._accounts.setdefault(currency, {"balance": 0.0, "locked": 0.0, "avg_buy_price": 0.0})
+        krw = self._accounts["KRW"]
+        funds = price * volume
+        fee = funds * self.fee
+
+        if order["side"] == "bid":
+            if order["ord_type"] == "limit":
+                # 지정가 매수는 주문 가격 기준으로 묶어둔 금액에서 차감
+                reserved = float(order["price"]) * volume * (1 + self.fee)
+                krw["locked"] -= reserved
+                krw["balance"] += reserved - funds - fee
+            else:
+                krw["balance"] -= funds + fee
+            total = coin["balance"] + coin["locked"]
+            coin["avg_buy_price"] = (coin["avg_buy_price"] * total + funds) / (total + volume)
+            coin["balance"] += volume
+        else:
+            if order["ord_type"] == "limit":
+                coin["locked"] -= volume
+            else:
+                coin["balance"] -= volume
+            krw["balance"] += funds - fee
+
+        executed = float(order["executed_volume"]) + volume
+        paid = float(order["paid_fee"]) + fee
+        order["executed_volume"] = str(executed)
+        order["paid_fee"] = str(paid)
+        order["executed_funds"] = str(float(order.get("executed_funds", 0)) + funds)
+        order["avg_price"] = str(float(order["executed_funds"]) / executed)
+        order["trades_count"] += 1
+        if order["volume"] is not None:
+            remaining = max(float(order["volume"]) - executed, 0.0)
+            order["remaining_volume"] = str(remaining)
+            if remaining <= 1e-12:
+                order["state"] = "done"
+        order["trades"].append({
+            "market": market, "price": str(price), "volume": str(volume), "funds": str(funds),
+            "side": order["side"], "created_at": _iso(self.now), "maker": maker,
+        })
+        self.counters["fills"] += 1
+
+    def _new_order(self, market, side, ord_type, price=None, volume=None, identifier=None):
+        ts = self.now if self.now is not None else time.time()
+        order = {
+            "uuid": str(uuid.uuid4()),
+            "side": side,
+            "ord_type": ord_type,
+            "price": None if price is None else str(price),
+            "state": "wait",
+            "market": market,
+            "created_at": _iso(ts),
+            "volume": None if volume is None else str(volume),
+            "remaining_volume": None if volume is None else str(volume),
+            "reserved_fee": "0",
+            "remaining_fee": "0",
+            "paid_fee": "0",
+            "locked": "0",
+            "executed_volume": "0",
+            "executed_funds": "0",
+            "avg_price": "0",
+            "trades_count": 0,
+            "trades": [],
+        }
+        if identifier:
+            order["identifier"] = identifier
+            self._identifiers[identifier] = order["uuid"]
+        self._orders[order["uuid"]] = order
+        self.counters["orders"] += 1
+        return order
+
+    def _public(self, order):
+        """체결 목록을 뺀 주문 응답 (주문 목록 API 형식)"""
+        return {key: value for key, value in order.items() if key != "trades"}
+
+    def _duplicate(self, identifier):
+        if identifier and identifier in self._identifiers:
+            return self._reject("duplicated_identifier", f"이미 사용한 identifier입니다: {identifier}")
+        return None
+
+    def _reject(self, name, message):
+        self.counters["rejects"] += 1
+        return _error(name, message)
+
+    # ----- 주문 -----
+
+    def buy_market(self, market, amount, identifier=None):
+        """시장가 매수 (amount: 원화 금액)"""
+        with self._lock:
+            duplicate = self._duplicate(identifier)
+            if duplicate:
+                return duplicate
+            state = self._markets.get(market)
+            if state is None or state.price is None:
+                return self._reject("market_does_not_exist", f"{market} 시세가 없습니다.")
+            if amount < MIN_ORDER_KRW:
+                return self._reject("under_min_total_bid", f"최소 주문 금액은 {MIN_ORDER_KRW}원입니다.")
+            if self._accounts["KRW"]["balance"] < amount * (1 + self.fee):
+                return self._reject("insufficient_funds_bid", "주문 가능 금액이 부족합니다.")
+            order = self._new_order(market, "bid", "price", price=amount, identifier=identifier)
+            fill_price = state.price * (1 + self.slippage)
+            self._fill(order, fill_price, amount / fill_price)
+            order["state"] = "done"
+            order["remaining_volume"] = "0"
+            return self._public(order)
+
+    def sell_market(self, market, volume, identifier=None):
+        """시장가 매도 (volume: 코인 수량)"""
+        with self._lock:
+            duplicate = self._duplicate(identifier)
+            if duplicate:
+                return duplicate
+            state = self._markets.get(market)
+            if state is None or state.price is None:
+                return self._reject("market_does_not_exist", f"{market} 시세가 없습니다.")
+            coin = self._accounts.get(market.split("-")[1])
+            if not coin or coin["balance"] < volume or volume <= 0:
+                return self._reject("insufficient_funds_ask", "매도 가능 수량이 부족합니다.")
+            fill_price = state.price * (1 - self.slippage)
+            if fill_price * volume < MIN_ORDER_KRW:
+                return self._reject("under_min_total_ask", f"최소 주문 금액은 {MIN_ORDER_KRW}원입니다.")
+            order = self._new_order(market, "ask", "market", volume=volume, identifier=identifier)
+            self._fill(order, fill_price, volume)
+            return self._public(order)
+
+    def limit(self, market, side, price, volume, identifier=None):
+        """지정가 주문 (즉시 체결 가능하면 현재가로 체결, 나머지는 호가창에 대기)"""
+        with self._lock:
+            duplicate = self._duplicate(identifier)
+            if duplicate:
+                return duplicate
+            state = self._market(market)
+            price, volume = float(price), float(volume)
+            if price * volume < MIN_ORDER_KRW:
+                return self._reject(f"under_min_total_{side}", f"최소 주문 금액은 {MIN_ORDER_KRW}원입니다.")
+
+            if side == "bid":
+                krw = self._accounts["KRW"]
+                reserved = price * volume * (1 + self.fee)
+                if krw["balance"] < reserved:
+                    return self._reject("insufficient_funds_bid", "주문 가능 금액이 부족합니다.")
+                krw["balance"] -= reserved
+                krw["locked"] += reserved
+            else:
+                coin = self._accounts.get(market.split("-")[1])
+                if not coin or coin["balance"] < volume:
+                    return self._reject("insufficient_funds_ask", "매도 가능 수량이 부족합니다.")
+                coin["balance"] -= volume
+                coin["locked"] += volume
+
+            order = self._new_order(market, side, "limit", price=price, volume=volume, identifier=identifier)
+            order["locked"] = str(price * volume * (1 + self.fee) if side == "bid" else volume)
+
+            # 현재가가 주문 가격을 이미 지났으면 테이커로 즉시 체결
+            if state.price is not None:
+                if side == "bid" and price >= state.price:
+                    self._fill(order, min(price, state.price * (1 + self.slippage)), volume)
+                elif side == "ask" and price <= state.price:
+                    self._fill(order, max(price, state.price * (1 - self.slippage)), volume)
+
+            if order["state"] == "wait":
+                seq = next(self._seq)
+                if side == "bid":
+                    heapq.heappush(state.bids, (-price, seq, order["uuid"]))
+                else:
+                    heapq.heappush(state.asks, (price, seq, order["uuid"]))
+            return self._public(order)
+
+    def cancel(self, order_uuid):
+        with self._lock:
+            order = self._orders.get(order_uuid)
+            if order is None:
+                return self._reject("order_not_found", "주문을 찾지 못했습니다.")
+            if order["state"] != "wait":
+                return self._reject("order_not_found", "이미 체결되었거나 취소된 주문입니다.")
+            remaining = float(order["remaining_volume"])
+            if order["side"] == "bid":
+                reserved = float(order["price"]) * remaining * (1 + self.fee)
+                krw = self._accounts["KRW"]
+                krw["locked"] -= reserved
+                krw["balance"] += reserved
+            else:
+                coin = self._accounts[order["market"].split("-")[1]]
+                coin["locked"] -= remaining
+                coin["balance"] += remaining
+            # 호가창에서는 다음 체결 때 상태를 보고 건너뜀
+            order["state"] = "cancel"
+            self.counters["cancels"] += 1
+            return self._public(order)
+
+    # ----- 조회 -----
+
+    def get_order(self, order_uuid=None, identifier=None):
+        """개별 주문 상세 (체결 목록 포함, 없으면 None)"""
+        with self._lock:
+            order = self._orders.get(order_uuid or self._identifiers.get(identifier))
+            return dict(order, trades=list(order["trades"])) if order else None
+
+    def orders(self, market=None, states=None, uuids=None, page=1, limit=100):
+        """주문 목록 (최신순)"""
+        with self._lock:
+            orders = [
+                order for order in self._orders.values()
+                if (not market or order["market"] == market)
+                and (not states or order["state"] in states)
+                and (not uuids or order["uuid"] in uuids)
+            ]
+            orders.sort(key=lambda o: o["created_at"], reverse=True)
+            start = (max(page, 1) - 1) * limit
+            return [self._public(order) for order in orders[start:start + limit]]
+
+    def balances(self):
+        """pyupbit get_balances()와 같은 형식의 잔고 목록"""
+        with self._lock:
+            return [
+                {
+                    "currency": currency,
+                    "balance": str(account["balance"]),
+                    "locked": str(account["locked"]),
+                    "avg_buy_price": str(account["avg_buy_price"]),
+                    "avg_buy_price_modified": False,
+                    "unit_currency": "KRW",
+                }
+                for currency, account in self._accounts.items()
+                if currency == "KRW" or account["balance"] > 0 or account["locked"] > 0
+            ]
+
+    def price(self, market):
+        state = self._markets.get(market)
+        return state.price if state else None
+
+    def ticker_snapshot(self, markets):
+        """market_snapshot.get_ticker_snapshot과 같은 형식의 시세 표"""
+        rows = []
+        index = []
+        with self._lock:
+            for market in markets:
+                state = self._markets.get(market)
+                if state is None or state.price is None:
+                    continue
+                change = state.price - state.prev_close
+                rate = change / state.prev_close if state.prev_close else 0.0
+                row = {column: np.nan for column in SNAPSHOT_COLUMNS}
+                row.update({
+                    "trade_price": state.price,
+                    "prev_closing_price": state.prev_close,
+                    "opening_price": state.day_open,
+                    "high_price": state.day_high,
+                    "low_price": state.day_low,
+                    "signed_change_price": change,
+                    "signed_change_rate": rate,
+                    "acc_trade_volume": state.acc_volume,
+                    "acc_trade_price": state.acc_value,
+                    "acc_trade_volume_24h": state.acc_volume,
+                    "acc_trade_price_24h": state.acc_value,
+                    "timestamp": state.updated_at * 1000,
+                    "change_rate": rate * 100,
+                })
+                rows.append(row)
+                index.append(market)
+        df = pd.DataFrame(rows, index=pd.Index(index, name="market"), columns=SNAPSHOT_COLUMNS, dtype="float64")
+        return df
+
+    def ohlcv(self, market, interval="day", count=200):
+        """
+        재생이 진행된 시각까지의 캔들 (pyupbit.get_ohlcv 형식)
+
+        등록한 캔들 주기로 만들 수 있는 주기만 지원하며, 진행 중인 캔들은 현재까지의
+        값으로 잘라서 보여줍니다.
+        """
+        interval = normalize_interval(interval)
+        with self._lock:
+            state = self._markets.get(market)
+            if state is None or state.rows is None or self.now is None:
+                return None
+            rows = state.rows[state.rows[:, 0] <= self.now].copy()
+            source = state.interval
+            if len(rows) and rows[-1, 0] + PERIODS[source] > self.now and state.price is not None:
+                # 진행 중인 캔들은 지금까지의 체결만 반영
+                last = rows[-1]
+                last[4] = state.price
+                last[2] = max(min(last[2], max(last[1], state.price)), state.price)
+                last[3] = min(max(last[3], min(last[1], state.price)), state.price)
+        if not len(rows):
+            return None
+        if interval != source:
+            if not can_resample(source, interval):
+                return None
+            rows = resample_rows(rows, interval)
+        rows = rows[-count:]
+        index = pd.to_datetime(rows[:, 0].astype("int64") + KST_OFFSET, unit="s")
+        return pd.DataFrame(rows[:, 1:], index=index, columns=COLUMNS)
+
+    def markets(self):
+        return list(self._markets)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, open_orders=sum(1 for o in self._orders.values() if o["state"] == "wait"),
+                        pending_prints=len(self._feed), now=self.now)
+
+
+class SimulatedUpbit:
+    """
+    pyupbit.Upbit 주문/조회 메서드 중 이 프로젝트가 쓰는 것만 흉내낸 모의 클라이언트
+
+    latency(초, 또는 (최소, 최대) 범위)만큼 각 요청을 지연시켜 네트워크 왕복을 재현합니다.
+    """
+
+    def __init__(self, exchange, latency=0.0):
+        self.exchange = exchange
+        self.latency = latency
+        self.calls = 0
+
+    def _delay(self):
+        self.calls += 1
+        latency = self.latency
+        if isinstance(latency, (tuple, list)):
+            latency = random.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+
+    def buy_market_order(self, ticker, price, identifier=None):
+        self._delay()
+        return self.exchange.buy_market(ticker, float(price), identifier)
+
+    def sell_market_order(self, ticker, volume, identifier=None):
+        self._delay()
+        return self.exchange.sell_market(ticker, float(volume), identifier)
+
+    def buy_limit_order(self, ticker, price, volume, identifier=None):
+        self._delay()
+        return self.exchange.limit(ticker, "bid", price, volume, identifier)
+
+    def sell_limit_order(self, ticker, price, volume, identifier=None):
+        self._delay()
+        return self.exchange.limit(ticker, "ask", price, volume, identifier)
+
+    def cancel_order(self, uuid):
+        self._delay()
+        return self.exchange.cancel(uuid)
+
+    def get_order(self, ticker_or_uuid, state="wait", page=1, limit=100):
+        self._delay()
+        if ticker_or_uuid and not ticker_or_uuid.startswith("KRW-"):
+            return self.exchange.get_order(ticker_or_uuid) or _error("order_not_found", "주문을 찾지 못했습니다.")
+        return self.exchange.orders(market=ticker_or_uuid or None, states=[state], page=page, limit=limit)
+
+    def get_balances(self):
+        self._delay()
+        return self.exchange.balances()
+
+
+class SimulatedAccount:
+    """AccountSnapshot과 같은 인터페이스로 모의 거래소 잔고를 보여주는 계좌"""
+
+    def __init__(self, trade):
+        self.trade = trade
+        self.fetched_at = 0.0
+        self.fetch_count = 0
+        self._accounts = {}
+        self._raw = []
+
+    def invalidate(self):
+        self.fetched_at = 0.0
+
+    def is_stale(self):
+        # 모의 거래소 조회는 실패하지 않음
+        return False
+
+    def status(self):
+        return {"stale": False, "last_error": None, "failures": 0, "age": 0.0, "fetch_count": self.fetch_count}
+
+    def refresh(self):
+        raw = self.trade.upbit.get_balances()
+        self._raw = raw
+        self._accounts = {
+            item["currency"]: {
+                "currency": item["currency"],
+                "balance": float(item["balance"]),
+                "locked": float(item["locked"]),
+                "avg_buy_price": float(item["avg_buy_price"]),
+                "unit_currency": "KRW",
+            }
+            for item in raw
+        }
+        self.fetched_at = time.time()
+        self.fetch_count += 1
+        return True
+
+    def _ensure(self):
+        # 모의 거래소는 체결이 즉시 반영되므로 조회할 때마다 새로 읽음
+        self.refresh()
+
+    def get(self, ticker):
+        self._ensure()
+        return self._accounts.get(ticker.split("-")[-1])
+
+    def balance(self, ticker):
+        account = self.get(ticker)
+        return account["balance"] if account else 0.0
+
+    def locked(self, ticker):
+        account = self.get(ticker)
+        return account["locked"] if account else 0.0
+
+    def avg_buy_price(self, ticker):
+        account = self.get(ticker)
+        return account["avg_buy_price"] if account else 0.0
+
+    def accounts(self):
+        self._ensure()
+        return dict(self._accounts)
+
+    def balances(self):
+        self._ensure()
+        return list(self._raw)
+
+
+class SimulatedTrade:
+    """
+    Trade와 같은 메서드를 제공하는 모의 거래 인스턴스
+
+    API 키 없이 AutoTrader(trade=...), 포트폴리오 평가, 주문 원장, 에이전트 도구를
+    그대로 실행할 수 있습니다. 모든 주문/조회는 SimulatedUpbit를 거치므로 설정한
+    지연 시간이 적용됩니다.
+    """
+
+    simulated = True
+
+    def __init__(self, exchange=None, latency=0.0, name="default"):
+        self.exchange = exchange or SimulatedExchange()
+        self.upbit = SimulatedUpbit(self.exchange, latency=latency)
+        # 원장/평가 캐시가 실제 계정과 섞이지 않도록 모의 거래소마다 다른 키 사용
+        self.access_key = f"simulator-{name}-{id(self.exchange)}"
+        self.secret_key = "simulator"
+        self.server_url = "simulator://"
+        self.is_valid = True
+        self.account = SimulatedAccount(self)
+
+    def validate(self):
+        return True
+
+    # ----- 시세 -----
+
+    def get_current_price(self, ticker):
+        if isinstance(ticker, (list, tuple)):
+            return {m: p for m in ticker if (p := self.exchange.price(m)) is not None}
+        return self.exchange.price(ticker) or 0
+
+    def get_ticker_snapshot(self, markets):
+        if isinstance(markets, str):
+            markets = [markets]
+        return self.exchange.ticker_snapshot(markets)
+
+    def get_ohlcv(self, ticker, interval, count):
+        return self.exchange.ohlcv(ticker, interval=interval, count=count)
+
+    def get_market_all(self):
+        return [{"market": m, "korean_name": m.split("-")[1], "english_name": m.split("-")[1]}
+                for m in self.exchange.markets()]
+
+    # ----- 계좌 -----
+
+    def get_balance(self, ticker):
+        return self.account.balance(ticker)
+
+    def get_balances(self):
+        return self.account.balances()
+
+    # ----- 주문 조회 -----
+
+    def _get_orders_direct_api(self, ticker_or_uuid=None, state=None, page=1, limit=100):
+        self.upbit._delay()
+        if ticker_or_uuid and len(ticker_or_uuid) >= 30:
+            order = self.exchange.get_order(ticker_or_uuid)
+            return [order] if order else []
+        return self.exchange.orders(market=ticker_or_uuid, states=[state] if state else None, page=page, limit=limit)
+
+    def get_order_history(self, ticker_or_uuid="", state=None, page=1, limit=100, states=None):
+        target_states = states or ([state] if state else ["wait", "done", "cancel"])
+        results = []
+        for current_state in target_states:
+            results.extend(self._get_orders_direct_api(ticker_or_uuid or None, current_state, page, limit))
+        return results
+
+    def get_order_history_concurrent(self, ticker_or_uuid="", states=None, max_pages=5, limit=100,
+                                     max_workers=None, prefetch=None, return_failed=False):
+        orders = {}
+        for state in states or ["wait", "done", "cancel"]:
+            for page in range(1, max_pages + 1):
+                page_orders = self._get_orders_direct_api(ticker_or_uuid or None, state, page, limit)
+                for order in page_orders:
+                    orders[order["uuid"]] = order
+                if len(page_orders) < limit:
+                    break
+        orders = sorted(orders.values(), key=lambda o: o.get("created_at") or "", reverse=True)
+        # 모의 거래소 조회는 실패하지 않음
+        return (orders, {}) if return_failed else orders
+
+    def get_orders_by_uuids(self, uuids, batch_size=100):
+        uuids = list(uuids)
+        orders = []
+        for i in range(0, len(uuids), batch_size):
+            self.upbit._delay()
+            orders.extend(self.exchange.orders(uuids=set(uuids[i:i + batch_size]), limit=batch_size))
+        return orders
+
+    def orders_status(self, orderid):
+        self.upbit._delay()
+        return self.exchange.get_order(orderid) or _error("order_not_found", "주문을 찾지 못했습니다.")
+
+    def get_order(self, orderid):
+        return self.orders_status(orderid)
+
+    # ----- 주문 -----
+
+    def buy_market_order(self, ticker, amount):
+        result = self.upbit.buy_market_order(ticker, amount)
+        self.account.invalidate()
+        return result if "uuid" in result else None
+
+    def sell_market_order(self, ticker, volume=None):
+        volume = volume if volume is not None else self.get_balance(ticker)
+        if not volume:
+            print(f"매도할 {ticker} 수량이 없습니다.")
+            return None
+        result = self.upbit.sell_market_order(ticker, volume)
+        self.account.invalidate()
+        return result if "uuid" in result else None
+
+    def buy_limit_order(self, ticker, price, volume):
+        result = self.upbit.buy_limit_order(ticker, price, volume)
+        self.account.invalidate()
+        return result if "uuid" in result else None
+
+    def sell_limit_order(self, ticker, price, volume=None):
+        volume = volume if volume is not None else self.get_balance(ticker)
+        if not volume:
+            print(f"매도할 {ticker} 수량이 없습니다.")
+            return None
+        result = self.upbit.sell_limit_order(ticker, price, volume)
+        self.account.invalidate()
+        return result if "uuid" in result else None
+
+    def place_order(self, market, side, ord_type, volume=None, price=None, identifier=None):
+        self.upbit._delay()
+        if ord_type == "price":
+            result = self.exchange.buy_market(market, float(price), identifier)
+        elif ord_type == "market":
+            result = self.exchange.sell_market(market, float(volume), identifier)
+        else:
+            result = self.exchange.limit(market, side, price, volume, identifier)
+        self.account.invalidate()
+        return result
+
+    def get_order_by_identifier(self, identifier):
+        self.upbit._delay()
+        return self.exchange.get_order(identifier=identifier)
+
+    def cancel_order(self, uuid):
+        result = self.upbit.cancel_order(uuid)
+        self.account.invalidate()
+        return result if "uuid" in result else None
@@ -0,0 +1,95 @@
+import hashlib
+import threading
+import time
+
+from tools.upbit.UPBIT import Trade
+
+# 유효성 검사 결과 유지 시간 (초)
+VALID_TTL = 600
+# 인증 실패한 키를 다시 검사하기까지 대기 시간 (초)
+INVALID_RETRY = 30
+
+
+def credential_fingerprint(access_key, secret_key):
+    """API 키 쌍을 식별하는 지문 (키 원문은 저장하지 않음)"""
+    return hashlib.sha256(f"{access_key}:{secret_key}".encode()).hexdigest()[:16]
+
+
+class TradePool:
+    """
+    API 키 지문별로 검증된 Trade 인스턴스를 공유하는 프로세스 전역 저장소
+
+    Trade 생성 시마다 발생하던 잔고 조회(키 검증) 요청을 키당 한 번으로 줄입니다.
+    검증 결과는 VALID_TTL 동안 유지되며, 만료되었거나 인증 실패가 보고된 경우
+    다음 조회 시점에 지연 재검증합니다.
+    """
+
+    def __init__(self, valid_ttl=VALID_TTL, invalid_retry=INVALID_RETRY):
+        self.valid_ttl = valid_ttl
+        self.invalid_retry = invalid_retry
+        self._lock = threading.Lock()
+        # fingerprint -> {"trade": Trade, "checked_at": float, "lock": Lock}
+        self._entries = {}
+
+    def get(self, access_key, secret_key):
+        """키에 해당하는 공유 Trade 인스턴스 반환 (필요할 때만 검증)"""
+        if not access_key or not secret_key:
+            return None
+
+        key = credential_fingerprint(access_key, secret_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {
+                    "trade": Trade(access_key, secret_key, validate=False),
+                    "checked_at": 0.0,
+                    "lock": threading.Lock(),
+                }
+                # 요청 중 401이 나면 다음 조회 때 재검증
+                entry["trade"].on_auth_failure = self.report_auth_failure
+                self._entries[key] = entry
+
+        # 같은 키에 대한 동시 검증은 한 번만 수행
+        with entry["lock"]:
+            trade = entry["trade"]
+            age = time.time() - entry["checked_at"]
+            ttl = self.valid_ttl if trade.is_valid else self.invalid_retry
+            if age >= ttl:
+                trade.validate()
+                entry["checked_at"] = time.time()
+        return trade
+
+    def report_auth_failure(self, trade):
+        """인증 실패가 발생한 인스턴스를 다음 조회 시 재검증하도록 표시"""
+        if trade is None:
+            return
+        key = credential_fingerprint(trade.access_key, trade.secret_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["checked_at"] = 0.0
+
+    def discard(self, access_key, secret_key):
+        """키에 해당하는 인스턴스 제거 (키 변경/삭제 시)"""
+        key = credential_fingerprint(access_key, secret_key)
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """모든 인스턴스 제거"""
+        with self._lock:
+            self._entries.clear()
+
+
+# 프로세스 전역 풀 (모든 Streamlit 세션, 에이전트 도구, AutoTrader 스레드가 공유)
+_POOL = TradePool()
+
+
+def get_trade(access_key, secret_key):
+    """공유 풀에서 Trade 인스턴스 가져오기"""
+    return _POOL.get(access_key, secret_key)
+
+
+def get_pool():
+    """공유 TradePool 반환"""
+    return _POOL
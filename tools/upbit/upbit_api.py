@@ -15,20 +15,16 @@ logger = logging.getLogger("crypto_agent")
 
 
 
-# UpbitTrader를 직접 가져옵니다
-try:
-    from upbit.upbit_trader import UpbitTrader
-except ImportError:
-    # upbit_trader 모듈이 없는 경우 대체 구현
-    class UpbitTrader:
-        def __init__(self, access_key, secret_key):
-            self.access_key = access_key
-            self.secret_key = secret_key
-            self.is_valid = False
-            
-        def get_balance(self, ticker):
-            log_error(None, f"UpbitTrader 모듈이 로드되지 않았습니다.")
-            return 0
+# 검증된 Trade 인스턴스를 공유하는 풀
+from tools.upbit.trade_pool import get_trade
+from tools.upbit.market_snapshot import get_current_price
+from tools.upbit.candle_store import get_ohlcv
+from tools.upbit.indicators import get_indicators
+from tools.upbit.market_scanner import scan_markets
+from tools.upbit.market_metadata import get_market_metadata
+from tools.upbit.order_ledger import get_ledger, TERMINAL_STATES
+from tools.upbit.order_watcher import watch_order
+from tools.upbit.order_pipeline import get_order_pipeline
 
 # 로깅 설정
 LOG_DIR = "logs"
@@ -105,9 +101,9 @@ def get_upbit_instance() -> Any:
     
     if upbit_access and upbit_secret:
         try:
-            import pyupbit
-            upbit = pyupbit.Upbit(upbit_access, upbit_secret)
-            return upbit
+            # 공유 Trade 인스턴스의 pyupbit 객체 재사용
+            trade = get_trade(upbit_access, upbit_secret)
+            return trade.upbit if trade else None
         except Exception as e:
             log_error(e, "업비트 인스턴스 생성 중 오류")
     
@@ -115,14 +111,17 @@ def get_upbit_instance() -> Any:
 
 # 업비트 트레이더 인스턴스를 가져오는 함수
 def get_upbit_trade_instance() -> Any:
-    """업비트 트레이더 인스턴스를 반환합니다."""
+    """업비트 트레이더 인스턴스를 반환합니다. (키별 공유 인스턴스, 모의 거래 설정 시 SimulatedTrade)"""
+    simulated = st.session_state.get('simulated_trade')
+    if simulated is not None:
+        return simulated
+    
     upbit_access = st.session_state.get('upbit_access_key', '')
     upbit_secret = st.session_state.get('upbit_secret_key', '')
     
     if upbit_access and upbit_secret:
         try:
-            trader = UpbitTrader(upbit_access, upbit_secret)
-            return trader
+            return get_trade(upbit_access, upbit_secret)
         except Exception as e:
             log_error(e, "업비트 트레이더 인스턴스 생성 중 오류")
     
@@ -130,6 +129,12 @@ def get_upbit_trade_instance() -> Any:
 
 
 
+def _order_identifier(ctx) -> Optional[str]:
+    """도구 호출 id로 주문 identifier 생성 (같은 도구 호출의 재시도만 같은 주문으로 합침)"""
+    tool_call_id = getattr(ctx, "tool_call_id", None)
+    return f"ai-{tool_call_id}" if tool_call_id else None
+
+
 # 도구 함수 구현
 @function_tool
 async def get_available_coins_func(action_type: Optional[str] = None) -> str:
@@ -143,20 +148,20 @@ async def get_available_coins_func(action_type: Optional[str] = None) -> str:
     log_info("get_available_coins 함수 호출")
     
     try:
-        upbit = get_upbit_instance()
+        upbit_trade = get_upbit_trade_instance()
         
-        if upbit:
+        if upbit_trade and upbit_trade.upbit:
             log_info("get_available_coins: 유효한 Upbit 인스턴스로 실제 데이터 조회 시도")
             
-            # 사용자의 보유 코인 목록 조회
+            # 사용자의 보유 코인 목록 조회 (계좌 스냅샷)
             portfolio_coins = []
             try:
-                balances = upbit.get_balances()
+                balances = upbit_trade.get_balances()
                 for balance in balances:
                     if balance['currency'] != 'KRW' and float(balance['balance']) > 0:
                         portfolio_coins.append({
                             'ticker': f"KRW-{balance['currency']}",
-                            'korean_name': balance['currency'],  # API에서 한글 이름을 따로 제공하지 않음
+                            'korean_name': get_market_metadata().korean_name(balance['currency']),
                             'balance': float(balance['balance']),
                             'avg_buy_price': float(balance['avg_buy_price'])
                         })
@@ -180,28 +185,14 @@ async def get_available_coins_func(action_type: Optional[str] = None) -> str:
                     "coins": portfolio_coins
                 }, ensure_ascii=False)
             
-            # KRW 마켓 코인 조회
+            # 원화 마켓 전체를 한 번의 시세 요청으로 스캔하여 점수순으로 선택
             try:
-                import pyupbit
-                markets = pyupbit.get_tickers(fiat="KRW")
-                market_info = []
-                
-                # 시장 정보 가져오기
-                for market in markets[:20]:  # 상위 20개만 처리 (속도 향상)
-                    try:
-                        ticker_info = pyupbit.get_current_price(market)
-                        if ticker_info:
-                            market_info.append({
-                                'market': market,
-                                'korean_name': market.replace('KRW-', '')
-                            })
-                    except:
-                        continue
+                scanned = scan_markets(top=None)
             except Exception as e:
-                log_error(e, "KRW 마켓 코인 조회 중 오류 발생")
-                market_info = []
+                log_error(e, "KRW 마켓 스캔 중 오류 발생")
+                scanned = None
             
-            krw_markets = market_info
+            krw_markets = [] if scanned is None else scanned.to_dict("records")
             log_info(f"get_available_coins: {len(krw_markets)}개의 KRW 마켓 코인 조회됨")
             
             # 위험 성향에 기반해 추천 코인 필터링 (예시)
@@ -214,15 +205,18 @@ async def get_available_coins_func(action_type: Optional[str] = None) -> str:
             
             filtered_markets = [m for m in krw_markets if risk_filters.get(risk_style, lambda x: True)(m)]
             
-            # 결과 제한 (최대 10개)
-            result_markets = filtered_markets[:10] if len(filtered_markets) > 10 else filtered_markets
+            # 결과 제한 (점수 상위 10개)
+            result_markets = filtered_markets[:10]
             
             # 결과 형식 변환
             coins = []
             for market in result_markets:
                 coins.append({
                     'ticker': market['market'],
-                    'korean_name': market['korean_name']
+                    'korean_name': market['korean_name'],
+                    'price': market['price'],
+                    'change_rate': round(market['change_rate'], 2),
+                    'score': round(market['score'], 1)
                 })
             
             log_info("get_available_coins: 성공")
@@ -312,28 +306,25 @@ async def get_coin_price_info_func(ticker: str) -> str:
             import pyupbit
             
             # 현재가 조회
-            current_price = pyupbit.get_current_price(ticker)
+            current_price = get_current_price(ticker)
             log_info("get_coin_price_info: 현재가 조회 결과", {"price": current_price})
             
             # 보유량 조회
-            upbit = get_upbit_instance()
+            upbit_trade = get_upbit_trade_instance()
             balance_info = {"balance": 0, "avg_buy_price": 0}
             
-            if upbit:
-                coin_currency = ticker.replace("KRW-", "")
-                balances = upbit.get_balances()
-                for balance in balances:
-                    if balance['currency'] == coin_currency:
-                        balance_info = {
-                            "balance": float(balance['balance']),
-                            "avg_buy_price": float(balance['avg_buy_price'])
-                        }
-                        break
+            if upbit_trade and upbit_trade.is_valid:
+                account = upbit_trade.account.get(ticker)
+                if account:
+                    balance_info = {
+                        "balance": account['balance'],
+                        "avg_buy_price": account['avg_buy_price']
+                    }
             
             log_info("get_coin_price_info: 잔고 조회 결과", balance_info)
             
             # 일봉 데이터 조회
-            df = pyupbit.get_ohlcv(ticker, interval="day", count=7)
+            df = get_ohlcv(ticker, interval="day", count=7)
             log_info("get_coin_price_info: OHLCV 데이터 조회 성공")
             
             # 데이터 포맷팅
@@ -348,12 +339,28 @@ async def get_coin_price_info_func(ticker: str) -> str:
                     "volume": float(row['volume'])
                 })
             
+            # 일봉 지표 (스트림으로 갱신되는 값을 그대로 사용)
+            indicators = get_indicators(ticker)
+            indicators = {
+                key: round(value, 4) if isinstance(value, float) else value
+                for key, value in indicators.items()
+                if key not in ("market", "interval", "updated_at")
+            }
+            log_info("get_coin_price_info: 지표 조회 성공")
+            
+            # 마켓 이름/경고 (저장된 마켓 정보)
+            metadata = get_market_metadata().get(ticker) or {}
+            
             # 데이터 조합
             result = {
                 "success": True,
                 "ticker": ticker,
+                "korean_name": metadata.get("korean_name", ticker.replace("KRW-", "")),
+                "market_warning": metadata.get("warning", False),
+                "caution": metadata.get("caution", []),
                 "current_price": current_price,
                 "balance_info": balance_info,
+                "indicators": indicators,
                 "ohlcv_data": ohlcv_data
             }
             
@@ -372,7 +379,45 @@ async def get_coin_price_info_func(ticker: str) -> str:
 
 
 @function_tool
-async def buy_coin_func(ticker: str, price_type: str, amount: float, limit_price: Optional[float]) -> str:
+async def scan_markets_func(top: Optional[int] = None, sort_by: Optional[str] = None) -> str:
+    """
+    원화 마켓 전체를 스캔하여 점수 상위 코인을 반환합니다.
+    점수는 24시간 거래대금, 변동률, 변동성, 당일 고가/저가 범위 내 위치의 백분위를 가중합한 값(0~100)입니다.
+    거래대금이 적은 마켓과 투자유의 마켓은 제외됩니다.
+    
+    Args:
+        top: 반환할 개수 (기본 10, 최대 50)
+        sort_by: 정렬 기준 (score, change_rate, value_24h, volatility, range_position 중 하나, 기본 score)
+    """
+    log_info("scan_markets 함수 호출", {"top": top, "sort_by": sort_by})
+    try:
+        top = min(max(int(top or 10), 1), 50)
+        df = scan_markets(top=top, sort_by=sort_by or "score")
+        
+        # 토큰 절약을 위해 짧은 키와 반올림한 값만 전달
+        coins = [
+            {
+                "ticker": row.market,
+                "name": row.korean_name,
+                "price": row.price,
+                "chg%": round(row.change_rate, 2),
+                "value24h_억": round(row.value_24h / 1e8, 1),
+                "vol%": round(row.volatility, 2),
+                "pos": round(row.range_position, 2),
+                "score": round(row.score, 1),
+            }
+            for row in df.itertuples(index=False)
+        ]
+        log_info("scan_markets: 성공", {"count": len(coins)})
+        return json.dumps({"success": True, "sort_by": sort_by or "score", "coins": coins}, ensure_ascii=False)
+    except Exception as e:
+        error_msg = f"마켓 스캔 중 오류 발생: {str(e)}"
+        log_error(e, error_msg)
+        return json.dumps({"success": False, "message": error_msg, "coins": []}, ensure_ascii=False)
+
+
+@function_tool
+async def buy_coin_func(ctx: RunContextWrapper[Any], ticker: str, price_type: str, amount: float, limit_price: Optional[float]) -> str:
     """
     코인 매수 함수
     
@@ -402,7 +447,8 @@ async def buy_coin_func(ticker: str, price_type: str, amount: float, limit_price
         log_info(f"buy_coin: 코인명 추출", {"ticker": ticker})
         
         # upbit 인스턴스 가져오기
-        upbit = get_upbit_instance()
+        upbit_trade = get_upbit_trade_instance()
+        upbit = upbit_trade.upbit if upbit_trade else None
         if not upbit:
             error_msg = "Upbit API 인스턴스를 생성할 수 없습니다. API 키 설정을 확인하세요."
             log_error(None, error_msg, show_tb=False)
@@ -425,7 +471,7 @@ async def buy_coin_func(ticker: str, price_type: str, amount: float, limit_price
         # 전량 매수 여부 확인 (계좌의 원화 잔고와 동일한 경우)
         krw_balance = 0
         try:
-            balances = upbit.get_balances()
+            balances = upbit_trade.get_balances()
             for balance in balances:
                 if balance['currency'] == 'KRW':
                     krw_balance = float(balance['balance'])
@@ -443,13 +489,20 @@ async def buy_coin_func(ticker: str, price_type: str, amount: float, limit_price
         order_type = None
         order_result = None
         
+        identifier = _order_identifier(ctx)
+        
+        def track_late(order):
+            """응답 시간 초과 뒤에 접수된 주문도 주문 추적기에 등록"""
+            upbit_trade.account.invalidate()
+            watch_order(upbit_trade, order)
+        
         # 마켓 주문과 리밋 주문의 분리 처리
         if price_type == "market":
             log_info(f"buy_coin: 시장가 매수 시도", {"ticker": ticker, "amount": amount})
             print(f"시장가 매수 주문: {ticker}, {amount}KRW")
             order_type = "시장가"
             try:
-                order_result = upbit.buy_market_order(ticker, amount)
+                order_result = await get_order_pipeline(upbit_trade).submit_async(ticker, "bid", "price", price=amount, identifier=identifier, on_late_result=track_late)
                 log_info(f"buy_coin: 주문 결과", {"result": order_result})
             except Exception as e:
                 error_msg = f"시장가 매수 중 오류 발생: {str(e)}"
@@ -469,22 +522,41 @@ async def buy_coin_func(ticker: str, price_type: str, amount: float, limit_price
             print(f"지정가 매수 주문: {ticker}, 가격: {limit_price}KRW, 수량: {volume}")
             order_type = "지정가"
             try:
-                order_result = upbit.buy_limit_order(ticker, limit_price, volume)
+                order_result = await get_order_pipeline(upbit_trade).submit_async(ticker, "bid", "limit", volume=volume, price=limit_price, identifier=identifier, on_late_result=track_late)
                 log_info(f"buy_coin: 주문 결과", {"result": order_result})
             except Exception as e:
                 error_msg = f"지정가 매수 중 오류 발생: {str(e)}"
                 log_error(e, error_msg)
                 return json.dumps({"success": False, "message": error_msg}, ensure_ascii=False)
         
+        # 주문 후 계좌 스냅샷 무효화
+        upbit_trade.account.invalidate()
+        
         # 주문 결과 반환
         if order_result and 'uuid' in order_result:
+            # 체결될 때까지 주문 추적기가 일괄 조회로 상태를 갱신
+            watch_order(upbit_trade, order_result)
             result = {
                 'success': True,
-                'message': f"{ticker} {order_type} 매수 주문이 접수되었습니다. 주문 ID: {order_result['uuid']}\n주문 체결 결과는 '거래내역' 탭에서 확인하실 수 있습니다.",
+                'message': (f"이 요청의 주문은 이미 접수되어 새로 제출하지 않았습니다. 주문 ID: {order_result['uuid']}"
+                            if order_result.get('deduplicated') else
+                            f"{ticker} {order_type} 매수 주문이 접수되었습니다. 주문 ID: {order_result['uuid']}\n체결 상태는 자동으로 추적되며 '거래내역' 탭에서 확인하실 수 있습니다."),
+                'deduplicated': bool(order_result.get('deduplicated')),
                 'order_id': order_result['uuid'],
                 'order_info': order_result
             }
             return json.dumps(result, ensure_ascii=False)
+        elif order_result and order_result.get('error', {}).get('name') == 'timeout':
+            # 응답이 늦을 뿐 주문은 계속 처리 중 (접수되면 track_late가 주문 추적기에 등록)
+            identifier = order_result['error'].get('identifier')
+            message = f"{ticker} {order_type} 매수 주문 응답이 지연되고 있습니다. 주문은 계속 처리 중이며 접수되면 자동으로 추적됩니다. 주문 identifier: {identifier}\n같은 주문을 다시 내지 말고 잠시 후 '거래내역' 탭이나 주문 조회로 확인하세요."
+            log_info("buy_coin: 주문 응답 지연", {"identifier": identifier})
+            return json.dumps({"success": False, "pending": True, "message": message, "identifier": identifier}, ensure_ascii=False)
+        elif order_result and 'error' in order_result:
+            error = order_result['error']
+            error_msg = f"주문이 거절되었습니다: {error.get('message') or error.get('name')}"
+            log_error(None, error_msg, show_tb=False)
+            return json.dumps({"success": False, "message": error_msg, "error": error}, ensure_ascii=False)
         else:
             error_msg = f"주문은 성공했으나 주문 ID를 받지 못했습니다.: {order_result}"
             log_error(None, error_msg, show_tb=False)
@@ -497,7 +569,7 @@ async def buy_coin_func(ticker: str, price_type: str, amount: float, limit_price
 
 
 @function_tool
-async def sell_coin_func(ticker: str, price_type: str, amount: Union[str, float], limit_price: Optional[float]) -> str:
+async def sell_coin_func(ctx: RunContextWrapper[Any], ticker: str, price_type: str, amount: Union[str, float], limit_price: Optional[float]) -> str:
     """
     코인 매도 함수
     
@@ -527,7 +599,8 @@ async def sell_coin_func(ticker: str, price_type: str, amount: Union[str, float]
         log_info(f"sell_coin: 코인명 추출", {"ticker": ticker})
         
         # upbit 인스턴스 가져오기
-        upbit = get_upbit_instance()
+        upbit_trade = get_upbit_trade_instance()
+        upbit = upbit_trade.upbit if upbit_trade else None
         if not upbit:
             error_msg = "Upbit API 인스턴스를 생성할 수 없습니다. API 키 설정을 확인하세요."
             log_error(None, error_msg, show_tb=False)
@@ -545,7 +618,7 @@ async def sell_coin_func(ticker: str, price_type: str, amount: Union[str, float]
         coin_currency = ticker.replace("KRW-", "")
         coin_balance = 0
         try:
-            balances = upbit.get_balances()
+            balances = upbit_trade.get_balances()
             for balance in balances:
                 if balance['currency'] == coin_currency:
                     coin_balance = float(balance['balance'])
@@ -591,13 +664,20 @@ async def sell_coin_func(ticker: str, price_type: str, amount: Union[str, float]
         order_type = None
         order_result = None
         
+        identifier = _order_identifier(ctx)
+        
+        def track_late(order):
+            """응답 시간 초과 뒤에 접수된 주문도 주문 추적기에 등록"""
+            upbit_trade.account.invalidate()
+            watch_order(upbit_trade, order)
+        
         # 마켓 주문과 리밋 주문의 분리 처리
         if price_type == "market":
             log_info(f"sell_coin: 시장가 매도 시도", {"ticker": ticker, "amount": amount_value})
             print(f"시장가 매도 주문: {ticker}, {amount_value}개")
             order_type = "시장가"
             try:
-                order_result = upbit.sell_market_order(ticker, amount_value)
+                order_result = await get_order_pipeline(upbit_trade).submit_async(ticker, "ask", "market", volume=amount_value, identifier=identifier, on_late_result=track_late)
                 log_info(f"sell_coin: 주문 결과", {"result": order_result})
             except Exception as e:
                 error_msg = f"시장가 매도 중 오류 발생: {str(e)}"
@@ -614,22 +694,41 @@ async def sell_coin_func(ticker: str, price_type: str, amount: Union[str, float]
             print(f"지정가 매도 주문: {ticker}, 가격: {limit_price}KRW, 수량: {amount_value}개")
             order_type = "지정가"
             try:
-                order_result = upbit.sell_limit_order(ticker, limit_price, amount_value)
+                order_result = await get_order_pipeline(upbit_trade).submit_async(ticker, "ask", "limit", volume=amount_value, price=limit_price, identifier=identifier, on_late_result=track_late)
                 log_info(f"sell_coin: 주문 결과", {"result": order_result})
             except Exception as e:
                 error_msg = f"지정가 매도 중 오류 발생: {str(e)}"
                 log_error(e, error_msg)
                 return json.dumps({"success": False, "message": error_msg}, ensure_ascii=False)
         
+        # 주문 후 계좌 스냅샷 무효화
+        upbit_trade.account.invalidate()
+        
         # 주문 결과 반환
         if order_result and 'uuid' in order_result:
+            # 체결될 때까지 주문 추적기가 일괄 조회로 상태를 갱신
+            watch_order(upbit_trade, order_result)
             result = {
                 'success': True,
-                'message': f"{ticker} {order_type} 매도 주문이 접수되었습니다. 주문 ID: {order_result['uuid']}\n주문 체결 결과는 '거래내역' 탭에서 확인하실 수 있습니다.",
+                'message': (f"이 요청의 주문은 이미 접수되어 새로 제출하지 않았습니다. 주문 ID: {order_result['uuid']}"
+                            if order_result.get('deduplicated') else
+                            f"{ticker} {order_type} 매도 주문이 접수되었습니다. 주문 ID: {order_result['uuid']}\n체결 상태는 자동으로 추적되며 '거래내역' 탭에서 확인하실 수 있습니다."),
+                'deduplicated': bool(order_result.get('deduplicated')),
                 'order_id': order_result['uuid'],
                 'order_info': order_result
             }
             return json.dumps(result, ensure_ascii=False)
+        elif order_result and order_result.get('error', {}).get('name') == 'timeout':
+            # 응답이 늦을 뿐 주문은 계속 처리 중 (접수되면 track_late가 주문 추적기에 등록)
+            identifier = order_result['error'].get('identifier')
+            message = f"{ticker} {order_type} 매도 주문 응답이 지연되고 있습니다. 주문은 계속 처리 중이며 접수되면 자동으로 추적됩니다. 주문 identifier: {identifier}\n같은 주문을 다시 내지 말고 잠시 후 '거래내역' 탭이나 주문 조회로 확인하세요."
+            log_info("sell_coin: 주문 응답 지연", {"identifier": identifier})
+            return json.dumps({"success": False, "pending": True, "message": message, "identifier": identifier}, ensure_ascii=False)
+        elif order_result and 'error' in order_result:
+            error = order_result['error']
+            error_msg = f"주문이 거절되었습니다: {error.get('message') or error.get('name')}"
+            log_error(None, error_msg, show_tb=False)
+            return json.dumps({"success": False, "message": error_msg, "error": error}, ensure_ascii=False)
         else:
             error_msg = f"주문은 성공했으나 주문 ID를 받지 못했습니다.: {order_result}"
             log_error(None, error_msg, show_tb=False)
@@ -665,8 +764,13 @@ async def check_order_status_func(order_id: str) -> str:
         
         if upbit_trade and upbit_trade.is_valid:
             log_info(f"{function_name}: 유효한 Upbit 인스턴스 확인")
-            # 주문 상태 조회
-            order_result = upbit_trade.get_order(order_id)
+            # 주문 원장에 완료/취소 상태로 있으면 API 호출 없이 사용
+            ledger = get_ledger(upbit_trade)
+            order_result = ledger.get(order_id) if ledger else None
+            if not order_result or order_result.get('state') not in TERMINAL_STATES:
+                order_result = upbit_trade.get_order(order_id)
+                if ledger and order_result and 'uuid' in order_result:
+                    ledger.upsert([order_result])
             log_info(f"{function_name}: 주문 조회 결과", {"result": order_result})
             
             if order_result and 'uuid' in order_result:
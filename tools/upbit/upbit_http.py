@@ -0,0 +1,215 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from tools.upbit.upbit_ratelimit import classify, get_governor
+
+UPBIT_SERVER_URL = "https://api.upbit.com"
+
+# 기본 연결 풀 설정
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = (3.05, 10)  # (연결, 읽기) 타임아웃 (초)
+# 429 응답 시 재시도 횟수
+MAX_RATE_LIMIT_RETRIES = 3
+
+
+class TransportStats:
+    """연결 재사용 및 핸드셰이크 시간 카운터"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+            self.connections = 0
+            self.handshake_time = 0.0
+            self.request_time = 0.0
+
+    def record_connection(self, elapsed):
+        with self._lock:
+            self.connections += 1
+            self.handshake_time += elapsed
+
+    def record_request(self, elapsed, error=False):
+        with self._lock:
+            self.requests += 1
+            self.request_time += elapsed
+            if error:
+                self.errors += 1
+
+    def snapshot(self):
+        """현재 카운터 값을 dict로 반환"""
+        with self._lock:
+            reused = max(self.requests - self.connections, 0)
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "connections": self.connections,
+                "reused": reused,
+                "reuse_rate": (reused / self.requests) if self.requests else 0.0,
+                "avg_handshake_ms": (self.handshake_time / self.connections * 1000) if self.connections else 0.0,
+                "avg_request_ms": (self.request_time / self.requests * 1000) if self.requests else 0.0,
+            }
+
+
+_STATS = TransportStats()
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _STATS.record_connection(time.perf_counter() - start)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        # TCP + TLS 핸드셰이크 시간 측정 (새 연결이 열릴 때만 호출됨)
+        start = time.perf_counter()
+        super().connect()
+        _STATS.record_connection(time.perf_counter() - start)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """새 연결 생성 시점을 계측하는 연결 풀 어댑터"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class UpbitTransport:
+    """
+    업비트 REST 호출용 공유 HTTP 세션
+
+    requests.Session의 연결 풀을 사용해 api.upbit.com과의 연결을 keep-alive로
+    재사용하므로, 요청마다 TCP+TLS 핸드셰이크를 반복하지 않습니다.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._session = None
+        self._pool_size = pool_size
+
+    def configure(self, pool_size=None, timeout=None):
+        """풀 크기/타임아웃 변경 (풀 크기가 바뀌면 세션을 다시 만듭니다)"""
+        with self._lock:
+            if timeout is not None:
+                self.timeout = timeout
+            if pool_size is not None and pool_size != self._pool_size:
+                self._pool_size = pool_size
+                if self._session is not None:
+                    self._session.close()
+                    self._session = None
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                self._session = self._create_session()
+            return self._session
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = _KeepAliveAdapter(
+            pool_connections=self._pool_size,
+            pool_maxsize=self._pool_size,
+            pool_block=False,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "Accept": "application/json",
+            "Connection": "keep-alive",
+        })
+        return session
+
+    def request(self, method, url, timeout=None, **kwargs):
+        """
+        공유 세션으로 요청 (url이 '/'로 시작하면 업비트 서버 주소를 붙입니다)
+
+        요청 그룹별 rate governor를 거치므로 한도를 넘으면 실패 대신 대기하며,
+        429 응답은 잠시 멈춘 뒤 재시도합니다. 인증 요청은 시도마다 새 nonce가 필요하므로
+        headers에 헤더를 만드는 함수를 넘기면 매 시도마다 호출해 다시 서명합니다.
+        """
+        group = classify(method, url)
+        if url.startswith("/"):
+            url = f"{UPBIT_SERVER_URL}{url}"
+        governor = get_governor()
+        headers = kwargs.pop("headers", None)
+
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            governor.acquire(group)
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=timeout or self.timeout,
+                                                headers=headers() if callable(headers) else headers, **kwargs)
+            except Exception:
+                _STATS.record_request(time.perf_counter() - start, error=True)
+                raise
+            _STATS.record_request(time.perf_counter() - start, error=response.status_code >= 400)
+            governor.observe(response.headers, fallback_group=group)
+
+            if response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                return response
+            print(f"업비트 요청 한도 초과 (group={group}), 잠시 후 재시도합니다.")
+            governor.penalize(group)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+# 프로세스 전역 전송 계층
+_TRANSPORT = UpbitTransport()
+
+
+def get_transport():
+    """공유 UpbitTransport 반환"""
+    return _TRANSPORT
+
+
+def configure(pool_size=None, timeout=None):
+    """공유 전송 계층 설정"""
+    _TRANSPORT.configure(pool_size=pool_size, timeout=timeout)
+
+
+def get_stats():
+    """연결 재사용/핸드셰이크 통계 반환"""
+    return _STATS.snapshot()
+
+
+def reset_stats():
+    """통계 초기화"""
+    _STATS.reset()
@@ -0,0 +1,191 @@
+import threading
+import time
+
+# 업비트 요청 그룹별 초당 허용 횟수
+# - 시세(quotation) API: 그룹(market/candles/ticker/orderbook/trades)별 초당 10회
+# - 거래소(exchange) API: 주문 생성(order) 초당 8회, 그 외(default: 계좌/주문 조회/취소) 초당 30회
+GROUP_LIMITS = {
+    "market": 10,
+    "candles": 10,
+    "ticker": 10,
+    "orderbook": 10,
+    "trades": 10,
+    "order": 8,
+    "default": 30,
+}
+DEFAULT_LIMIT = 10
+
+# 429 응답 후 해당 그룹 요청을 멈추는 시간 (초)
+TOO_MANY_REQUESTS_PENALTY = 1.0
+
+
+def classify(method, path):
+    """HTTP 메서드와 경로로 업비트 요청 그룹 판별"""
+    path = path.split("?", 1)[0]
+    if "://" in path:
+        path = "/" + path.split("://", 1)[1].split("/", 1)[-1]
+
+    if path.startswith("/v1/market"):
+        return "market"
+    if path.startswith("/v1/candles"):
+        return "candles"
+    if path.startswith("/v1/ticker"):
+        return "ticker"
+    if path.startswith("/v1/orderbook"):
+        return "orderbook"
+    if path.startswith("/v1/trades"):
+        return "trades"
+    if path.startswith("/v1/orders") and method.upper() == "POST":
+        return "order"
+    # 계좌 조회, 주문 조회/취소 등
+    return "default"
+
+
+def parse_remaining_req(value):
+    """
+    Remaining-Req 헤더 파싱
+
+    예: "group=default; min=1799; sec=29" -> ("default", 29)
+    """
+    if not value:
+        return None, None
+    group = None
+    sec = None
+    for part in value.split(";"):
+        if "=" not in part:
+            continue
+        key, val = part.strip().split("=", 1)
+        if key == "group":
+            group = val.strip()
+        elif key == "sec":
+            try:
+                sec = int(val)
+            except ValueError:
+                sec = None
+    return group, sec
+
+
+class TokenBucket:
+    """초당 rate개 토큰이 채워지는 버킷 (서버가 알려준 잔여량으로 보정)"""
+
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self.capacity = float(rate)
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.cond = threading.Condition()
+        self.waits = 0
+        self.throttled = 0
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def acquire(self, count=1, timeout=None):
+        """토큰을 얻을 때까지 대기 (timeout 초과 시 False)"""
+        count = min(count, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            waited = False
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= count:
+                    self.tokens -= count
+                    if waited:
+                        self.waits += 1
+                    return True
+
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                else:
+                    delay = (count - self.tokens) / self.rate
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return False
+                    delay = min(delay, remaining)
+                waited = True
+                self.cond.wait(delay)
+
+    def observe(self, remaining_sec):
+        """서버 응답의 남은 요청 수로 토큰 보정 (서버 값이 더 작으면 따름)"""
+        with self.cond:
+            self._refill(time.monotonic())
+            if remaining_sec is not None and remaining_sec < self.tokens:
+                self.tokens = float(max(remaining_sec, 0))
+
+    def penalize(self, seconds=TOO_MANY_REQUESTS_PENALTY):
+        """429 응답 시 토큰을 비우고 일정 시간 요청 중단"""
+        with self.cond:
+            self.tokens = 0.0
+            self.updated = time.monotonic()
+            self.blocked_until = max(self.blocked_until, self.updated + seconds)
+            self.throttled += 1
+            self.cond.notify_all()
+
+
+class RateGovernor:
+    """
+    업비트 요청 그룹별 토큰 버킷 모음
+
+    모든 업비트 요청은 보내기 전에 acquire()로 토큰을 얻고, 응답을 받으면
+    observe()로 Remaining-Req 헤더를 반영합니다. 한도를 넘는 호출은 실패시키지
+    않고 토큰이 생길 때까지 대기시켜, 여러 Streamlit 세션과 AutoTrader 스레드가
+    동시에 요청해도 429 없이 한도 근처의 처리량을 유지합니다.
+    """
+
+    def __init__(self, limits=None):
+        self.limits = dict(GROUP_LIMITS)
+        if limits:
+            self.limits.update(limits)
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def bucket(self, group):
+        with self._lock:
+            bucket = self._buckets.get(group)
+            if bucket is None:
+                bucket = TokenBucket(self.limits.get(group, DEFAULT_LIMIT))
+                self._buckets[group] = bucket
+            return bucket
+
+    def acquire(self, group, count=1, timeout=None):
+        return self.bucket(group).acquire(count=count, timeout=timeout)
+
+    def observe(self, headers, fallback_group=None):
+        """응답 헤더의 Remaining-Req 반영"""
+        value = headers.get("Remaining-Req") if headers else None
+        group, sec = parse_remaining_req(value)
+        group = group or fallback_group
+        if group:
+            self.bucket(group).observe(sec)
+
+    def penalize(self, group, seconds=TOO_MANY_REQUESTS_PENALTY):
+        self.bucket(group).penalize(seconds)
+
+    def stats(self):
+        """그룹별 대기/제한 횟수"""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {
+            group: {"tokens": round(b.tokens, 2), "waits": b.waits, "throttled": b.throttled}
+            for group, b in buckets.items()
+        }
+
+
+# 프로세스 전역 governor
+_GOVERNOR = RateGovernor()
+
+
+def get_governor():
+    """공유 RateGovernor 반환"""
+    return _GOVERNOR
+
+
+def throttle(group, count=1):
+    """group 요청 count회 분량의 토큰을 얻을 때까지 대기 (pyupbit 호출 앞에 사용)"""
+    _GOVERNOR.acquire(group, count=count)